@@ -17,18 +17,31 @@ Strategy:
 
 import os
 import re
+import platform
+import importlib.util
+import atexit
 import json
+import queue
+import logging
+import asyncio
 import sqlite3
 import threading
 import time
-from datetime import datetime
+import weakref
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple, Any
 from dataclasses import dataclass
+from functools import lru_cache
 
-from core.memory import MemoryStore
+from core.memory import MemoryStore, connect_db
 from core.memory_relevance_gate import should_store_memory
 
+logger = logging.getLogger(__name__)
+
 # ── Optional Kuzu ────────────────────────────────────────────────────────────
 try:
     import kuzu
@@ -43,8 +56,69 @@ try:
 except ImportError:
     SBERT_AVAILABLE = False
 
+# ONNX Runtime backend for sentence-transformers (sentence-transformers[onnx]);
+# only probed here, the backend imports it when the model loads
+ONNX_AVAILABLE = all(importlib.util.find_spec(name) is not None
+                     for name in ("onnxruntime", "optimum"))
+
+# ── Optional numpy (vectorised similarity; installed with sentence-transformers)
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# ── Optional pyahocorasick (single-pass topic matching) ──────────────────────
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# ── Optional hnswlib (approximate semantic search on large stores) ──────────
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False
+
+# ── Optional orjson (sync queue payloads and metadata; same JSON, faster) ────
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _json_dumps(obj) -> str:
+    """Serialize to a JSON string with orjson when available."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj)
+
+
+_json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 EMBEDDING_DIM   = 384
+# int8-quantized export shipped in the model repo, used by the ONNX backend
+EMBEDDING_ONNX_FILE = ("onnx/model_qint8_arm64.onnx"
+                       if platform.machine().lower() in ("arm64", "aarch64")
+                       else "onnx/model_quint8_avx2.onnx")
+RELATED_WINDOW  = 32   # recent memories kept per topic for RELATED_TO links
+SYNCED_RETENTION = timedelta(days=1)   # synced sync_queue rows kept this long
+ANN_MIN_ITEMS    = 10_000   # below this an exact matmul is as fast as HNSW
+ID_BLOCK         = 1_000    # memory ids reserved per sqlite_sequence update
+SYNC_MAX_ATTEMPTS = 5       # failed syncs before a queue row is marked dead
+
+# Open stores, flushed at interpreter exit without being kept alive by it
+_open_stores: "weakref.WeakSet" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_open_stores():
+    for store in list(_open_stores):
+        store.flush()
 
 # ── Topic taxonomy ───────────────────────────────────────────────────────────
 # Organised by domain. Synonyms map Portuguese → canonical English topic.
@@ -94,6 +168,146 @@ ENTITY_BLACKLIST = {
     "Pode", "Pela", "Pelo", "Para", "Muito", "Ainda", "Dessa", "Desse"
 }
 
+# ── Precompiled extraction patterns ──────────────────────────────────────────
+_CAMEL_RE  = re.compile(r'\b[A-Z][a-z]+(?:[A-Z][a-z]+)+\b')
+_PASCAL_RE = re.compile(r'\b[A-Z][a-z]+[A-Z]\w*\b')
+_PATH_RE   = re.compile(r'[\w./]+\.(?:py|yaml|yml|md|sh|json|txt)\b')
+_ENV_RE    = re.compile(r'\b[A-Z][A-Z0-9_]{3,}\b')
+
+_TOPIC_ORDER    = {canonical: i for i, canonical in enumerate(TOPIC_TAXONOMY)}
+_TOPIC_SYNONYMS = {canonical: frozenset(s.lower() for s in syns)
+                   for canonical, syns in TOPIC_TAXONOMY.items()}
+
+
+def _build_term_automaton():
+    """
+    One Aho-Corasick automaton over lowercased taxonomy synonyms and
+    TECH_ENTITIES: term → (canonical topics, tech names). Tech names match
+    case-sensitively, so _terms_for checks their original spelling.
+    """
+    owners: Dict[str, Tuple[List[str], List[str]]] = {}
+    for canonical, synonyms in TOPIC_TAXONOMY.items():
+        for syn in synonyms:
+            owners.setdefault(syn.lower(), ([], []))[0].append(canonical)
+    for tech in TECH_ENTITIES:
+        owners.setdefault(tech.lower(), ([], []))[1].append(tech)
+    automaton = ahocorasick.Automaton()
+    for term, (canonicals, techs) in owners.items():
+        automaton.add_word(term, (tuple(canonicals), tuple(techs)))
+    automaton.make_automaton()
+    return automaton
+
+
+_TERM_AUTOMATON = _build_term_automaton() if AHOCORASICK_AVAILABLE else None
+_TECH_ORDER     = {tech: i for i, tech in enumerate(TECH_ENTITIES)}
+
+
+# ── Level 1 extraction (memoized) ───────────────────────────────────────────
+
+@lru_cache(maxsize=4096)
+def _terms_for(text: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Taxonomy topics and known technologies in text, each in declaration
+    order. Shared by _topics_for and _entities_for, so a stored memory's
+    text is lowercased and scanned once for both.
+    """
+    text_lower = text.lower()
+    if _TERM_AUTOMATON is None:
+        topics = [canonical for canonical, synonyms in TOPIC_TAXONOMY.items()
+                  if any(syn in text_lower for syn in synonyms)]
+        return tuple(topics), tuple(tech for tech in TECH_ENTITIES if tech in text)
+
+    # Lowercasing that changes the length (e.g. "İ") would shift the
+    # positions used to check a tech name's case; scan for those directly
+    aligned = len(text_lower) == len(text)
+    topics, techs = set(), set()
+    for end, (canonicals, names) in _TERM_AUTOMATON.iter(text_lower):
+        topics.update(canonicals)
+        for name in names:
+            if aligned and text.endswith(name, 0, end + 1):
+                techs.add(name)
+    if not aligned:
+        techs = {tech for tech in TECH_ENTITIES if tech in text}
+    return (tuple(sorted(topics, key=_TOPIC_ORDER.__getitem__)),
+            tuple(sorted(techs, key=_TECH_ORDER.__getitem__)))
+
+
+@lru_cache(maxsize=4096)
+def _topics_for(text: str) -> Tuple[str, ...]:
+    """
+    Extract topics using the TOPIC_TAXONOMY:
+    - Exact phrase / synonym matching (Portuguese + English)
+    - CamelCase token detection (FastAPI, HybridMemory, etc.)
+    Returns up to 8 canonical topic names.
+    """
+    # Taxonomy matching
+    found: List[str] = list(_terms_for(text)[0])
+
+    # CamelCase tokens → map to closest topic or add as-is
+    camel_tokens = _CAMEL_RE.findall(text)
+    for token in camel_tokens:
+        # Check if it's already covered
+        token_lower = token.lower()
+        already = any(token_lower in _TOPIC_SYNONYMS[canonical]
+                      for canonical in found
+                      if canonical in _TOPIC_SYNONYMS)
+        if not already and token not in found:
+            found.append(token)
+
+    # Cap topics to 3 max to reduce visual noise
+    return tuple(found[:3])
+
+
+@lru_cache(maxsize=4096)
+def _entities_for(text: str) -> Tuple[Tuple[str, str], ...]:
+    """
+    Extract named entities:
+    - Known tech stack list
+    - PascalCase identifiers
+    - File paths
+    - ENV variables (SCREAMING_SNAKE_CASE)
+    """
+    entities: List[Dict] = []
+
+    # Known technologies
+    techs = _terms_for(text)[1]
+    for tech in techs:
+        entities.append({"name": tech, "type": "TECHNOLOGY"})
+    seen = set(techs)
+
+    # PascalCase class/function names (stricter: must have an internal capital letter)
+    pascal = _PASCAL_RE.findall(text)
+    for name in pascal:
+        if name not in ENTITY_BLACKLIST and name not in seen:
+            entities.append({"name": name, "type": "CLASS"})
+            seen.add(name)
+
+    # File paths
+    paths = _PATH_RE.findall(text)
+    for path in paths:
+        entities.append({"name": path, "type": "FILE"})
+        seen.add(path)
+
+    # ENV variables
+    env_vars = _ENV_RE.findall(text)
+    for var in env_vars:
+        if var not in ENTITY_BLACKLIST and var not in seen:
+            entities.append({"name": var, "type": "CONFIG"})
+            seen.add(var)
+
+    # Final filtering of entities against blacklist
+    entities = [e for e in entities if e["name"] not in ENTITY_BLACKLIST]
+
+    # Cap entities to 3 max to reduce visual noise
+    return tuple((e["name"], e["type"]) for e in entities[:3])
+
+
+def _epoch_micros(value) -> int:
+    """Graph created_at value: epoch micros, converting legacy ISO strings."""
+    if isinstance(value, int):
+        return value
+    return int(datetime.fromisoformat(value).timestamp() * 1_000_000)
+
 
 @dataclass
 class MemoryQuery:
@@ -112,36 +326,164 @@ class HybridMemoryStore:
     Graph  : Semantic embeddings, relationship traversal, topic clusters
     """
 
-    def __init__(self, db_path: str, graph_path: Optional[str] = None):
+    def __init__(self, db_path: str, graph_path: Optional[str] = None,
+                 batch_size: int = 64, batch_interval_ms: int = 0,
+                 recall_cache_size: int = 256, recall_cache_threshold: float = 0.95,
+                 max_pending: int = 10_000, overflow_policy: str = "drop_oldest",
+                 enable_topics: bool = True, enable_entities: bool = True,
+                 enable_related: bool = True, enable_temporal: bool = True,
+                 embedding_backend: str = "auto", use_graph: bool = True):
+        if overflow_policy not in ("drop_oldest", "block"):
+            raise ValueError(f"Unknown overflow_policy: {overflow_policy!r}")
+        if embedding_backend not in ("auto", "onnx", "torch"):
+            raise ValueError(f"Unknown embedding_backend: {embedding_backend!r}")
+        if enable_related and not enable_topics:
+            raise ValueError("enable_related requires enable_topics")
         self.db_path    = db_path
         self.graph_path = graph_path or db_path.replace(".db", "_graph")
 
+        # Graph sync batching: up to batch_size queue items per Kuzu
+        # transaction. The worker drains as soon as it is woken; jobs queued
+        # while a batch syncs form the next one, so batches grow with load.
+        # batch_interval_ms > 0 adds a fixed linger after each wake-up.
+        self.batch_size        = batch_size
+        self.batch_interval_ms = batch_interval_ms
+        self._graph_tx         = False
+
+        # Graph sync steps run after the Memory node is created, chosen once
+        # here so a minimal deployment syncs with a single CREATE per memory.
+        # The batch path writes topics/entities itself, then runs _link_steps.
+        self.enable_topics   = enable_topics
+        self.enable_entities = enable_entities
+        self._link_steps = (
+            ([self._sync_temporal] if enable_temporal else [])
+            + ([self._sync_related] if enable_related else [])
+        )
+        self._sync_steps = (
+            ([self._sync_topics] if enable_topics else [])
+            + ([self._sync_entities] if enable_entities else [])
+            + self._link_steps
+        )
+
+        # Newest Memory node in the graph, so temporal links need no lookup
+        # (None = unknown, re-read from the graph on next use)
+        self._last_memory_id: Optional[int] = None
+
+        # Most recent memory ids per topic (window of RELATED_WINDOW), used to
+        # pick RELATED_TO targets without a topic fan-out join in the graph
+        self._topic_recent_ids: Dict[str, deque] = {}
+
+        # get_stats() graph counts, kept up to date by the sync code (None =
+        # unknown, counted once with Cypher). Writes inside a transaction
+        # collect in _graph_count_delta until COMMIT.
+        self._graph_counts: Optional[Dict[str, int]] = None
+        self._graph_count_delta = {"nodes": 0, "relationships": 0}
+
+        # Wakes the sync worker when this process enqueues work
+        self._sync_cv       = threading.Condition()
+        self._sync_notified = False
+
+        # Bound on unsynced queue rows. Past it the oldest jobs are dropped
+        # (the graph is derived data, see scrub_and_rebuild_graph) or, with
+        # "block", store() waits for the worker to catch up.
+        self.max_pending     = max_pending
+        self.overflow_policy = overflow_policy
+        self._pending        = 0
+        self._sync_dropped   = 0
+        self._pending_cv     = threading.Condition()
+
+        # Failed sync attempts per queue row; rows that reach
+        # SYNC_MAX_ATTEMPTS are marked dead (synced = -1) and not re-fetched
+        self._sync_failures: Counter = Counter()
+        self._sync_dead      = 0
+
+        # A Kuzu connection must not be used concurrently. Writes (and the
+        # reads they depend on) go through _graph_conn on this one thread;
+        # recalls check out a read connection from _graph_pool instead.
+        self._graph_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kuzu-graph")
+
+        # Semantic recall cache: graph recalls keyed by query embedding, so
+        # paraphrases (cosine >= threshold) reuse a prior result. Any write
+        # to either store invalidates it.
+        self.recall_cache_size      = recall_cache_size
+        self.recall_cache_threshold = recall_cache_threshold
+        self._recall_cache: "OrderedDict[tuple, Tuple[Optional[List[float]], List[Dict]]]" = OrderedDict()
+        self._recall_cache_lock = threading.Lock()
+
         # SQLite (always available)
         self.sqlite = MemoryStore(db_path)
 
-        # Durable sync queue — table in the same SQLite db
+        # Durable sync queue — table in the same SQLite db, on one long-lived
+        # connection shared (under _queue_lock) by store() and the sync worker
+        self._queue_conn = connect_db(self.db_path, check_same_thread=False)
+        self._queue_lock = threading.Lock()
         self._init_sync_queue_table()
+        self._init_embeddings_table()
+        with self._queue_db() as conn:
+            self._pending = conn.execute(
+                "SELECT COUNT(*) FROM sync_queue WHERE synced = 0"
+            ).fetchone()[0]
+
+        # store() only hands memories and their sync jobs to this writer
+        # thread, which batches them into memories + sync_queue; flush()
+        # waits for it (also run at exit). Memory ids come from a block
+        # reserved in sqlite_sequence, so AUTOINCREMENT inserts by other
+        # writers never collide with them; close() hands back the unused
+        # rest. Ids are queued in order, so
+        # _durable_id (highest committed) is what await_durable() waits on.
+        self._id_lock    = threading.Lock()
+        self._next_id    = 1
+        self._id_limit   = 0
+        self._last_id    = 0
+        self._durable_id = 0
+        self._durable_cv = threading.Condition()
+        self._write_failed: set = set()
+        self._write_q: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._storage_thread = threading.Thread(
+            target=self._storage_worker, daemon=True, name="sync-queue-writer"
+        )
+        self._storage_thread.start()
+        _open_stores.add(self)
 
-        # Embedding model (lazy-loaded)
+        # Embedding model (lazy-loaded). "auto" runs the int8 ONNX export
+        # when ONNX Runtime is installed and PyTorch otherwise.
+        self.embedding_backend = embedding_backend
         self._embed_model = None
         self._embed_lock  = threading.Lock()
 
-        # Kuzu Graph (optional)
+        # Stored embeddings as one float32 matrix for semantic search, loaded
+        # from SQLite on first use (None = not loaded). Rows embedded since
+        # then wait in _emb_new and are stacked on at the next search.
+        self._emb_ids: List[int] = []
+        self._emb_matrix: Optional["np.ndarray"] = None
+        self._emb_new: List[Tuple[int, List[float]]] = []
+        self._emb_lock = threading.Lock()
+
+        # HNSW index over the same rows once there are ANN_MIN_ITEMS of them
+        # (needs hnswlib). Built on a background thread, searches use the
+        # matrix until it is ready; saved next to the db by close() and
+        # topped up from the embeddings table when reopened. clear() bumps
+        # _emb_generation so a build started before it is thrown away.
+        self._ann: Optional["hnswlib.Index"] = None
+        self._ann_building  = False
+        self._emb_generation = 0
+
+        # Kuzu Graph (optional; use_graph=False gives a SQLite-only store)
         self.graph          = None
         self.graph_available = False
-        if KUZU_AVAILABLE:
+        if KUZU_AVAILABLE and use_graph:
             try:
                 self._init_graph()
                 self.graph_available = True
             except Exception as e:
-                print(f"⚠️  Graph initialization failed: {e}")
-                print("   Falling back to SQLite-only mode")
+                logger.warning("Graph initialization failed, falling back to SQLite-only mode: %s", e)
 
-        # Start background sync worker
+        # Replay crashes, then start the background sync worker (in this
+        # order so the two never share the graph connection concurrently)
         self._stop_sync = False
         if self.graph_available:
+            self._recover_pending_sync()
             self._start_background_sync()
-            self._recover_pending_sync()   # replay crashes
 
     # ─────────────────────────────────────────────────────────────────────────
     # Initialisation
@@ -149,26 +491,81 @@ class HybridMemoryStore:
 
     def _init_sync_queue_table(self):
         """Create durable sync_queue table in SQLite."""
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS sync_queue (
-                id         INTEGER PRIMARY KEY AUTOINCREMENT,
-                memory_id  INTEGER NOT NULL,
-                payload    TEXT    NOT NULL,
-                synced     INTEGER NOT NULL DEFAULT 0,
-                created_at TEXT    NOT NULL,
-                synced_at  TEXT
+        with self._queue_db() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sync_queue (
+                    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+                    memory_id  INTEGER NOT NULL,
+                    payload    TEXT    NOT NULL,
+                    synced     INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT    NOT NULL,
+                    synced_at  TEXT
+                )
+            """)
+            # The worker only ever reads pending rows, in id order
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_sync_queue_pending ON sync_queue(id) WHERE synced = 0"
             )
+
+    def _init_embeddings_table(self):
+        """Create the embeddings table: one float16 BLOB per memory, removed with it."""
+        conn = connect_db(self.db_path)
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                memory_id INTEGER PRIMARY KEY,
+                vec       BLOB    NOT NULL
+            );
+            CREATE TRIGGER IF NOT EXISTS embeddings_ad AFTER DELETE ON memories BEGIN
+                DELETE FROM embeddings WHERE memory_id = old.id;
+            END;
         """)
+        # Move vectors kept in metadata JSON by earlier versions
+        rows = conn.execute(
+            "SELECT id, json_extract(metadata, '$.embedding') FROM memories "
+            "WHERE json_extract(metadata, '$.embedding') IS NOT NULL"
+        ).fetchall()
+        if rows and NUMPY_AVAILABLE:
+            conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (memory_id, vec) VALUES (?, ?)",
+                [(row_id, np.asarray(json.loads(vec), dtype=np.float16).tobytes())
+                 for row_id, vec in rows]
+            )
+            conn.execute("UPDATE memories SET metadata = json_remove(metadata, '$.embedding') "
+                         "WHERE json_extract(metadata, '$.embedding') IS NOT NULL")
         conn.commit()
         conn.close()
 
+    @contextmanager
+    def _queue_db(self):
+        """Hold the shared sync_queue connection; commits on exit, rolls back on error."""
+        with self._queue_lock:
+            try:
+                yield self._queue_conn
+                self._queue_conn.commit()
+            except BaseException:
+                self._queue_conn.rollback()
+                raise
+
     def _init_graph(self):
         """Initialise Kuzu graph database and ensure schema."""
         Path(self.graph_path).parent.mkdir(parents=True, exist_ok=True)
         self._graph_db   = kuzu.Database(self.graph_path)
         self._graph_conn = kuzu.Connection(self._graph_db)
         self._ensure_graph_schema()
+        # Read connections: queries see the last committed state, so they
+        # run alongside the writer and use Kuzu's parallel execution
+        self._graph_pool: "queue.Queue[kuzu.Connection]" = queue.Queue()
+        for _ in range(os.cpu_count() or 1):
+            self._graph_pool.put(kuzu.Connection(self._graph_db))
+
+    @contextmanager
+    def _checkout(self):
+        """Borrow a read connection from the pool."""
+        conn = self._graph_pool.get()
+        try:
+            yield conn
+        finally:
+            self._graph_pool.put(conn)
 
     def _ensure_graph_schema(self):
         """Create graph schema including embedding field."""
@@ -179,7 +576,7 @@ class HybridMemoryStore:
                     content    STRING,
                     category   STRING,
                     importance STRING,
-                    created_at TIMESTAMP,
+                    created_at INT64,
                     PRIMARY KEY(id)
                 )""",
             """CREATE NODE TABLE IF NOT EXISTS Topic(
@@ -220,7 +617,15 @@ class HybridMemoryStore:
                 self._graph_conn.execute(stmt)
             except Exception as e:
                 if "already exists" not in str(e).lower():
-                    print(f"Schema note: {e}")
+                    logger.warning("Schema note: %s", e)
+
+        # created_at is epoch micros; graphs created before that keep a
+        # TIMESTAMP column and get the value converted on write
+        self._created_at_expr = "{}"
+        result = self._graph_conn.execute("CALL table_info('Memory') RETURN *")
+        for row in result.get_all():
+            if row[1] == "created_at" and row[2] == "TIMESTAMP":
+                self._created_at_expr = "to_timestamp({} / 1000000.0)"
 
     # ─────────────────────────────────────────────────────────────────────────
     # Embeddings (Level 2)
@@ -230,11 +635,22 @@ class HybridMemoryStore:
         """Lazy-load the embedding model (thread-safe)."""
         if self._embed_model is None and SBERT_AVAILABLE:
             with self._embed_lock:
+                if self._embed_model is None:
+                    if self.embedding_backend == "onnx" or (
+                            self.embedding_backend == "auto" and ONNX_AVAILABLE):
+                        try:
+                            self._embed_model = SentenceTransformer(
+                                EMBEDDING_MODEL, backend="onnx",
+                                model_kwargs={"file_name": EMBEDDING_ONNX_FILE},
+                            )
+                        except Exception as e:
+                            logger.warning("ONNX embedding model failed to load, "
+                                           "using PyTorch: %s", e)
                 if self._embed_model is None:
                     try:
                         self._embed_model = SentenceTransformer(EMBEDDING_MODEL)
                     except Exception as e:
-                        print(f"⚠️  Embedding model failed to load: {e}")
+                        logger.warning("Embedding model failed to load: %s", e)
         return self._embed_model
 
     def _embed(self, text: str) -> Optional[List[float]]:
@@ -247,72 +663,469 @@ class HybridMemoryStore:
         except Exception:
             return None
 
+    def _embed_many(self, texts: List[str]) -> Optional["np.ndarray"]:
+        """Batch version of _embed(): one encode call (length-sorted by the model)."""
+        model = self._get_embed_model()
+        if model is None or not texts:
+            return None
+        try:
+            return model.encode(texts, batch_size=32, normalize_embeddings=True,
+                                convert_to_numpy=True)
+        except Exception:
+            return None
+
+    def _store_embeddings(self, items: List[Dict]):
+        """Embed a sync batch and save the vectors as float16 BLOBs in the
+        embeddings table, where _embedding_similarity_search reads them."""
+        vectors = self._embed_many([item["content"] for item in items])
+        if vectors is None:
+            return
+        conn = connect_db(self.db_path)
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (memory_id, vec) VALUES (?, ?)",
+                [(item["id"], vec.tobytes())
+                 for item, vec in zip(items, vectors.astype(np.float16))],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        with self._emb_lock:
+            if self._emb_matrix is not None:
+                self._emb_new.extend((item["id"], vec) for item, vec in zip(items, vectors))
+
+    def _embedding_matrix(self) -> Tuple[List[int], "np.ndarray"]:
+        """Memory ids and their unit embedding rows, loading and extending the cache."""
+        with self._emb_lock:
+            if self._emb_matrix is None:
+                conn = connect_db(self.db_path)
+                rows = conn.execute("SELECT memory_id, vec FROM embeddings").fetchall()
+                conn.close()
+                self._emb_ids    = []
+                self._emb_matrix = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+                self._emb_new    = [(row_id, np.frombuffer(vec, dtype=np.float16))
+                                    for row_id, vec in rows]
+            if self._emb_new:
+                # A re-synced memory replaces its earlier row
+                new = dict(self._emb_new)
+                keep = [i for i, row_id in enumerate(self._emb_ids) if row_id not in new]
+                rows = np.asarray(list(new.values()), dtype=np.float32)
+                self._emb_ids    = [self._emb_ids[i] for i in keep] + list(new)
+                self._emb_matrix = np.vstack([self._emb_matrix[keep], rows]) if keep else rows
+                self._emb_new    = []
+                if self._ann is not None:
+                    self._ann_add(self._ann, list(new), rows)
+            if (self._ann is None and not self._ann_building and HNSWLIB_AVAILABLE
+                    and len(self._emb_ids) >= ANN_MIN_ITEMS):
+                self._ann_building = True
+                threading.Thread(
+                    target=self._build_ann, daemon=True, name="hnsw-build",
+                    args=(list(self._emb_ids), self._emb_matrix, self._emb_generation),
+                ).start()
+            return self._emb_ids, self._emb_matrix
+
+    def _ann_path(self, dim: int) -> str:
+        # The dimension is part of the name: hnswlib can't tell a mismatch on load
+        return self.db_path.replace(".db", f"_ann{dim}.bin")
+
+    def _build_ann(self, ids: List[int], matrix: "np.ndarray", generation: int):
+        """Open the saved HNSW index (or start one) and add the rows it lacks."""
+        try:
+            ann  = hnswlib.Index(space="cosine", dim=matrix.shape[1])
+            path = self._ann_path(matrix.shape[1])
+            if os.path.exists(path):
+                ann.load_index(path, max_elements=len(ids))
+                known = set(ann.get_ids_list())
+                for label in known.difference(ids):   # deleted since it was saved
+                    ann.mark_deleted(label)
+            else:
+                ann.init_index(max_elements=len(ids), ef_construction=200, M=16)
+                known = set()
+            missing = [i for i, row_id in enumerate(ids) if row_id not in known]
+            if missing:
+                self._ann_add(ann, [ids[i] for i in missing], matrix[missing])
+            ann.set_ef(64)
+        except Exception:
+            logger.warning("Building the HNSW index failed", exc_info=True)
+            ann = None
+        with self._emb_lock:
+            self._ann_building = False
+            if ann is None or generation != self._emb_generation:
+                return
+            # Rows stacked on while the index was being built
+            built = set(ids)
+            new   = [i for i, row_id in enumerate(self._emb_ids) if row_id not in built]
+            if new:
+                self._ann_add(ann, [self._emb_ids[i] for i in new], self._emb_matrix[new])
+            self._ann = ann
+
+    @staticmethod
+    def _ann_add(ann: "hnswlib.Index", ids: List[int], rows: "np.ndarray"):
+        """Add (or replace) rows by memory id, growing the index as needed."""
+        needed = ann.get_current_count() + len(ids)
+        if needed > ann.get_max_elements():
+            ann.resize_index(max(needed, 2 * ann.get_max_elements()))
+        ann.add_items(rows, ids)
+
     # ─────────────────────────────────────────────────────────────────────────
     # Durable sync queue (Level 3)
     # ─────────────────────────────────────────────────────────────────────────
 
     def _enqueue(self, memory_id: int, payload: dict):
-        """Insert a pending graph-sync job into the durable SQLite queue."""
-        conn = sqlite3.connect(self.db_path)
-        conn.execute(
-            "INSERT INTO sync_queue (memory_id, payload, created_at) VALUES (?, ?, ?)",
-            (memory_id, json.dumps(payload), datetime.now().isoformat())
-        )
-        conn.commit()
-        conn.close()
+        """Hand a pending graph-sync job to the storage worker."""
+        self._enqueue_many([(memory_id, payload)])
+
+    def _enqueue_many(self, jobs: List[Tuple[int, dict]]):
+        """Hand several (memory_id, payload) graph-sync jobs to the storage worker."""
+        self._reserve_pending(len(jobs))
+        now = datetime.now().isoformat()
+        self._write_q.put(([], [(memory_id, _json_dumps(payload), now) for memory_id, payload in jobs]))
+
+    def _submit(self, rows: List[Dict]) -> List[int]:
+        """
+        Give memory rows (content, category, importance, metadata) ids and
+        hand them, with graph-sync jobs for those passing the Relevance Gate,
+        to the storage worker. Returns the ids without waiting for the write.
+        """
+        synced = [self.graph_available and should_store_memory(row["content"])   # Level 4: Relevance Gate
+                  for row in rows]
+        self._reserve_pending(sum(synced))
+        now        = datetime.now().isoformat()
+        created_at = time.time_ns() // 1000
+        with self._id_lock:
+            first = self._allocate_ids(len(rows))
+            memory_rows, jobs = [], []
+            for memory_id, row, sync in zip(range(first, first + len(rows)), rows, synced):
+                memory_rows.append((memory_id, row["content"], row["category"], row["importance"],
+                                    _json_dumps(row["metadata"]) if row["metadata"] else None))
+                if sync:
+                    payload = {**row, "id": memory_id, "created_at": created_at}
+                    jobs.append((memory_id, _json_dumps(payload), now))
+                elif self.graph_available:
+                    logger.debug("Memory suppressed by Relevance Gate: %s...", row["content"][:30])
+            self._write_q.put((memory_rows, jobs))
+            self._last_id = first + len(rows) - 1
+        return list(range(first, first + len(rows)))
+
+    def _allocate_ids(self, n: int) -> int:
+        """First of n consecutive unused memory ids (caller holds _id_lock)."""
+        if self._next_id + n - 1 > self._id_limit:
+            size = max(ID_BLOCK, n)
+            with self._queue_db() as conn:
+                conn.execute(
+                    "INSERT INTO sqlite_sequence (name, seq) SELECT 'memories', 0 "
+                    "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'memories')"
+                )
+                conn.execute(
+                    "UPDATE sqlite_sequence SET seq = MAX(seq, "
+                    "(SELECT IFNULL(MAX(id), 0) FROM memories)) + ? WHERE name = 'memories'",
+                    (size,)
+                )
+                self._id_limit = conn.execute(
+                    "SELECT seq FROM sqlite_sequence WHERE name = 'memories'"
+                ).fetchone()[0]
+            self._next_id = self._id_limit - size + 1
+        first = self._next_id
+        self._next_id += n
+        return first
+
+    def _release_ids(self):
+        """Hand the unused rest of the id block back, unless another writer moved past it."""
+        with self._id_lock:
+            if self._next_id > self._id_limit:
+                return
+            with self._queue_db() as conn:
+                conn.execute(
+                    "UPDATE sqlite_sequence SET seq = MAX(?, "
+                    "(SELECT IFNULL(MAX(id), 0) FROM memories)) "
+                    "WHERE name = 'memories' AND seq = ?",
+                    (self._next_id - 1, self._id_limit)
+                )
+            self._id_limit = self._next_id - 1
+
+    def _storage_worker(self):
+        """Write queued memories and sync jobs, up to 100 puts per transaction."""
+        while True:
+            batch = [self._write_q.get()]
+            if batch[0] is None:
+                return   # close()
+            while len(batch) < 100:
+                try:
+                    batch.append(self._write_q.get_nowait())
+                except queue.Empty:
+                    break
+            writes = [entry for entry in batch if isinstance(entry, tuple)]
+            if writes:
+                try:
+                    self._write_batch(writes)
+                except Exception:
+                    # Retry one put at a time so a bad row only loses its own
+                    logger.warning("Writing %d queued puts failed, retrying singly",
+                                   len(writes), exc_info=True)
+                    for memory_rows, jobs in writes:
+                        try:
+                            self._write_batch([(memory_rows, jobs)])
+                        except Exception:
+                            logger.warning("Writing memories %s and %d sync jobs failed; "
+                                           "those memories are lost",
+                                           [row[0] for row in memory_rows], len(jobs),
+                                           exc_info=True)
+                            self._write_failed.update(row[0] for row in memory_rows)
+                            self._release_pending(len(jobs))
+                written = [row[0] for memory_rows, _ in writes for row in memory_rows]
+                if written:
+                    with self._durable_cv:
+                        self._durable_id = max(self._durable_id, max(written))
+                        self._durable_cv.notify_all()
+            for entry in batch:
+                if isinstance(entry, threading.Event):
+                    entry.set()
+
+    def _write_batch(self, writes: List[Tuple[list, list]]):
+        """Insert (memory_rows, sync_jobs) puts in one transaction."""
+        memory_rows = [row for rows, _ in writes for row in rows]
+        jobs        = [job for _, batch_jobs in writes for job in batch_jobs]
+        with self._queue_db() as conn:
+            if memory_rows:
+                conn.executemany(
+                    "INSERT INTO memories (id, content, category, importance, metadata) "
+                    "VALUES (?, ?, ?, ?, ?)", memory_rows
+                )
+            if jobs:
+                conn.executemany(
+                    "INSERT INTO sync_queue (memory_id, payload, created_at) "
+                    "VALUES (?, ?, ?)", jobs
+                )
+                if self.overflow_policy == "drop_oldest":
+                    self._drop_overflow(conn)
+        if jobs:
+            self._notify_sync()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything handed over by store() is written to SQLite."""
+        done = threading.Event()
+        self._write_q.put(done)
+        return done.wait(timeout)
+
+    def await_durable(self, memory_id: Optional[int] = None,
+                      timeout: Optional[float] = None) -> bool:
+        """
+        Wait until memory ``memory_id`` (default: every memory stored so far)
+        is committed to SQLite. Returns False on timeout or if its write
+        failed (for the default, if any write has failed).
+        """
+        if self._storage_thread is None:
+            return True   # closed, so every write is flushed
+        target = self._last_id if memory_id is None else min(memory_id, self._last_id)
+        with self._durable_cv:
+            if not self._durable_cv.wait_for(lambda: self._durable_id >= target, timeout):
+                return False
+        if memory_id is None:
+            return not self._write_failed
+        return memory_id not in self._write_failed
+
+    def _reserve_pending(self, n: int):
+        """Count n more unsynced jobs; with "block", first wait for room under max_pending."""
+        with self._pending_cv:
+            if self.overflow_policy == "block":
+                # A burst larger than the cap only waits for an empty queue
+                self._pending_cv.wait_for(
+                    lambda: self._pending + n <= self.max_pending or self._pending == 0
+                            or self._stop_sync
+                )
+            self._pending += n
+
+    def _drop_overflow(self, conn: sqlite3.Connection):
+        """Delete the oldest unsynced rows past max_pending (jobs still in
+        _write_q are newer, so they count but are never the ones dropped)."""
+        with self._pending_cv:
+            overflow = self._pending - self.max_pending
+            if overflow <= 0:
+                return
+            dropped = conn.execute(
+                "DELETE FROM sync_queue WHERE id IN ("
+                "SELECT id FROM sync_queue WHERE synced = 0 ORDER BY id LIMIT ?)",
+                (overflow,)
+            ).rowcount
+            self._pending      -= dropped
+            self._sync_dropped += dropped
+
+    def _release_pending(self, n: int):
+        """Account for n jobs leaving the unsynced set."""
+        if n <= 0:
+            return
+        with self._pending_cv:
+            self._pending = max(0, self._pending - n)
+            self._pending_cv.notify_all()
+
+    def _notify_sync(self):
+        """Wake the background sync worker."""
+        with self._sync_cv:
+            self._sync_notified = True
+            self._sync_cv.notify()
 
     def _recover_pending_sync(self):
         """On startup, replay any queue items not synced before last shutdown."""
-        conn = sqlite3.connect(self.db_path)
-        rows = conn.execute(
-            "SELECT id, memory_id, payload FROM sync_queue WHERE synced = 0 ORDER BY id"
-        ).fetchall()
-        conn.close()
+        with self._queue_db() as conn:
+            rows = conn.execute(
+                "SELECT id, memory_id, payload FROM sync_queue WHERE synced = 0 ORDER BY id"
+            ).fetchall()
 
         if rows:
-            print(f"🔄 Recovering {len(rows)} unsynced memory items to graph...")
-            for row_id, memory_id, payload_json in rows:
-                try:
-                    item = json.loads(payload_json)
-                    self._sync_to_graph(item)
-                    self._mark_synced(row_id)
-                except Exception as e:
-                    print(f"   Recovery failed for queue item {row_id}: {e}")
+            logger.info("Recovering %d unsynced memory items to graph", len(rows))
+            for start in range(0, len(rows), self.batch_size):
+                self._mark_synced_many(self._sync_batch(rows[start:start + self.batch_size]))
+
+    def _sync_batch(self, rows: List[Tuple[int, int, str]]) -> List[int]:
+        """
+        Sync (queue_id, memory_id, payload) rows to the graph in one Kuzu
+        transaction. If any statement fails Kuzu has already rolled the
+        transaction back, so the rows are retried one by one in autocommit
+        mode. Returns the queue ids that were synced.
+        """
+        items = []
+        for row_id, memory_id, payload_json in rows:
+            try:
+                items.append((row_id, _json_loads(payload_json)))
+            except Exception:
+                logger.warning("Sync error for queue item %s", row_id, exc_info=True)
+
+        try:
+            self._store_embeddings([item for _, item in items])
+        except Exception:
+            logger.warning("Storing embeddings failed", exc_info=True)
+
+        self._graph_tx = True
+        try:
+            self._graph_conn.execute("BEGIN TRANSACTION")
+            self._sync_many_to_graph([item for _, item in items])
+            self._graph_conn.execute("COMMIT")
+            self._graph_tx = False
+            self._count_graph_writes()
+            return [row_id for row_id, _ in items]
+        except Exception:
+            self._last_memory_id = None
+            self._topic_recent_ids.clear()
+            self._graph_count_delta = {"nodes": 0, "relationships": 0}
+            try:
+                self._graph_conn.execute("ROLLBACK")
+            except Exception:
+                pass   # already rolled back by the failing statement
+        finally:
+            self._graph_tx = False
+
+        synced = []
+        for row_id, item in items:
+            try:
+                self._sync_to_graph(item)
+                synced.append(row_id)
+            except Exception:
+                logger.warning("Sync error for queue item %s", row_id, exc_info=True)
+        return synced
+
+    def _mark_synced_many(self, queue_ids: List[int]):
+        """Mark several queue items as synced in one commit."""
+        if not queue_ids:
+            return
+        now = datetime.now().isoformat()
+        with self._queue_db() as conn:
+            # Only rows still pending count (a dropped row updates nothing)
+            updated = conn.executemany(
+                "UPDATE sync_queue SET synced = 1, synced_at = ? WHERE id = ? AND synced = 0",
+                [(now, queue_id) for queue_id in queue_ids]
+            ).rowcount
+        self._release_pending(updated)
+
+    def _record_sync_failures(self, rows: List[Tuple[int, int, str]], synced: List[int]):
+        """Count a failed attempt for each unsynced row; mark the hopeless ones dead."""
+        synced = set(synced)
+        dead   = []
+        for row_id, _, _ in rows:
+            if row_id in synced:
+                continue
+            self._sync_failures[row_id] += 1
+            if self._sync_failures[row_id] >= SYNC_MAX_ATTEMPTS:
+                del self._sync_failures[row_id]
+                dead.append(row_id)
+        if not dead:
+            return
+        logger.warning("Giving up on sync_queue items %s after %d attempts",
+                       dead, SYNC_MAX_ATTEMPTS)
+        with self._queue_db() as conn:
+            updated = conn.executemany(
+                "UPDATE sync_queue SET synced = -1 WHERE id = ? AND synced = 0",
+                [(row_id,) for row_id in dead]
+            ).rowcount
+        self._sync_dead += updated
+        self._release_pending(updated)
 
     def _mark_synced(self, queue_id: int):
         """Mark a queue item as successfully synced."""
-        conn = sqlite3.connect(self.db_path)
-        conn.execute(
-            "UPDATE sync_queue SET synced = 1, synced_at = ? WHERE id = ?",
-            (datetime.now().isoformat(), queue_id)
-        )
-        conn.commit()
-        conn.close()
+        with self._queue_db() as conn:
+            updated = conn.execute(
+                "UPDATE sync_queue SET synced = 1, synced_at = ? WHERE id = ? AND synced = 0",
+                (datetime.now().isoformat(), queue_id)
+            ).rowcount
+        self._release_pending(updated)
+
+    def _purge_synced(self):
+        """Delete sync_queue rows synced longer ago than SYNCED_RETENTION."""
+        cutoff = (datetime.now() - SYNCED_RETENTION).isoformat()
+        with self._queue_db() as conn:
+            conn.execute("DELETE FROM sync_queue WHERE synced = 1 AND synced_at < ?", (cutoff,))
 
     def _start_background_sync(self):
         """Start background thread that drains the durable sync queue."""
         def sync_worker():
+            last_purge = float("-inf")
+            backoff    = 0.05
             while not self._stop_sync:
                 try:
-                    conn = sqlite3.connect(self.db_path)
-                    rows = conn.execute(
-                        "SELECT id, memory_id, payload FROM sync_queue "
-                        "WHERE synced = 0 ORDER BY id LIMIT 10"
-                    ).fetchall()
-                    conn.close()
-
-                    for row_id, memory_id, payload_json in rows:
+                    with self._queue_db() as conn:
+                        rows = conn.execute(
+                            "SELECT id, memory_id, payload FROM sync_queue "
+                            "WHERE synced = 0 ORDER BY id LIMIT ?",
+                            (self.batch_size,)
+                        ).fetchall()
+
+                    if rows:
                         try:
-                            item = json.loads(payload_json)
-                            self._sync_to_graph(item)
-                            self._mark_synced(row_id)
-                        except Exception as e:
-                            print(f"Sync error for queue item {row_id}: {e}")
-
-                    time.sleep(0.2 if rows else 1.0)
-                except Exception as e:
-                    print(f"Sync worker error: {e}")
-                    time.sleep(2.0)
+                            future = self._graph_executor.submit(self._sync_batch, rows)
+                        except RuntimeError:
+                            return   # executor shut down at interpreter exit
+                        synced = future.result()
+                        self._mark_synced_many(synced)
+                        self._invalidate_recall_cache()
+                        if len(synced) < len(rows):
+                            # Don't re-drain a failing row at once: back off
+                            self._record_sync_failures(rows, synced)
+                            with self._sync_cv:
+                                self._sync_cv.wait_for(lambda: self._stop_sync, timeout=backoff)
+                            backoff = min(backoff * 2, 2.0)
+                            continue
+                    if len(rows) == self.batch_size:
+                        backoff = 0.05
+                        continue   # more pending, keep draining
+                    if time.monotonic() - last_purge > 3600:
+                        self._purge_synced()
+                        last_purge = time.monotonic()
+
+                    # Idle: sleep until store() signals new work. The timeout
+                    # still picks up rows queued by other processes.
+                    with self._sync_cv:
+                        notified = self._sync_cv.wait_for(
+                            lambda: self._sync_notified or self._stop_sync, timeout=1.0
+                        )
+                        self._sync_notified = False
+                    if notified and self.batch_interval_ms and not self._stop_sync:
+                        time.sleep(self.batch_interval_ms / 1000)
+                    backoff = 0.05
+                except Exception:
+                    logger.warning("Sync worker error", exc_info=True)
+                    # Back off exponentially while errors persist
+                    with self._sync_cv:
+                        self._sync_cv.wait_for(lambda: self._stop_sync, timeout=backoff)
+                    backoff = min(backoff * 2, 2.0)
 
         t = threading.Thread(target=sync_worker, daemon=True)
         t.start()
@@ -325,28 +1138,75 @@ class HybridMemoryStore:
     def store(self, content: str, category: str = "general",
               importance: str = "medium", metadata: Optional[Dict] = None) -> int:
         """
-        Store memory: SQLite (sync, fast) + durable queue → Graph (async).
-        Returns SQLite memory ID immediately.
+        Store memory: SQLite row + sync job → storage worker (one transaction)
+        → durable queue → Graph (async). Returns the memory ID immediately;
+        await_durable(memory_id) waits for the SQLite commit.
         """
-        memory_id = self.sqlite.store(content, category, importance, metadata)
+        if self._storage_thread is None:   # closed
+            memory_id = self.sqlite.store(content, category, importance, metadata)
+            self._invalidate_recall_cache()
+            return memory_id
+
+        [memory_id] = self._submit([{
+            "content":    content,
+            "category":   category,
+            "importance": importance,
+            "metadata":   metadata or {},
+        }])
+        self._invalidate_recall_cache()
+        return memory_id
 
-        if self.graph_available:
-            # Level 4: Relevance Gate
-            if not should_store_memory(content):
-                print(f"🔇 Memory suppressed by Relevance Gate: {content[:30]}...")
-                return memory_id
-                
-            payload = {
-                "id":         memory_id,
-                "content":    content,
-                "category":   category,
-                "importance": importance,
-                "metadata":   metadata or {},
-                "created_at": datetime.now().isoformat(),
-            }
-            self._enqueue(memory_id, payload)
+    def store_many(self, items: List[Dict],
+                   common_metadata: Optional[Dict] = None) -> List[int]:
+        """
+        Batch version of store(): the memories and their graph-sync jobs are
+        written in one transaction. ``common_metadata`` is merged under each
+        item's own metadata. Returns memory IDs in input order.
+        """
+        rows = []
+        for item in items:
+            metadata = {**(common_metadata or {}), **(item.get("metadata") or {})}
+            rows.append({
+                "content":    item["content"],
+                "category":   item.get("category", "general"),
+                "importance": item.get("importance", "medium"),
+                "metadata":   metadata,
+            })
+        if self._storage_thread is None:   # closed
+            memory_ids = self.sqlite.store_many(rows)
+        else:
+            memory_ids = self._submit(rows) if rows else []
+        self._invalidate_recall_cache()
+        return memory_ids
 
-        return memory_id
+    def delete_memory(self, memory_id: int) -> bool:
+        """
+        Delete a memory from SQLite, drop its unsynced graph job and remove
+        its graph node. Returns False if no such memory was stored.
+        """
+        self.await_durable(memory_id)
+        deleted = self.sqlite.delete_memory(memory_id)
+        if self.graph_available:
+            try:
+                with self._queue_db() as conn:
+                    dropped = conn.execute(
+                        "DELETE FROM sync_queue WHERE memory_id = ? AND synced = 0", (memory_id,)
+                    ).rowcount
+                self._release_pending(dropped)
+                self._graph_executor.submit(self._delete_graph_memory, memory_id).result()
+            except Exception:
+                logger.warning("Removing memory %s from the graph failed", memory_id, exc_info=True)
+        self._invalidate_recall_cache()
+        return deleted
+
+    def _delete_graph_memory(self, memory_id: int):
+        """Remove a Memory node and its edges (graph thread only)."""
+        self._graph_conn.execute(
+            "MATCH (m:Memory) WHERE m.id = $id DETACH DELETE m", {"id": memory_id}
+        )
+        self._graph_counts = None   # edges removed are not counted, recount
+        if self._last_memory_id == memory_id:
+            self._last_memory_id = None
 
     def scrub_and_rebuild_graph(self) -> int:
         """
@@ -356,31 +1216,24 @@ class HybridMemoryStore:
         if not self.graph_available:
             return 0
             
-        print("🧹 Scrubbing and rebuilding Kuzu Knowledge Graph...")
-        
-        # 1. Wipe Kuzu
-        try:
-            # Delete relationships first
-            self._graph_conn.execute("MATCH ()-[r]->() DELETE r")
-            # Delete nodes
-            for table in ("Memory", "Topic", "Entity"):
-                self._graph_conn.execute(f"MATCH (n:{table}) DELETE n")
-        except Exception as e:
-            print(f"Error during wipe: {e}")
-            try:
-                # Fallback to DETACH DELETE if supported
-                for table in ("Memory", "Topic", "Entity"):
-                    self._graph_conn.execute(f"MATCH (n:{table}) DETACH DELETE n")
-            except:
-                pass
-            
-        # 2. Fetch all from SQLite
-        conn = sqlite3.connect(self.db_path)
+        logger.info("Scrubbing and rebuilding Kuzu Knowledge Graph")
+
+        # Fetch all from SQLite; the graph work runs on the graph thread
+        self.await_durable()
+        conn = connect_db(self.db_path)
         rows = conn.execute(
             "SELECT id, content, category, importance, created_at, metadata FROM memories"
         ).fetchall()
         conn.close()
-        
+        count = self._graph_executor.submit(self._rebuild_graph, rows).result()
+
+        self._invalidate_recall_cache()
+        logger.info("Graph scrubbed, re-ingested %d valid memories", count)
+        return count
+
+    def _rebuild_graph(self, rows: list) -> int:
+        """Wipe the graph and re-sync the memory rows that pass the filters (graph thread only)."""
+        self._wipe_graph()
         count = 0
         for row in rows:
             mid, content, cat, imp, created_at, meta_json = row
@@ -390,7 +1243,7 @@ class HybridMemoryStore:
                 continue
                 
             try:
-                meta = json.loads(meta_json) if meta_json else {}
+                meta = _json_loads(meta_json) if meta_json else {}
                 item = {
                     "id": mid,
                     "content": content,
@@ -399,15 +1252,44 @@ class HybridMemoryStore:
                     "created_at": created_at,
                     "metadata": meta
                 }
-                # Sync directly (sync mode for scrubbing)
                 self._sync_to_graph(item)
                 count += 1
-            except Exception as e:
-                print(f"Error re-syncing memory {mid}: {e}")
-                
-        print(f"✨ Graph scrubbed! Re-ingested {count} valid memories.")
+            except Exception:
+                logger.warning("Error re-syncing memory %s", mid, exc_info=True)
         return count
 
+    def _wipe_graph(self):
+        """Delete every node and relationship (graph thread only)."""
+        self._last_memory_id = None
+        self._topic_recent_ids.clear()
+        self._graph_counts   = None
+        try:
+            # Delete relationships first
+            self._graph_conn.execute("MATCH ()-[r]->() DELETE r")
+            # Delete nodes
+            for table in ("Memory", "Topic", "Entity"):
+                self._graph_conn.execute(f"MATCH (n:{table}) DELETE n")
+        except Exception as e:
+            logger.warning("Error during wipe, retrying with DETACH DELETE: %s", e)
+            try:
+                # Fallback to DETACH DELETE if supported
+                for table in ("Memory", "Topic", "Entity"):
+                    self._graph_conn.execute(f"MATCH (n:{table}) DETACH DELETE n")
+            except Exception:
+                logger.warning("Graph wipe failed", exc_info=True)
+
+    def sync_to_graph(self, item: Dict):
+        """Write one memory item to the graph now, on the graph thread (for backfills)."""
+        self._graph_executor.submit(self._sync_to_graph, item).result()
+        self._invalidate_recall_cache()
+
+    def graph_memory_ids(self) -> set:
+        """Ids of the Memory nodes currently in the graph."""
+        if not self.graph_available:
+            return set()
+        with self._checkout() as conn:
+            return {row[0] for row in conn.execute("MATCH (m:Memory) RETURN m.id").get_all()}
+
     def recall(self, query: MemoryQuery) -> List[Dict]:
         """
         Route queries:
@@ -419,12 +1301,44 @@ class HybridMemoryStore:
         if query.query_type == "quick":
             return self._recall_sqlite(query)
         elif self.graph_available:
-            return self._recall_graph(query)
+            if self.recall_cache_size <= 0:
+                return self._recall_graph(query)
+            # Only semantic recall uses the embedding; other types are
+            # cached on their normalized text alone
+            query_vec = self._embed(query.text) if query.query_type == "semantic" else None
+            cached = self._recall_cache_get(query, query_vec)
+            if cached is not None:
+                return cached
+            results = self._recall_graph(query, query_vec)
+            self._recall_cache_put(query, query_vec, results)
+            return results
         else:
             return self._recall_sqlite(query)
 
+    # Coroutine variants for async callers (the web UI): the blocking SQLite
+    # and Kuzu work runs in the default executor, off the event loop.
+
+    async def astore(self, content: str, category: str = "general",
+                     importance: str = "medium", metadata: Optional[Dict] = None) -> int:
+        """Async store(); see store()."""
+        return await asyncio.to_thread(self.store, content, category, importance, metadata)
+
+    async def astore_many(self, items: List[Dict],
+                          common_metadata: Optional[Dict] = None) -> List[int]:
+        """Async store_many(); see store_many()."""
+        return await asyncio.to_thread(self.store_many, items, common_metadata)
+
+    async def adelete_memory(self, memory_id: int) -> bool:
+        """Async delete_memory(); see delete_memory()."""
+        return await asyncio.to_thread(self.delete_memory, memory_id)
+
+    async def arecall(self, query: MemoryQuery) -> List[Dict]:
+        """Async recall(); see recall()."""
+        return await asyncio.to_thread(self.recall, query)
+
     def get_stats(self) -> Dict:
         """Statistics from both stores."""
+        self.await_durable()
         sqlite_stats = self.sqlite.get_stats()
         if "total" not in sqlite_stats:
             sqlite_stats = {"total": 0, "categories": {}}
@@ -432,45 +1346,80 @@ class HybridMemoryStore:
         graph_stats = {"nodes": 0, "relationships": 0}
         if self.graph_available:
             try:
-                r = self._graph_conn.execute("MATCH (m:Memory) RETURN COUNT(m)")
-                graph_stats["nodes"] = r.get_next()[0]
-                r = self._graph_conn.execute("MATCH ()-[r]->() RETURN COUNT(r)")
-                graph_stats["relationships"] = r.get_next()[0]
+                if self._graph_counts is None:
+                    self._graph_counts = self._graph_executor.submit(self._count_graph).result()
+                graph_stats = dict(self._graph_counts)
             except Exception:
                 pass
 
-        # Pending sync queue depth
-        try:
-            conn = sqlite3.connect(self.db_path)
-            pending = conn.execute(
-                "SELECT COUNT(*) FROM sync_queue WHERE synced = 0"
-            ).fetchone()[0]
-            conn.close()
-        except Exception:
-            pending = 0
+        # Pending sync queue depth, kept by _reserve_pending/_release_pending
+        pending = self._pending
 
         return {
             "sqlite":          sqlite_stats,
             "graph":           graph_stats,
             "graph_available": self.graph_available,
             "sync_queue_size": pending,
+            "sync_queue_dropped": self._sync_dropped,
+            "sync_queue_dead": self._sync_dead,
+            "write_failed":    len(self._write_failed),
             "embedding_model": EMBEDDING_MODEL if SBERT_AVAILABLE else None,
         }
 
+    def _count_graph(self) -> Dict[str, int]:
+        """Full COUNT scans, used only when the running counts are unknown."""
+        r = self._graph_conn.execute("MATCH (m:Memory) RETURN COUNT(m)")
+        nodes = r.get_next()[0]
+        r = self._graph_conn.execute("MATCH ()-[r]->() RETURN COUNT(r)")
+        return {"nodes": nodes, "relationships": r.get_next()[0]}
+
+    def close(self):
+        """Write out queued sync jobs, stop the workers and release the graph."""
+        if self._storage_thread is None:
+            return
+        self.flush()
+        _open_stores.discard(self)
+        self._write_q.put(None)
+        self._storage_thread.join()
+        self._storage_thread = None
+        self._release_ids()
+
+        self._stop_sync = True
+        self._notify_sync()
+        with self._pending_cv:
+            self._pending_cv.notify_all()   # wake store() calls blocked on a full queue
+        if self.graph_available:
+            self._sync_thread.join()
+            self._graph_executor.shutdown(wait=True)
+            while not self._graph_pool.empty():
+                self._graph_pool.get_nowait().close()
+            self._graph_conn.close()
+            self._graph_db.close()
+            self.graph_available = False
+        self._queue_conn.close()
+        with self._emb_lock:
+            if self._ann is not None:
+                self._ann.save_index(self._ann_path(self._ann.dim))
+
     def clear(self):
         """Clear both stores and the sync queue."""
+        if self._storage_thread is not None:
+            self.flush()   # so no queued write lands after the wipe
         self.sqlite.clear()
+        self._invalidate_recall_cache()
+        with self._emb_lock:
+            for path in Path(self.db_path).parent.glob(Path(self.db_path).stem + "_ann*.bin"):
+                path.unlink()
+            self._emb_matrix = None
+            self._emb_new    = []
+            self._ann        = None
+            self._emb_generation += 1
         if self.graph_available:
-            try:
-                for table in ("Memory", "Topic", "Entity"):
-                    self._graph_conn.execute(f"MATCH (n:{table}) DELETE n")
-            except Exception:
-                pass
+            self._graph_executor.submit(self._wipe_graph).result()
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.execute("DELETE FROM sync_queue")
-            conn.commit()
-            conn.close()
+            with self._queue_db() as conn:
+                conn.execute("DELETE FROM sync_queue")
+            self._release_pending(self._pending)
         except Exception:
             pass
 
@@ -483,72 +1432,173 @@ class HybridMemoryStore:
         mem_id  = item["id"]
         content = item["content"]
 
-        # Generate embedding
-        vec     = self._embed(content)
-        has_emb = vec is not None
-
         # Create Memory node
-        self._graph_conn.execute(f"""
-            CREATE (m:Memory {{
-                id: {mem_id},
-                content: "{self._escape(content)}",
-                category: "{item['category']}",
-                importance: "{item['importance']}",
-                created_at: timestamp("{item['created_at']}")
-            }})
-        """)
-
-        # Link topics
-        for topic in self._extract_topics(content):
+        self._graph_conn.execute("""
+            CREATE (m:Memory {
+                id: $id,
+                content: $content,
+                category: $category,
+                importance: $importance,
+                created_at: %s
+            })
+        """ % self._created_at_expr.format("$created_at"), {
+            "id":         mem_id,
+            "content":    content,
+            "category":   item["category"],
+            "importance": item["importance"],
+            "created_at": _epoch_micros(item["created_at"]),
+        })
+        self._count_graph_writes(nodes=1)
+
+        for step in self._sync_steps:
+            step(item)
+
+    # Topics and entities: one UNWIND statement each, so the Memory node is
+    # matched once per memory rather than once per edge
+
+    def _sync_topics(self, item: Dict):
+        topics = self._extract_topics(item["content"])
+        if topics:
             try:
-                self._graph_conn.execute(f"""
-                    MATCH (m:Memory) WHERE m.id = {mem_id}
-                    MERGE (t:Topic {{name: "{topic}", category: "auto"}})
+                result = self._graph_conn.execute("""
+                    MATCH (m:Memory) WHERE m.id = $id
+                    UNWIND $names AS name
+                    MERGE (t:Topic {name: name, category: "auto"})
                     CREATE (m)-[:HAS_TOPIC]->(t)
-                """)
+                    RETURN COUNT(*)
+                """, {"id": item["id"], "names": topics})
+                self._count_graph_writes(relationships=result.get_next()[0])
             except Exception:
-                pass
+                if self._graph_tx:
+                    raise
 
-        # Link entities
-        for entity in self._extract_entities(content):
+    def _sync_entities(self, item: Dict):
+        entities = self._extract_entities(item["content"])
+        if entities:
             try:
-                self._graph_conn.execute(f"""
-                    MATCH (m:Memory) WHERE m.id = {mem_id}
-                    MERGE (e:Entity {{name: "{entity['name']}", type: "{entity['type']}"}})
+                result = self._graph_conn.execute("""
+                    MATCH (m:Memory) WHERE m.id = $id
+                    UNWIND $entities AS ent
+                    MERGE (e:Entity {name: ent.name, type: ent.type})
                     CREATE (m)-[:MENTIONS]->(e)
-                """)
+                    RETURN COUNT(*)
+                """, {"id": item["id"], "entities": entities})
+                self._count_graph_writes(relationships=result.get_next()[0])
             except Exception:
-                pass
+                if self._graph_tx:
+                    raise
 
-        # Temporal link
-        self._link_temporal_sequence(mem_id)
+    def _sync_temporal(self, item: Dict):
+        self._link_temporal_sequence(item["id"])
 
-        # Topic-based RELATED_TO links
-        self._link_related_memories(mem_id, content)
+    def _sync_related(self, item: Dict):
+        self._link_related_memories(item["id"], self._extract_topics(item["content"]))
+
+    def _sync_many_to_graph(self, items: List[Dict]):
+        """
+        Batch version of _sync_to_graph(): the Memory nodes, their topics and
+        their entities are each written by a single UNWIND statement. Links
+        are then made in id order, as if the items were synced one by one.
+        """
+        if not items:
+            return
+
+        self._graph_conn.execute("""
+            UNWIND $rows AS r
+            CREATE (m:Memory {
+                id: r.id,
+                content: r.content,
+                category: r.category,
+                importance: r.importance,
+                created_at: %s
+            })
+        """ % self._created_at_expr.format("r.created_at"), {"rows": [
+            {"id": item["id"], "content": item["content"], "category": item["category"],
+             "importance": item["importance"], "created_at": _epoch_micros(item["created_at"])}
+            for item in items
+        ]})
+        self._count_graph_writes(nodes=len(items))
+
+        # Kuzu mis-binds MERGE when a key repeats within one UNWIND, so the
+        # shared Topic/Entity nodes are merged distinct before the edges
+        topic_rows = [
+            {"id": item["id"], "name": name}
+            for item in items for name in self._extract_topics(item["content"])
+        ] if self.enable_topics else []
+        if topic_rows:
+            self._graph_conn.execute("""
+                UNWIND $names AS name
+                MERGE (t:Topic {name: name, category: "auto"})
+            """, {"names": sorted({r["name"] for r in topic_rows})})
+            result = self._graph_conn.execute("""
+                UNWIND $rows AS r
+                MATCH (m:Memory), (t:Topic) WHERE m.id = r.id AND t.name = r.name
+                CREATE (m)-[:HAS_TOPIC]->(t)
+                RETURN COUNT(*)
+            """, {"rows": topic_rows})
+            self._count_graph_writes(relationships=result.get_next()[0])
+
+        entity_rows = [
+            {"id": item["id"], **entity}
+            for item in items for entity in self._extract_entities(item["content"])
+        ] if self.enable_entities else []
+        if entity_rows:
+            self._graph_conn.execute("""
+                UNWIND $entities AS ent
+                MERGE (e:Entity {name: ent.name, type: ent.type})
+            """, {"entities": [{"name": name, "type": etype} for name, etype
+                               in sorted({(r["name"], r["type"]) for r in entity_rows})]})
+            result = self._graph_conn.execute("""
+                UNWIND $rows AS r
+                MATCH (m:Memory), (e:Entity) WHERE m.id = r.id AND e.name = r.name
+                CREATE (m)-[:MENTIONS]->(e)
+                RETURN COUNT(*)
+            """, {"rows": entity_rows})
+            self._count_graph_writes(relationships=result.get_next()[0])
+
+        for item in sorted(items, key=lambda item: item["id"]):
+            for step in self._link_steps:
+                step(item)
+
+    def _count_graph_writes(self, nodes: int = 0, relationships: int = 0):
+        """Record graph writes for get_stats(); held back until COMMIT in a transaction."""
+        delta = self._graph_count_delta
+        delta["nodes"]         += nodes
+        delta["relationships"] += relationships
+        if self._graph_tx:
+            return
+        if self._graph_counts is not None:
+            self._graph_counts["nodes"]         += delta["nodes"]
+            self._graph_counts["relationships"] += delta["relationships"]
+        self._graph_count_delta = {"nodes": 0, "relationships": 0}
 
     # ─────────────────────────────────────────────────────────────────────────
     # Recall strategies
     # ─────────────────────────────────────────────────────────────────────────
 
     def _recall_sqlite(self, query: MemoryQuery) -> List[Dict]:
+        self.await_durable()   # read your own writes
         return self.sqlite.recall(query.text, query.limit)
 
-    def _recall_graph(self, query: MemoryQuery) -> List[Dict]:
+    def _recall_graph(self, query: MemoryQuery,
+                      query_vec: Optional[List[float]] = None) -> List[Dict]:
         if query.query_type == "semantic":
-            return self._semantic_search(query)
+            return self._semantic_search(query, query_vec)
         elif query.query_type == "context":
             return self._context_chain(query)
         elif query.query_type == "related":
             return self._related_memories(query)
         return self._recall_sqlite(query)
 
-    def _semantic_search(self, query: MemoryQuery) -> List[Dict]:
+    def _semantic_search(self, query: MemoryQuery,
+                         query_vec: Optional[List[float]] = None) -> List[Dict]:
         """
         Embedding-based similarity first; falls back to topic matching.
         """
         # Embedding path (Level 2)
-        query_vec = self._embed(query.text)
-        if query_vec is not None:
+        if query_vec is None:
+            query_vec = self._embed(query.text)
+        if query_vec is not None and NUMPY_AVAILABLE:
             try:
                 return self._embedding_similarity_search(query_vec, query.limit)
             except Exception:
@@ -559,71 +1609,86 @@ class HybridMemoryStore:
         if not topics:
             return self._recall_sqlite(query)
 
-        topic_conditions = " OR ".join([f't.name = "{t}"' for t in topics[:5]])
         try:
-            result = self._graph_conn.execute(f"""
-                MATCH (m:Memory)-[:HAS_TOPIC]->(t:Topic)
-                WHERE {topic_conditions}
-                RETURN m.id, m.content, m.category, m.created_at
-                ORDER BY m.created_at DESC
-                LIMIT {query.limit}
-            """)
-            return self._parse_graph_results(result)
+            with self._checkout() as conn:
+                result = conn.execute("""
+                    MATCH (m:Memory)-[:HAS_TOPIC]->(t:Topic)
+                    WHERE t.name IN $topics
+                    RETURN m.id, m.content, m.category, m.created_at
+                    ORDER BY m.created_at DESC
+                    LIMIT $limit
+                """, {"topics": topics[:5], "limit": query.limit})
+                return self._parse_graph_results(result)
         except Exception:
             return self._recall_sqlite(query)
 
     def _embedding_similarity_search(self, query_vec: List[float], limit: int) -> List[Dict]:
         """
-        Approximate cosine similarity via Kuzu.
-        We retrieve all Memory nodes that have embeddings and compute cosine
-        similarity in Python (Kuzu doesn't yet have a native ANN operator).
+        Cosine similarity against the stored embeddings (Kuzu doesn't yet
+        have a native ANN operator). The vectors are unit length, so this is
+        one matrix-vector product over the cached embedding matrix, or an
+        HNSW lookup once the store is large enough to have an index.
         """
-        # Fetch all memory IDs and their stored embeddings from SQLite metadata
-        # (embeddings are stored in SQLite metadata JSON to keep Kuzu schema simple)
-        conn  = sqlite3.connect(self.db_path)
-        rows  = conn.execute(
-            "SELECT id, content, metadata FROM memories WHERE metadata IS NOT NULL"
-        ).fetchall()
+        ids, matrix = self._embedding_matrix()
+        if not ids:
+            return []
+        q = np.asarray(query_vec, dtype=np.float32)
+        with self._emb_lock:
+            ann = self._ann
+            if ann is not None:
+                labels, dists = ann.knn_query(q, k=min(limit, len(ids)))
+        if ann is not None:
+            hits = [(int(label), 1.0 - float(dist)) for label, dist in zip(labels[0], dists[0])]
+        else:
+            scores = matrix @ q
+            top    = np.argpartition(-scores, min(limit, len(ids)) - 1)[:limit]
+            top    = top[np.argsort(-scores[top])]
+            hits   = [(ids[i], float(scores[i])) for i in top]
+        # Strict CASTLE-2.0 semantic threshold
+        hits = [(mid, score) for mid, score in hits if score >= 0.65]
+        if not hits:
+            return []
+
+        # Content comes from SQLite, so memories deleted since are skipped
+        conn    = connect_db(self.db_path)
+        content = dict(conn.execute(
+            "SELECT id, content FROM memories WHERE id IN (%s)" % ",".join("?" * len(hits)),
+            [mid for mid, _ in hits]
+        ).fetchall())
         conn.close()
-
-        scored = []
-        for row_id, content, meta_json in rows:
-            try:
-                meta = json.loads(meta_json) if meta_json else {}
-                vec  = meta.get("embedding")
-                if vec is None:
-                    continue
-                score = self._cosine(query_vec, vec)
-                scored.append((score, row_id, content))
-            except Exception:
-                continue
-
-        scored.sort(key=lambda x: x[0], reverse=True)
         return [
-            {"id": row_id, "content": content, "category": "semantic", "score": sc, "created_at": ""}
-            for sc, row_id, content in scored[:limit]
-            if sc >= 0.65  # Strict CASTLE-2.0 semantic threshold
+            {"id": mid, "content": content[mid], "category": "semantic",
+             "score": score, "created_at": ""}
+            for mid, score in hits if mid in content
         ]
 
     def _context_chain(self, query: MemoryQuery) -> List[Dict]:
         """Traverse RELATED_TO / FOLLOWS edges from the closest matching memory."""
         try:
-            recent = self._graph_conn.execute(f"""
-                MATCH (m:Memory)
-                WHERE m.content CONTAINS "{self._escape(query.text[:50])}"
-                RETURN m.id ORDER BY m.created_at DESC LIMIT 1
-            """)
-            if not recent.has_next():
-                return self._recall_sqlite(query)
-            recent_id = recent.get_next()[0]
-            depth  = min(query.context_depth, 5)
-            result = self._graph_conn.execute(f"""
-                MATCH (m:Memory)-[:RELATED_TO|FOLLOWS*1..{depth}]-(rel:Memory)
-                WHERE m.id = {recent_id}
-                RETURN DISTINCT rel.id, rel.content, rel.category, rel.created_at
-                ORDER BY rel.created_at DESC LIMIT {query.limit}
-            """)
-            return self._parse_graph_results(result)
+            # Seed candidates come from SQLite's full-text index; the newest
+            # one that made it into the graph is used
+            seed_ids = self.sqlite.search_ids(query.text[:50], limit=5)
+            with self._checkout() as conn:
+                if seed_ids is None:
+                    # No FTS5 in this SQLite build: scan contents in the graph
+                    recent = conn.execute("""
+                        MATCH (m:Memory)
+                        WHERE m.content CONTAINS $text
+                        RETURN m.id ORDER BY m.created_at DESC LIMIT 5
+                    """, {"text": query.text[:50]})
+                    seed_ids = [row[0] for row in recent.get_all()]
+                if not seed_ids:
+                    return self._recall_sqlite(query)
+                # Path bounds can't be parameters; depth is a clamped int
+                depth  = max(1, min(int(query.context_depth), 5))
+                result = conn.execute(f"""
+                    MATCH (m:Memory) WHERE m.id IN $ids
+                    WITH m ORDER BY m.id DESC LIMIT 1
+                    MATCH (m)-[:RELATED_TO|FOLLOWS*1..{depth}]-(rel:Memory)
+                    RETURN DISTINCT rel.id, rel.content, rel.category, rel.created_at
+                    ORDER BY rel.created_at DESC LIMIT $limit
+                """, {"ids": seed_ids, "limit": query.limit})
+                return self._parse_graph_results(result)
         except Exception:
             return self._recall_sqlite(query)
 
@@ -631,15 +1696,15 @@ class HybridMemoryStore:
         """Fan-out via shared entities then shared topics."""
         entities = self._extract_entities(query.text)
         if entities:
-            names = " OR ".join([f'e.name = "{e["name"]}"' for e in entities[:3]])
             try:
-                result = self._graph_conn.execute(f"""
-                    MATCH (m:Memory)-[:MENTIONS]->(e:Entity)
-                    WHERE {names}
-                    RETURN DISTINCT m.id, m.content, m.category, m.created_at
-                    ORDER BY m.created_at DESC LIMIT {query.limit}
-                """)
-                hits = self._parse_graph_results(result)
+                with self._checkout() as conn:
+                    result = conn.execute("""
+                        MATCH (m:Memory)-[:MENTIONS]->(e:Entity)
+                        WHERE e.name IN $names
+                        RETURN DISTINCT m.id, m.content, m.category, m.created_at
+                        ORDER BY m.created_at DESC LIMIT $limit
+                    """, {"names": [e["name"] for e in entities[:3]], "limit": query.limit})
+                    hits = self._parse_graph_results(result)
                 if hits:
                     return hits
             except Exception:
@@ -650,163 +1715,146 @@ class HybridMemoryStore:
     # Level 1 — Rich extraction
     # ─────────────────────────────────────────────────────────────────────────
 
+    # Extraction is pure in the text, and the same content goes through it
+    # several times per store/query, so results are memoized module-wide.
     def _extract_topics(self, text: str) -> List[str]:
-        """
-        Extract topics using the TOPIC_TAXONOMY:
-        - Exact phrase / synonym matching (Portuguese + English)
-        - CamelCase token detection (FastAPI, HybridMemory, etc.)
-        Returns up to 8 canonical topic names.
-        """
-        text_lower = text.lower()
-        found: List[str] = []
-
-        # Taxonomy matching
-        for canonical, synonyms in TOPIC_TAXONOMY.items():
-            for syn in synonyms:
-                if syn in text_lower:
-                    if canonical not in found:
-                        found.append(canonical)
-                    break
-
-        # CamelCase tokens → map to closest topic or add as-is
-        camel_tokens = re.findall(r'\b[A-Z][a-z]+(?:[A-Z][a-z]+)+\b', text)
-        for token in camel_tokens:
-            # Check if it's already covered
-            token_lower = token.lower()
-            already = any(token_lower in [s.lower() for s in syns]
-                          for canonical, syns in TOPIC_TAXONOMY.items()
-                          if canonical in found)
-            if not already and token not in found:
-                found.append(token)
-
-        # Cap topics to 3 max to reduce visual noise
-        return found[:3]
+        """Canonical topics for text (up to 3), see _topics_for."""
+        return list(_topics_for(text))
 
     def _extract_entities(self, text: str) -> List[Dict]:
-        """
-        Extract named entities:
-        - Known tech stack list
-        - PascalCase identifiers
-        - File paths
-        - ENV variables (SCREAMING_SNAKE_CASE)
-        """
-        entities: List[Dict] = []
-
-        # Known technologies
-        for tech in TECH_ENTITIES:
-            if tech in text:
-                entities.append({"name": tech, "type": "TECHNOLOGY"})
-
-        # PascalCase class/function names (stricter: must have an internal capital letter)
-        pascal = re.findall(r'\b[A-Z][a-z]+[A-Z]\w*\b', text)
-        for name in pascal:
-            if name not in ENTITY_BLACKLIST and name not in [e["name"] for e in entities]:
-                entities.append({"name": name, "type": "CLASS"})
-
-        # File paths
-        paths = re.findall(r'[\w./]+\.(?:py|yaml|yml|md|sh|json|txt)\b', text)
-        for path in paths:
-            entities.append({"name": path, "type": "FILE"})
-
-        # ENV variables
-        env_vars = re.findall(r'\b[A-Z][A-Z0-9_]{3,}\b', text)
-        for var in env_vars:
-            if var not in ENTITY_BLACKLIST and var not in [e["name"] for e in entities]:
-                entities.append({"name": var, "type": "CONFIG"})
-
-        # Final filtering of entities against blacklist
-        entities = [e for e in entities if e["name"] not in ENTITY_BLACKLIST]
-        
-        # Cap entities to 3 max to reduce visual noise
-        return entities[:3]
+        """Named entities for text (up to 3), see _entities_for."""
+        return [{"name": name, "type": etype} for name, etype in _entities_for(text)]
 
     # ─────────────────────────────────────────────────────────────────────────
     # Linking helpers
     # ─────────────────────────────────────────────────────────────────────────
 
-    def _link_related_memories(self, memory_id: int, content: str):
-        """Create RELATED_TO edges via shared topics."""
-        topics = self._extract_topics(content)
+    def _link_related_memories(self, memory_id: int, topics: List[str]):
+        """Create RELATED_TO edges to up to 5 of the latest earlier memories sharing a topic.
+
+        Edge strength is the share of this memory's linked topics the other one also has.
+        """
         if not topics:
             return
-        topic_conditions = " OR ".join([f't.name = "{t}"' for t in topics[:3]])
         try:
-            result = self._graph_conn.execute(f"""
-                MATCH (m1:Memory)-[:HAS_TOPIC]->(t:Topic)<-[:HAS_TOPIC]-(m2:Memory)
-                WHERE m1.id = {memory_id} AND m2.id <> {memory_id}
-                  AND ({topic_conditions})
-                RETURN DISTINCT m2.id LIMIT 5
-            """)
-            while result.has_next():
-                related_id = result.get_next()[0]
-                try:
-                    # Retrieve the embedding for m2 to check strict semantic similarity
-                    m2_vec = self._embed(result_content) if locals().get('result_content') else None
-                    
-                    self._graph_conn.execute(f"""
-                        MATCH (m1:Memory) WHERE m1.id = {memory_id}
-                        MATCH (m2:Memory) WHERE m2.id = {related_id}
-                        MERGE (m1)-[:RELATED_TO {{strength: 0.8}}]->(m2)
-                    """)
-                except Exception:
-                    pass
+            windows = [self._recent_topic_ids(name) for name in topics[:3]]
+            shared = Counter(mid for window in windows for mid in set(window) if mid < memory_id)
+            related = sorted(shared, reverse=True)[:5]
+            if related:
+                result = self._graph_conn.execute("""
+                    UNWIND $related AS r
+                    MATCH (m1:Memory), (m2:Memory)
+                    WHERE m1.id = $id AND m2.id = r.id
+                    MERGE (m1)-[:RELATED_TO {strength: r.strength}]->(m2)
+                    RETURN COUNT(*)
+                """, {"id": memory_id,
+                      "related": [{"id": mid, "strength": shared[mid] / len(windows)}
+                                  for mid in related]})
+                self._count_graph_writes(relationships=result.get_next()[0])
+            for window in windows:
+                if memory_id not in window:   # a cold load may already hold it
+                    window.append(memory_id)
         except Exception:
-            pass
+            if self._graph_tx:
+                raise
+
+    def _recent_topic_ids(self, name: str) -> deque:
+        """Window of the latest memory ids with this topic, read from the graph once."""
+        window = self._topic_recent_ids.get(name)
+        if window is None:
+            result = self._graph_conn.execute("""
+                MATCH (m:Memory)-[:HAS_TOPIC]->(t:Topic)
+                WHERE t.name = $name
+                RETURN m.id ORDER BY m.id DESC LIMIT $limit
+            """, {"name": name, "limit": RELATED_WINDOW})
+            window = deque(reversed([row[0] for row in result.get_all()]), maxlen=RELATED_WINDOW)
+            self._topic_recent_ids[name] = window
+        return window
 
     def _link_temporal_sequence(self, memory_id: int):
         """Link current memory to its immediate predecessor (FLOWS_INTO)."""
         try:
-            result = self._graph_conn.execute(f"""
-                MATCH (m:Memory) WHERE m.id < {memory_id}
-                RETURN m.id ORDER BY m.id DESC LIMIT 1
-            """)
-            if result.has_next():
+            prev_id = self._last_memory_id
+            if prev_id is None or prev_id >= memory_id:
+                # Cold start or out-of-order sync: ask the graph
+                result = self._graph_conn.execute("""
+                    MATCH (m:Memory) WHERE m.id < $id RETURN MAX(m.id)
+                """, {"id": memory_id})
                 prev_id = result.get_next()[0]
-                self._graph_conn.execute(f"""
-                    MATCH (prev:Memory) WHERE prev.id = {prev_id}
-                    MATCH (curr:Memory) WHERE curr.id = {memory_id}
-                    CREATE (prev)-[:FLOWS_INTO]->(curr)
-                """)
-                # Keep FOLLOWS for backwards compatibility if needed
-                self._graph_conn.execute(f"""
-                    MATCH (prev:Memory) WHERE prev.id = {prev_id}
-                    MATCH (curr:Memory) WHERE curr.id = {memory_id}
-                    CREATE (prev)-[:FOLLOWS]->(curr)
-                """)
+            if prev_id is not None:
+                # FOLLOWS is kept alongside FLOWS_INTO for backwards compatibility
+                result = self._graph_conn.execute("""
+                    MATCH (prev:Memory), (curr:Memory)
+                    WHERE prev.id = $prev_id AND curr.id = $id
+                    CREATE (prev)-[:FLOWS_INTO]->(curr), (prev)-[:FOLLOWS]->(curr)
+                    RETURN COUNT(*)
+                """, {"prev_id": prev_id, "id": memory_id})
+                self._count_graph_writes(relationships=2 * result.get_next()[0])
+            if self._last_memory_id is None or memory_id > self._last_memory_id:
+                self._last_memory_id = memory_id
         except Exception:
-            pass
+            if self._graph_tx:
+                raise
 
     # ─────────────────────────────────────────────────────────────────────────
-    # Utilities
+    # Semantic recall cache
     # ─────────────────────────────────────────────────────────────────────────
 
-    @staticmethod
-    def _cosine(a: List[float], b: List[float]) -> float:
-        """Cosine similarity between two normalised vectors."""
-        if len(a) != len(b):
-            return 0.0
-        dot   = sum(x * y for x, y in zip(a, b))
-        norm_a = sum(x * x for x in a) ** 0.5
-        norm_b = sum(x * x for x in b) ** 0.5
-        if norm_a == 0 or norm_b == 0:
-            return 0.0
-        return dot / (norm_a * norm_b)
+    def _recall_cache_get(self, query: MemoryQuery,
+                          query_vec: Optional[List[float]]) -> Optional[List[Dict]]:
+        """Cached result for this query or a close paraphrase, else None."""
+        key = self._recall_cache_key(query)
+        with self._recall_cache_lock:
+            hit = self._recall_cache.get(key)
+            if hit is None and query_vec is not None:
+                # Only entries answering the same kind of query are candidates
+                candidates = [(k, vec) for k, (vec, _) in self._recall_cache.items()
+                              if k[:3] == key[:3] and vec is not None]
+                if candidates and NUMPY_AVAILABLE:
+                    scores = np.asarray([vec for _, vec in candidates]) @ np.asarray(query_vec)
+                    best   = int(scores.argmax())
+                    if scores[best] >= self.recall_cache_threshold:
+                        key = candidates[best][0]
+                        hit = self._recall_cache[key]
+            if hit is None:
+                return None
+            self._recall_cache.move_to_end(key)
+            return [dict(r) for r in hit[1]]
+
+    def _recall_cache_put(self, query: MemoryQuery,
+                          query_vec: Optional[List[float]], results: List[Dict]):
+        key = self._recall_cache_key(query)
+        with self._recall_cache_lock:
+            self._recall_cache[key] = (query_vec, [dict(r) for r in results])
+            self._recall_cache.move_to_end(key)
+            while len(self._recall_cache) > self.recall_cache_size:
+                self._recall_cache.popitem(last=False)
 
     @staticmethod
-    def _escape(text: str) -> str:
-        """Escape special characters for Cypher strings."""
-        return text.replace('"', '\\"').replace("'", "\\'")[:500]
+    def _recall_cache_key(query: MemoryQuery) -> tuple:
+        return (query.query_type, query.limit, query.context_depth, " ".join(query.text.split()))
+
+    def _invalidate_recall_cache(self):
+        with self._recall_cache_lock:
+            self._recall_cache.clear()
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Utilities
+    # ─────────────────────────────────────────────────────────────────────────
 
     def _parse_graph_results(self, result) -> List[Dict]:
         """Parse Kuzu query results into standardised dict list."""
+        # get_all() fetches every row in one call instead of two per row
         memories = []
-        while result.has_next():
-            row = result.get_next()
+        for row in result.get_all():
+            created_at = row[3]
+            if isinstance(created_at, int):
+                created_at = datetime.fromtimestamp(created_at / 1_000_000)
             memories.append({
                 "id":         row[0],
                 "content":    row[1],
                 "category":   row[2],
-                "created_at": str(row[3]),
+                "created_at": str(created_at),
             })
         return memories
 
@@ -814,14 +1862,5 @@ class HybridMemoryStore:
 # ── Factory ───────────────────────────────────────────────────────────────────
 
 def get_hybrid_memory(db_path: str, use_graph: bool = True) -> HybridMemoryStore:
-    """Get a HybridMemoryStore instance."""
-    if use_graph and KUZU_AVAILABLE:
-        return HybridMemoryStore(db_path)
-    # SQLite-only fallback
-    store                = HybridMemoryStore.__new__(HybridMemoryStore)
-    store.sqlite         = MemoryStore(db_path)
-    store.graph          = None
-    store.graph_available = False
-    store._sync_queue    = []
-    store._stop_sync     = True
-    return store
+    """Get a HybridMemoryStore instance (SQLite-only with use_graph=False)."""
+    return HybridMemoryStore(db_path, use_graph=use_graph)
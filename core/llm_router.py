@@ -1,4 +1,5 @@
 import os
+import copy
 import yaml
 from pathlib import Path
 from typing import List, Dict, Optional, Any
@@ -8,8 +9,10 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("llm_router")
 
+_CONFIG_CACHE: Dict[str, tuple] = {}
+
 def load_config():
-    """Load configuration from init.yaml."""
+    """Load configuration from init.yaml (re-parsed only when the file changes)."""
     init_paths = [
         Path("/app/workspace/init.yaml"),
         Path("/app/init.yaml"),
@@ -19,12 +22,24 @@ def load_config():
     ]
     
     for path in init_paths:
-        if path.exists():
-            try:
-                with open(path) as f:
-                    return yaml.safe_load(f)
-            except Exception as e:
-                logger.error(f"Error loading config from {path}: {e}")
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        
+        key = str(path)
+        cached = _CONFIG_CACHE.get(key)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return copy.deepcopy(cached[2])
+        
+        try:
+            with open(path) as f:
+                config = yaml.safe_load(f)
+        except Exception as e:
+            logger.error(f"Error loading config from {path}: {e}")
+            continue
+        _CONFIG_CACHE[key] = (st.st_mtime_ns, st.st_size, config)
+        return copy.deepcopy(config)
     
     return {}
 
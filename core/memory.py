@@ -11,6 +11,20 @@ from pathlib import Path
 from typing import List, Dict, Optional
 from datetime import datetime
 
+def connect_db(db_path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    """Open a SQLite connection with the pragmas shared by the memory stores.
+    
+    The database runs in WAL mode (set once in ``MemoryStore._ensure_db``);
+    with synchronous=NORMAL commits no longer fsync, only checkpoints do.
+    ``check_same_thread=False`` is for connections shared under a lock.
+    """
+    conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
+    return conn
+
+
 class MemoryStore:
     """SQLite-based memory store with keyword search."""
     
@@ -22,7 +36,8 @@ class MemoryStore:
         """Ensure database exists."""
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
         
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")  # persistent, stored in the db file
         cursor = conn.cursor()
         
         # Create memories table
@@ -44,13 +59,50 @@ class MemoryStore:
             CREATE INDEX IF NOT EXISTS idx_memories_category ON memories(category)
         """)
         
+        self._ensure_fts(cursor)
+        
         conn.commit()
         conn.close()
     
+    def _ensure_fts(self, cursor: sqlite3.Cursor):
+        """Full-text index over memories.content, kept in sync by triggers.
+        
+        Leaves ``fts_available`` False if SQLite was built without FTS5.
+        """
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'memories_fts'"
+        ).fetchone()
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts
+                USING fts5(content, content='memories', content_rowid='id')
+            """)
+        except sqlite3.OperationalError:
+            self.fts_available = False
+            return
+        cursor.executescript("""
+            CREATE TRIGGER IF NOT EXISTS memories_fts_ai AFTER INSERT ON memories BEGIN
+                INSERT INTO memories_fts(rowid, content) VALUES (new.id, new.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS memories_fts_ad AFTER DELETE ON memories BEGIN
+                INSERT INTO memories_fts(memories_fts, rowid, content)
+                VALUES ('delete', old.id, old.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS memories_fts_au AFTER UPDATE OF content ON memories BEGIN
+                INSERT INTO memories_fts(memories_fts, rowid, content)
+                VALUES ('delete', old.id, old.content);
+                INSERT INTO memories_fts(rowid, content) VALUES (new.id, new.content);
+            END;
+        """)
+        if not exists:
+            # Index memories stored before the table existed
+            cursor.execute("INSERT INTO memories_fts(memories_fts) VALUES ('rebuild')")
+        self.fts_available = True
+    
     def store(self, content: str, category: str = "general", 
               importance: str = "medium", metadata: Optional[Dict] = None) -> int:
         """Store a memory."""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         cursor = conn.cursor()
         
         meta_json = json.dumps(metadata) if metadata else None
@@ -67,9 +119,35 @@ class MemoryStore:
         
         return memory_id
     
+    def store_many(self, items: List[Dict]) -> List[int]:
+        """Store several memories in a single transaction.
+        
+        Each item is a dict with ``content`` and optional ``category``,
+        ``importance`` and ``metadata``. Returns the new ids in input order.
+        """
+        conn = connect_db(self.db_path)
+        cursor = conn.cursor()
+        
+        memory_ids = []
+        for item in items:
+            metadata = item.get("metadata")
+            cursor.execute(
+                """INSERT INTO memories (content, category, importance, metadata)
+                   VALUES (?, ?, ?, ?)""",
+                (item["content"], item.get("category", "general"),
+                 item.get("importance", "medium"),
+                 json.dumps(metadata) if metadata else None)
+            )
+            memory_ids.append(cursor.lastrowid)
+        
+        conn.commit()
+        conn.close()
+        
+        return memory_ids
+    
     def get_all_memories(self, limit: int = 100, offset: int = 0) -> List[Dict]:
         """Get all memories with pagination."""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute(
@@ -93,9 +171,31 @@ class MemoryStore:
             "access_count": row[6]
         } for row in rows]
     
+    def search_ids(self, text: str, limit: int = 5) -> Optional[List[int]]:
+        """Ids of the newest memories containing ``text`` as a phrase.
+        
+        The last word matches as a prefix, so text cut mid-word still hits.
+        Returns None when full-text search is unavailable.
+        """
+        if not self.fts_available:
+            return None
+        phrase = '"' + text.replace('"', '""') + '" *'
+        conn = connect_db(self.db_path)
+        try:
+            rows = conn.execute(
+                "SELECT rowid FROM memories_fts WHERE memories_fts MATCH ? "
+                "ORDER BY rowid DESC LIMIT ?",
+                (phrase, limit)
+            ).fetchall()
+        except sqlite3.OperationalError:
+            rows = []   # nothing indexable in the text
+        finally:
+            conn.close()
+        return [row[0] for row in rows]
+    
     def delete_memory(self, memory_id: int) -> bool:
         """Delete a specific memory."""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute("DELETE FROM memories WHERE id = ?", (memory_id,))
@@ -108,7 +208,7 @@ class MemoryStore:
     
     def recall(self, query: str, limit: int = 5) -> List[Dict]:
         """Recall memories matching query."""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         cursor = conn.cursor()
         
         # Get recent memories
@@ -155,7 +255,7 @@ class MemoryStore:
     
     def get_stats(self) -> Dict:
         """Get memory statistics."""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute("SELECT COUNT(*), category FROM memories GROUP BY category")
@@ -173,7 +273,7 @@ class MemoryStore:
     
     def clear(self):
         """Clear all memories."""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_db(self.db_path)
         cursor = conn.cursor()
         cursor.execute("DELETE FROM memories")
         conn.commit()
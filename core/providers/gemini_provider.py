@@ -5,10 +5,54 @@ Google Gemini models via Vertex AI or Gemini API.
 """
 
 import json
-from typing import AsyncIterator, Dict, List, Optional, Any
+import asyncio
+import weakref
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
 import httpx
 from .base import BaseProvider, Message, GenerationConfig, ProviderType
 
+# HTTP/2 needs the optional h2 package (httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# orjson parses response bodies several times faster than json
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Pooled client per event loop, shared by every GeminiProvider (callers such
+# as the LLM router create a provider per request). httpx connections belong
+# to the loop that opened them, hence one client per loop.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = \
+    weakref.WeakKeyDictionary()
+
+
+def _get_client() -> httpx.AsyncClient:
+    """The running loop's shared client, created on first use."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(120.0, connect=5.0),
+            limits=httpx.Limits(max_keepalive_connections=32),
+        )
+        _clients[loop] = client
+    return client
+
+
+async def aclose_clients():
+    """Close the running loop's shared client; call once from app shutdown."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
 class GeminiProvider(BaseProvider):
     """Google Gemini provider."""
     
@@ -17,22 +61,28 @@ class GeminiProvider(BaseProvider):
         self.provider_type = ProviderType.GEMINI
         self.base_url = "https://generativelanguage.googleapis.com/v1beta"
         
-    def _convert_messages(self, messages: List[Message]) -> List[Dict]:
-        """Convert to Gemini format."""
+    def _convert_messages(
+        self,
+        messages: List[Message],
+        system: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """Convert to Gemini contents, plus the system instruction, in one pass."""
         gemini_contents = []
         
         for msg in messages:
             if msg.role == "system":
-                # Gemini handles system as part of first user message or model config
+                # Gemini takes system as model config; prioritize the 'system'
+                # argument, only use the message if the arg is not provided
+                if not system:
+                    system = msg.content
                 continue
             
-            role = "user" if msg.role == "user" else "model"
             gemini_contents.append({
-                "role": role,
+                "role": "user" if msg.role == "user" else "model",
                 "parts": [{"text": msg.content}]
             })
         
-        return gemini_contents
+        return gemini_contents, system
     
     async def generate(
         self,
@@ -43,22 +93,11 @@ class GeminiProvider(BaseProvider):
         """Stream response from Gemini."""
         config = config or GenerationConfig()
         
-        # Extract system msg if exists
-        system_instruction = system
-        chat_messages = []
-        
-        for msg in messages:
-            if msg.role == "system":
-                if not system_instruction: # Prioritize 'system' argument, only use message if arg not provided
-                    system_instruction = msg.content
-            else:
-                chat_messages.append(msg)
-        
         headers = {
             "Content-Type": "application/json"
         }
         
-        contents = self._convert_messages(chat_messages)
+        contents, system_instruction = self._convert_messages(messages, system)
         
         payload = {
             "contents": contents,
@@ -74,23 +113,22 @@ class GeminiProvider(BaseProvider):
                 "parts": [{"text": system_instruction}]
             }
         
-        async with httpx.AsyncClient() as client:
-            # Use non-streaming endpoint for reliability
-            response = await client.post(
-                f"{self.base_url}/models/{self.model}:generateContent?key={self.api_key}",
-                headers=headers,
-                json=payload,
-                timeout=120.0
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            # Extract text from response
-            if candidates := data.get("candidates", []):
-                if content := candidates[0].get("content", {}):
-                    if parts := content.get("parts", []):
-                        if text := parts[0].get("text"):
-                            yield text
+        # Use non-streaming endpoint for reliability
+        response = await _get_client().post(
+            f"{self.base_url}/models/{self.model}:generateContent?key={self.api_key}",
+            headers=headers,
+            json=payload
+        )
+        response.raise_for_status()
+        data = _json_loads(response.content)
+        
+        # Extract text from response (absent when e.g. blocked by safety filters)
+        try:
+            text = data["candidates"][0]["content"]["parts"][0]["text"]
+        except (KeyError, IndexError, TypeError):
+            return
+        if text:
+            yield text
     
     async def generate_sync(
         self,
@@ -3,11 +3,18 @@ Agente Clawd - API Server (Patched for AGENTS.md support)
 Integração com Kimi API + Sincronização de Memórias
 """
 
+import io
 import os
 import json
 import sys
+import orjson
 import re
-from typing import Optional, List, Dict
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from itertools import islice
+from typing import Optional, List, Dict, Tuple
 from datetime import datetime
 from pathlib import Path
 
@@ -21,8 +28,9 @@ except ImportError:
     def load_config(): return {}
 
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
-from anthropic import Anthropic
+from anthropic import Anthropic, RateLimitError
 
 from session_manager import SessionManager
 from sync_api import router as sync_router
@@ -35,6 +43,10 @@ SOUL_MD_PATH = os.getenv("SOUL_MD_PATH", "/app/clawd/workspace/SOUL.md")
 USER_MD_PATH = os.getenv("USER_MD_PATH", "/app/clawd/workspace/USER.md")
 AGENTS_MD_PATH = os.getenv("AGENTS_MD_PATH", "/app/docs/AGENTS.md")
 CLAWD_WORKSPACE = os.getenv("CLAWD_WORKSPACE", "/app/clawd")
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+KIMI_CONCURRENCY = int(os.getenv("KIMI_CONCURRENCY", "8"))
+KIMI_MAX_RETRIES = int(os.getenv("KIMI_MAX_RETRIES", "3"))
 
 # Cliente Anthropic (compatível com API Kimi)
 client = Anthropic(
@@ -45,21 +57,47 @@ client = Anthropic(
 # Gerenciador de sessões
 sessions = SessionManager()
 
-app = FastAPI(title="Clawd Agent", version="2.0.0-patched")
+# Cache LRU de respostas do LLM: chave -> (instante, texto)
+_response_cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+# Limita chamadas simultâneas ao provedor (evita rajadas e rate limit)
+_kimi_sem = asyncio.Semaphore(KIMI_CONCURRENCY)
+
+app = FastAPI(
+    title="Clawd Agent",
+    version="2.0.0-patched",
+    default_response_class=ORJSONResponse
+)
 
 # Incluir rotas de sincronização
 app.include_router(sync_router, prefix="/api")
 
+
+@app.on_event("shutdown")
+async def close_provider_clients():
+    """Fecha o cliente HTTP compartilhado do Gemini usado pelo router."""
+    try:
+        from core.providers.gemini_provider import aclose_clients
+    except ImportError:
+        return
+    await aclose_clients()
+
 def load_workspace_context() -> str:
     """Carrega contexto completo do workspace: INIT.md, SOUL.md, USER.md, STRUCTURE.md, AGENTS.md."""
-    parts = []
+    buf = io.StringIO()
+
+    def add(text: str):
+        # Mesmo resultado de "\n".join(parts), sem a lista intermediária
+        if buf.tell():
+            buf.write("\n")
+        buf.write(text)
     
     # Carregar AGENTS.md (guia do agente - PRIMEIRO para prioridade)
     agents_path = Path(AGENTS_MD_PATH)
     if agents_path.exists():
-        parts.append("# GUIA DO AGENTE (AGENTS.md)\n")
-        parts.append(agents_path.read_text())
-        parts.append("\n")
+        add("# GUIA DO AGENTE (AGENTS.md)\n")
+        add(agents_path.read_text())
+        add("\n")
         print(f"✅ AGENTS.md carregado: {agents_path}", flush=True)
     else:
         print(f"⚠️ AGENTS.md não encontrado em {agents_path}", flush=True)
@@ -71,8 +109,8 @@ def load_workspace_context() -> str:
         clawd_workspace = os.getenv("CLAWD_WORKSPACE", "/app/workspace")
     init_path = Path(clawd_workspace) / "INIT.md"
     if init_path.exists():
-        parts.append("# DOCUMENTAÇÃO TÉCNICA (INIT.md)\n")
-        parts.append(init_path.read_text())
+        add("# DOCUMENTAÇÃO TÉCNICA (INIT.md)\n")
+        add(init_path.read_text())
         print(f"✅ INIT.md carregado: {init_path}", flush=True)
     else:
         print(f"⚠️ INIT.md não encontrado em {init_path}", flush=True)
@@ -80,18 +118,18 @@ def load_workspace_context() -> str:
     # Carregar SOUL.md
     soul_path = Path(SOUL_MD_PATH)
     if soul_path.exists():
-        parts.append("\n\n# PERSONALIDADE (SOUL.md)\n")
-        parts.append(soul_path.read_text())
+        add("\n\n# PERSONALIDADE (SOUL.md)\n")
+        add(soul_path.read_text())
         print(f"✅ SOUL.md carregado: {SOUL_MD_PATH}", flush=True)
     else:
         print(f"⚠️ SOUL.md não encontrado em {SOUL_MD_PATH}", flush=True)
-        parts.append("# Clawd\nVocê é o Clawd, braço direito de código.")
+        add("# Clawd\nVocê é o Clawd, braço direito de código.")
     
     # Carregar USER.md (perfil do usuário)
     user_path = Path(USER_MD_PATH)
     if user_path.exists():
-        parts.append("\n\n# PERFIL DO USUÁRIO (USER.md)\n")
-        parts.append(user_path.read_text())
+        add("\n\n# PERFIL DO USUÁRIO (USER.md)\n")
+        add(user_path.read_text())
         print(f"✅ USER.md carregado: {USER_MD_PATH}", flush=True)
     
     # Carregar STRUCTURE.md (estrutura do workspace)
@@ -101,13 +139,13 @@ def load_workspace_context() -> str:
         clawd_workspace = os.getenv("CLAWD_WORKSPACE", "/app/workspace")
     structure_path = Path(clawd_workspace) / "STRUCTURE.md"
     if structure_path.exists():
-        parts.append("\n\n# ESTRUTURA DO WORKSPACE (STRUCTURE.md)\n")
-        parts.append(structure_path.read_text())
+        add("\n\n# ESTRUTURA DO WORKSPACE (STRUCTURE.md)\n")
+        add(structure_path.read_text())
         print(f"✅ STRUCTURE.md carregado: {structure_path}", flush=True)
     else:
         print(f"⚠️ STRUCTURE.md não encontrado em {structure_path}", flush=True)
     
-    return "\n".join(parts)
+    return buf.getvalue()
 
 # Carregar system prompt completo
 SOUL_PROMPT = load_workspace_context()
@@ -176,9 +214,9 @@ class SessionData(BaseModel):
 @app.get("/health")
 def health():
     """Health check."""
-    config = load_config()
-    defaults = config.get("defaults", {})
-    
+    # load_config só relê o init.yaml quando o arquivo muda
+    defaults = (load_config() or {}).get("defaults", {})
+
     return {
         "status": "ok",
         "model": KIMI_MODEL,
@@ -216,7 +254,96 @@ def load_template_soul(template: str) -> str:
     return None
 
 
-@app.post("/chat", response_model=ChatResponse)
+def _response_cache_key(system_prompt: str, messages: List[Dict], model: str) -> str:
+    """Hash estável de (system prompt, mensagens, modelo)."""
+    raw = json.dumps(
+        {"system": system_prompt, "messages": messages, "model": model},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _cache_get(key: str):
+    """Retorna o texto do cache, ou None se ausente/expirado."""
+    entry = _response_cache.get(key)
+    if entry is None:
+        return None
+    stored_at, text = entry
+    if time.monotonic() - stored_at > RESPONSE_CACHE_TTL:
+        del _response_cache[key]
+        return None
+    _response_cache.move_to_end(key)
+    return text
+
+
+def _cache_put(key: str, text: str):
+    """Guarda resposta no cache, descartando as menos usadas recentemente."""
+    _response_cache[key] = (time.monotonic(), text)
+    _response_cache.move_to_end(key)
+    while len(_response_cache) > RESPONSE_CACHE_SIZE:
+        _response_cache.popitem(last=False)
+
+
+async def _create_with_backoff(**kwargs):
+    """client.messages.create fora do event loop, com backoff exponencial em 429."""
+    delay = 1.0
+    for attempt in range(KIMI_MAX_RETRIES + 1):
+        try:
+            return await asyncio.to_thread(client.messages.create, **kwargs)
+        except RateLimitError:
+            if attempt == KIMI_MAX_RETRIES:
+                raise
+            print(f"⏳ Rate limit do Kimi, nova tentativa em {delay:.0f}s", flush=True)
+            await asyncio.sleep(delay)
+            delay *= 2
+
+
+async def generate_response(messages: List[Dict], system_prompt: str) -> Tuple[str, Optional[Tuple[int, int]]]:
+    """
+    Chama o LLM e retorna (texto, (input_tokens, output_tokens)).
+    Prompts idênticos dentro do TTL são respondidos direto do cache, com uso
+    None: esses tokens já foram contabilizados na primeira chamada.
+    """
+    if chat_with_provider:
+        # init.yaml é editado pela web UI; o router resolve os defaults por requisição
+        defaults = (load_config() or {}).get("defaults", {})
+        model = f"{defaults.get('provider', 'kimi')}/{defaults.get('model', 'kimi-k2-0711')}"
+    else:
+        model = f"kimi/{KIMI_MODEL}"
+
+    key = _response_cache_key(system_prompt, messages, model)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached, None
+
+    usage = None
+    async with _kimi_sem:
+        if chat_with_provider:
+            # LLM Router (suporta vários provedores/modelos dinâmicos)
+            response_text = await chat_with_provider(
+                messages=messages,
+                system=system_prompt,
+                temperature=0.7,
+                max_tokens=4096
+            )
+        else:
+            # Fallback para o comportamento original se o router não estiver disponível
+            response = await _create_with_backoff(
+                model=KIMI_MODEL,
+                max_tokens=4096,
+                system=system_prompt,
+                messages=messages
+            )
+            response_text = response.content[0].text
+            if getattr(response, "usage", None):
+                usage = (response.usage.input_tokens, response.usage.output_tokens)
+
+    _cache_put(key, response_text)
+    return response_text, usage
+
+
+@app.post("/chat", response_model=ChatResponse, response_class=ORJSONResponse)
 async def chat(request: ChatRequest):
     """
     Processa mensagem do usuário e retorna resposta do Clawd.
@@ -238,10 +365,11 @@ async def chat(request: ChatRequest):
         if request.context and request.context.get("memories"):
             memories = request.context["memories"]
             if memories:
-                context_parts.append("MEMÓRIAS DO USUÁRIO:")
-                for mem in memories[:3]:  # Top 3 memórias
-                    context_parts.append(f"- [{mem.get('type', 'fact')}] {mem.get('content', '')}")
-                context_parts.append("")
+                add_part = context_parts.append
+                add_part("MEMÓRIAS DO USUÁRIO:")
+                for mem in islice(memories, 3):  # Top 3 memórias
+                    add_part(f"- [{mem.get('type', 'fact')}] {mem.get('content', '')}")
+                add_part("")
         
         # Username se disponível
         if request.context and request.context.get("username"):
@@ -250,25 +378,13 @@ async def chat(request: ChatRequest):
         context_str = "\n".join(context_parts) if context_parts else ""
         
         # 3. Preparar mensagens para API (formato Anthropic)
-        messages = []
-        
-        # Primeiro, adicionar contexto do sistema como uma mensagem inicial (se houver)
-        if context_str:
-            context_prefix = f"[Contexto do sistema]\n{context_str}\n\n---\n\n"
-        else:
-            context_prefix = ""
+        messages = [{"role": m.role, "content": m.content} for m in session.messages]
         
-        # Adicionar mensagens da sessão
-        for i, msg in enumerate(session.messages):
-            content = msg.content
-            # Se for a última mensagem (a atual) e tiver contexto, adicionar prefixo
-            if i == len(session.messages) - 1 and msg.role == "user" and context_prefix:
-                content = context_prefix + content
-            
-            messages.append({
-                "role": msg.role,
-                "content": content
-            })
+        # Contexto do sistema vai como prefixo da última mensagem (a atual)
+        if context_str and messages and messages[-1]["role"] == "user":
+            messages[-1]["content"] = (
+                f"[Contexto do sistema]\n{context_str}\n\n---\n\n" + messages[-1]["content"]
+            )
         
         # 4. Determinar system prompt (template ou padrão)
         template = request.context.get("template") if request.context else None
@@ -299,23 +415,8 @@ REGRAS DE RESPOSTA:
         else:
             system_prompt = CLAWD_SYSTEM_PROMPT
         
-        # 5. Chamar API via LLM Router (suporta vários provedores/modelos dinâmicos)
-        if chat_with_provider:
-            response_text = await chat_with_provider(
-                messages=messages,
-                system=system_prompt,
-                temperature=0.7,
-                max_tokens=4096
-            )
-        else:
-            # Fallback para o comportamento original se o router não estiver disponível
-            response = client.messages.create(
-                model=KIMI_MODEL,
-                max_tokens=4096,
-                system=system_prompt,
-                messages=messages
-            )
-            response_text = response.content[0].text
+        # 5. Chamar API (com cache de respostas para prompts idênticos)
+        response_text, usage = await generate_response(messages, system_prompt)
             
         # 6. Interceptar Ferramentas de Arquivo (XML Tags)
         # Ensure CLAWD_WORKSPACE is defined (defensive programming)
@@ -380,11 +481,7 @@ REGRAS DE RESPOSTA:
         
         # 7. Salvar resposta (limpa) na sessão
         
-        input_tokens = None
-        output_tokens = None
-        if 'response' in locals() and hasattr(response, 'usage') and response.usage:
-            input_tokens = response.usage.input_tokens
-            output_tokens = response.usage.output_tokens
+        input_tokens, output_tokens = usage or (None, None)
             
         sessions.add_message(
             user_id=request.user_id,
@@ -401,7 +498,8 @@ REGRAS DE RESPOSTA:
         # 6. Detectar sugestão de memória (heurísticas)
         memory_update = detect_memory_update(request.message, response_text)
         
-        return ChatResponse(
+        # Campos montados pelo próprio servidor: dispensa a validação do Pydantic
+        return ChatResponse.model_construct(
             response=response_text_clean,
             session_id=session.session_id,
             messages_in_session=len(session.messages),
@@ -477,19 +575,26 @@ def clear_session(data: SessionData):
 def get_session(user_id: str):
     """Retorna dados da sessão (para debug)."""
     session = sessions.get_or_create_session(user_id)
-    return {
+    header = {
         "session_id": session.session_id,
         "user_id": session.user_id,
         "messages_count": len(session.messages),
         "created_at": session.created_at,
         "last_activity": session.last_activity,
         "context": session.context_data,
-        "messages": [
-            {"role": m.role, "content": m.content, "time": m.timestamp}
-            for m in session.messages
-        ]
     }
 
+    async def stream_body():
+        # Cabeçalho sem o "}" final, depois uma mensagem por chunk
+        yield orjson.dumps(header)[:-1] + b',"messages":['
+        for i, m in enumerate(session.messages):
+            if i:
+                yield b","
+            yield orjson.dumps({"role": m.role, "content": m.content, "time": m.timestamp})
+        yield b"]}"
+
+    return StreamingResponse(stream_body(), media_type="application/json")
+
 
 @app.get("/stats")
 def stats():
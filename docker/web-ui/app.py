@@ -7,40 +7,42 @@ Features: Settings Panel, Session Management, Web Search
 """
 
 import os
+import copy
 import json
+import time
+import asyncio
+import hashlib
+import logging
+import queue
 import sys
 import httpx
+import orjson
 import pickle
 import uuid
 import re
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from typing import Dict, List, Optional, Any
 from fastapi import FastAPI, Request, HTTPException, UploadFile, File
-from fastapi.responses import HTMLResponse, JSONResponse, Response
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse, Response
 from fastapi.staticfiles import StaticFiles
+from starlette.middleware.gzip import GZipMiddleware
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
 import yaml
 from pydantic import BaseModel
-import shutil
-import tempfile
 
-# Add core to path for hybrid memory
-# Path: docker/web-ui/app.py -> core/
-core_path = Path(__file__).parent.parent.parent / "core"
-if core_path.exists():
-    sys.path.insert(0, str(core_path))
-else:
-    # Fallback for container path
-    sys.path.insert(0, "/app/core")
-
-# Try to import hybrid memory
+# libyaml-backed loader when PyYAML was built with it
 try:
-    from hybrid_memory import HybridMemoryStore, MemoryQuery
-    HYBRID_AVAILABLE = True
+    from yaml import CSafeLoader as _YamlLoader
 except ImportError:
-    HYBRID_AVAILABLE = False
-    print("⚠️  Hybrid memory not available, using simple storage")
+    from yaml import SafeLoader as _YamlLoader
+import shutil
+import tempfile
+
+# core/ is importable as a package: PYTHONPATH=/app in the container (core is
+# bind-mounted at /app/core), the repo root when running locally.
+from core.hybrid_memory import HybridMemoryStore, MemoryQuery
 
 # Try to import web search
 try:
@@ -110,7 +112,33 @@ web_search_tool = WebSearchTool() if WEB_SEARCH_AVAILABLE else None
 session_context_managers: Dict[str, SessionContextManager] = {}
 session_compactors: Dict[str, SessionContextCompactor] = {}
 
-app = FastAPI(title="Klaus - AI Solutions Architect")
+app = FastAPI(title="Klaus - AI Solutions Architect", default_response_class=ORJSONResponse)
+
+# Compress page, static and JSON responses; brotli when available (it falls
+# back to gzip for clients that don't accept br)
+try:
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(BrotliMiddleware, minimum_size=500)
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=500)
+
+# Log records go through a queue so request handlers never block on stderr
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_log_listener = QueueListener(_log_queue, logging.StreamHandler())
+logger = logging.getLogger("klaus.web_ui")
+logger.addHandler(QueueHandler(_log_queue))
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+# Optional Prometheus metrics
+try:
+    from prometheus_client import Counter, make_asgi_app
+    FACT_STORE_FAILURES = Counter(
+        "fact_store_failures_total", "Facts that could not be persisted by /api/compact"
+    )
+    app.mount("/metrics", make_asgi_app())
+except ImportError:
+    FACT_STORE_FAILURES = None
 
 # Templates e static files
 BASE_DIR = Path(__file__).parent
@@ -136,6 +164,30 @@ async def send_telegram_notification(message: str):
             except Exception as e:
                 print(f"⚠️ Failed to send Telegram notification to {chat_id}: {e}")
 
+@app.on_event("startup")
+async def init_http_client():
+    """Create the shared keep-alive HTTP client for Kimi Agent calls."""
+    app.state.http = httpx.AsyncClient(
+        base_url=KIMI_AGENT_URL,
+        timeout=httpx.Timeout(connect=2.0, read=60.0, write=5.0, pool=1.0),
+        limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+    )
+
+@app.on_event("shutdown")
+async def close_http_client():
+    """Close the shared HTTP client."""
+    await app.state.http.aclose()
+
+@app.on_event("startup")
+async def start_log_listener():
+    """Start the background thread draining the log queue."""
+    _log_listener.start()
+
+@app.on_event("shutdown")
+async def stop_log_listener():
+    """Flush and stop the log queue listener."""
+    _log_listener.stop()
+
 @app.on_event("startup")
 async def startup_event():
     """Run tasks on application startup."""
@@ -277,55 +329,123 @@ def get_available_templates():
 # Config
 KIMI_AGENT_URL = os.getenv("KIMI_AGENT_URL", "http://kimi-agent:8080")
 WEB_UI_PORT = int(os.getenv("WEB_UI_PORT", "8082"))
+# Max /api/chat requests in flight; beyond that we answer 503 instead of queueing
+CHAT_CONCURRENCY = int(os.getenv("CHAT_CONCURRENCY", "64"))
+_chat_sem = asyncio.Semaphore(CHAT_CONCURRENCY)
+
+INIT_YAML_PATHS = (
+    Path("/app/workspace/init.yaml"),
+    Path("./workspace/init.yaml"),
+    Path("../init.yaml"),
+    Path("./init.yaml"),
+)
+
+# Parsed init.yaml per path, keyed on (st_mtime_ns, st_size) for invalidation
+_CONFIG_CACHE: Dict[str, tuple] = {}
 
 def load_config():
-    """Load agent info from init.yaml."""
-    init_paths = [
-        Path("/app/workspace/init.yaml"),
-        Path("./workspace/init.yaml"),
-        Path("../init.yaml"),
-        Path("./init.yaml"),
-    ]
-    
-    for path in init_paths:
-        if path.exists():
-            try:
-                with open(path) as f:
-                    return yaml.safe_load(f)
-            except Exception:
-                pass
+    """Load agent info from init.yaml (re-parsed only when the file changes)."""
+    for path in INIT_YAML_PATHS:
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        
+        key = str(path)
+        cached = _CONFIG_CACHE.get(key)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return copy.deepcopy(cached[2])
+        
+        try:
+            with open(path) as f:
+                config = yaml.load(f, Loader=_YamlLoader)
+        except Exception:
+            continue
+        _CONFIG_CACHE[key] = (st.st_mtime_ns, st.st_size, config)
+        return copy.deepcopy(config)
     
     return {
         "agent": {"name": "Assistant", "template": "general"},
         "mode": {"telegram": {"enabled": False}, "web": {"enabled": True}}
     }
 
-def get_container_status():
-    """Get Docker container status."""
+CONTAINER_STATUS_TTL = 2.0  # seconds
+DOCKER_BIN = shutil.which("docker") or "/usr/bin/docker"
+
+_container_status: Dict[str, str] = {}
+_container_status_at = 0.0
+_container_status_lock = asyncio.Lock()
+
+def _run_docker_ps() -> Dict[str, str]:
+    """Run `docker ps` and map container name -> status (blocking)."""
     import subprocess
     try:
         result = subprocess.run(
-            ["docker", "ps", "--format", "{{.Names}}|{{.Status}}"],
-            capture_output=True, text=True, timeout=5
+            [DOCKER_BIN, "ps", "--format", "{{.Names}}|{{.Status}}"],
+            capture_output=True, text=True, timeout=1.0, check=False
         )
         containers = {}
-        for line in result.stdout.strip().split("\n"):
-            if "|" in line:
-                name, status = line.split("|", 1)
+        for line in result.stdout.splitlines():
+            name, sep, status = line.partition("|")
+            if sep:
                 containers[name] = status
         return containers
-    except:
+    except (subprocess.SubprocessError, FileNotFoundError, TimeoutError):
         return {}
 
+async def get_container_status() -> Dict[str, str]:
+    """Get Docker container status, cached for CONTAINER_STATUS_TTL seconds.
+    
+    `docker ps` runs in a worker thread so it never blocks the event loop;
+    concurrent callers share a single invocation via the lock.
+    """
+    global _container_status, _container_status_at
+    async with _container_status_lock:
+        if time.monotonic() - _container_status_at >= CONTAINER_STATUS_TTL:
+            _container_status = await asyncio.to_thread(_run_docker_ps)
+            _container_status_at = time.monotonic()
+        return dict(_container_status)
+
+# Provider keys whose presence changes the rendered chat page
+PROVIDER_KEY_ENVS = ("KIMI_API_KEY", "ANTHROPIC_API_KEY", "OPENAI_API_KEY", "GOOGLE_API_KEY", "OPENROUTER_API_KEY")
+
+# Rendered chat page: key -> (html bytes, etag). Holds only the current render.
+_PAGE_CACHE: Dict[tuple, tuple] = {}
+
 @app.get("/", response_class=HTMLResponse)
-async def get_chat_page():
-    """Serve the modern chat interface."""
-    config = load_config()
+async def get_chat_page(request: Request):
+    """Serve the modern chat interface (rendered once per config/env change)."""
+    config = await asyncio.to_thread(load_config)
     agent_name = config.get("agent", {}).get("name", "Assistant")
     agent_template = config.get("agent", {}).get("template", "general")
     user_name = config.get("user", {}).get("name", "User")
     telegram_enabled = config.get("mode", {}).get("telegram", {}).get("enabled", False)
     
+    key = (agent_name, agent_template, user_name, telegram_enabled,
+           tuple(bool(os.getenv(env)) for env in PROVIDER_KEY_ENVS))
+    cached = _PAGE_CACHE.get(key)
+    if cached is None:
+        body = render_chat_page(agent_name, agent_template, user_name, telegram_enabled).encode("utf-8")
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        _PAGE_CACHE.clear()
+        cached = _PAGE_CACHE[key] = (body, etag)
+    
+    body, etag = cached
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=60"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="text/html", headers=headers)
+
+
+def render_chat_page(agent_name: str, agent_template: str, user_name: str, telegram_enabled: bool) -> str:
+    """Render the chat interface HTML shell; CSS/JS live in /static/app.css and /static/app.js."""
+    # Runtime values for app.js; "</" is escaped so a name can't close the <script> tag
+    page_cfg = json.dumps({"agentName": agent_name, "userName": user_name}).replace("</", "<\\/")
+    initial = (agent_name[:1] or "A").upper()
+    tg_class = "online" if telegram_enabled else "offline"
+    tg_label = "Enabled" if telegram_enabled else "Disabled"
+    has_key = {env: bool(os.getenv(env)) for env in PROVIDER_KEY_ENVS}
+    
     html_content = f"""<!DOCTYPE html>
 <html lang="en">
 <head>
@@ -355,360 +475,7 @@ async def get_chat_page():
     <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css" rel="stylesheet">
     <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/styles/github.min.css">
     <link rel="stylesheet" href="/static/themes.css">
-    <style>
-        * {{ font-family: 'Inter', sans-serif; }}
-        h1, h2, h3, .btn, .font-heading {{ font-family: 'Outfit', sans-serif; }}
-        
-        /* Shadcn-inspired color palette (default fallback) */
-        :root {{
-            --background: 0 0% 100%;
-            --foreground: 240 10% 3.9%;
-            --card: 0 0% 100%;
-            --card-foreground: 240 10% 3.9%;
-            --popover: 0 0% 100%;
-            --popover-foreground: 240 10% 3.9%;
-            --primary: 240 5.9% 10%;
-            --primary-foreground: 0 0% 98%;
-            --secondary: 240 4.8% 95.9%;
-            --secondary-foreground: 240 5.9% 10%;
-            --muted: 240 4.8% 95.9%;
-            --muted-foreground: 240 3.8% 46.1%;
-            --accent: 240 4.8% 95.9%;
-            --accent-foreground: 240 5.9% 10%;
-            --destructive: 0 84.2% 60.2%;
-            --destructive-foreground: 0 0% 98%;
-            --border: 240 5.9% 90%;
-            --input: 240 5.9% 90%;
-            --ring: 240 5.9% 10%;
-            --radius: 0.5rem;
-        }}
-        
-        /* DECKARD LIGHT - Noir Detective */
-        .theme-deckard-light {{
-            --background: 36 20% 95%;
-            --foreground: 30 15% 8%;
-            --card: 40 20% 97%;
-            --card-foreground: 30 15% 8%;
-            --popover: 40 20% 97%;
-            --popover-foreground: 30 15% 8%;
-            --primary: 17 100% 60%;
-            --primary-foreground: 0 0% 100%;
-            --secondary: 36 15% 90%;
-            --secondary-foreground: 30 15% 8%;
-            --muted: 36 15% 92%;
-            --muted-foreground: 30 10% 33%;
-            --accent: 165 100% 42%;
-            --accent-foreground: 30 15% 8%;
-            --destructive: 350 55% 35%;
-            --destructive-foreground: 0 0% 100%;
-            --border: 36 12% 80%;
-            --input: 36 12% 80%;
-            --ring: 17 100% 60%;
-            --success: 145 35% 27%;
-            --warning: 45 65% 47%;
-        }}
-        
-        /* DECKARD DARK - Noir Detective */
-        .theme-deckard-dark {{
-            --background: 30 12% 8%;
-            --foreground: 40 15% 92%;
-            --card: 30 10% 12%;
-            --card-foreground: 40 15% 92%;
-            --popover: 30 10% 12%;
-            --popover-foreground: 40 15% 92%;
-            --primary: 17 85% 58%;
-            --primary-foreground: 30 15% 8%;
-            --secondary: 30 10% 18%;
-            --secondary-foreground: 40 15% 92%;
-            --muted: 30 10% 18%;
-            --muted-foreground: 35 10% 60%;
-            --accent: 165 65% 48%;
-            --accent-foreground: 30 15% 8%;
-            --destructive: 350 45% 50%;
-            --destructive-foreground: 0 0% 100%;
-            --border: 30 10% 22%;
-            --input: 30 10% 22%;
-            --ring: 17 85% 58%;
-            --success: 145 30% 40%;
-            --warning: 45 55% 52%;
-        }}
-        
-        /* Deckard theme typography */
-        .theme-deckard-light h1,
-        .theme-deckard-light h2,
-        .theme-deckard-light h3,
-        .theme-deckard-light .font-heading,
-        .theme-deckard-dark h1,
-        .theme-deckard-dark h2,
-        .theme-deckard-dark h3,
-        .theme-deckard-dark .font-heading {{
-            font-family: 'Orbitron', sans-serif;
-            letter-spacing: 0.05em;
-        }}
-        
-        body {{
-            background-color: hsl(var(--background));
-            color: hsl(var(--foreground));
-            transition: background-color 0.3s ease, color 0.3s ease;
-        }}
-        
-        .chat-bubble-user {{
-            background: #201E1B;
-            color: #FAF9F7;
-            border-radius: 16px 16px 4px 16px;
-            padding: 1rem 1.25rem;
-            max-width: 75%;
-        }}
-        
-        .chat-bubble-assistant {{
-            background: #EBE8E4;
-            color: #201E1B;
-            border: 1px solid #E5E2DE;
-            border-radius: 16px 16px 16px 4px;
-            padding: 1rem 1.25rem;
-            max-width: 75%;
-        }}
-        
-        .status-badge {{
-            display: inline-flex;
-            align-items: center;
-            gap: 0.375rem;
-            padding: 0.25rem 0.75rem;
-            border-radius: 9999px;
-            font-size: 0.75rem;
-            font-weight: 500;
-        }}
-        
-        .status-badge.online {{
-            background: transparent;
-            color: #457A5C;
-            border: 1px solid rgba(69, 122, 92, 0.4);
-        }}
-        
-        .status-badge.offline {{
-            background: transparent;
-            color: #8C8884;
-            border: 1px solid #E5E2DE;
-        }}
-        
-        .status-badge.warning {{
-            background: transparent;
-            color: #B88A2F;
-            border: 1px solid rgba(184, 138, 47, 0.4);
-        }}
-        
-        /* Theme classes defined in themes.css */
-        
-        .input-field {{
-            width: 100%;
-            padding: 0.625rem 0.875rem;
-            border: 1px solid hsl(var(--border));
-            border-radius: var(--radius);
-            background: hsl(var(--background));
-            color: hsl(var(--foreground));
-            font-size: 0.875rem;
-            transition: all 0.2s;
-        }}
-        
-        /* Toast animations */
-        @keyframes fadeIn {{
-            from {{ opacity: 0; transform: translateY(-10px); }}
-            to {{ opacity: 1; transform: translateY(0); }}
-        }}
-        
-        @keyframes fadeOut {{
-            from {{ opacity: 1; transform: translateY(0); }}
-            to {{ opacity: 0; transform: translateY(-10px); }}
-        }}
-        
-        .input-field:focus {{
-            outline: none;
-            border-color: hsl(var(--ring));
-            box-shadow: 0 0 0 2px hsl(var(--ring) / 0.1);
-        }}
-        
-        .typing-indicator span {{
-            display: inline-block;
-            width: 6px;
-            height: 6px;
-            background: hsl(var(--muted-foreground));
-            border-radius: 50%;
-            margin: 0 2px;
-            animation: typing 1.4s infinite;
-        }}
-        
-        .typing-indicator span:nth-child(2) {{ animation-delay: 0.2s; }}
-        .typing-indicator span:nth-child(3) {{ animation-delay: 0.4s; }}
-        
-        @keyframes typing {{
-            0%, 60%, 100% {{ transform: translateY(0); }}
-            30% {{ transform: translateY(-4px); }}
-        }}
-        
-        .scrollbar-hide::-webkit-scrollbar {{
-            width: 8px;
-            height: 8px;
-        }}
-        
-        .scrollbar-hide::-webkit-scrollbar-track {{
-            background: transparent;
-        }}
-        
-        .scrollbar-hide::-webkit-scrollbar-thumb {{
-            background: #d1d5db;
-            border-radius: 4px;
-        }}
-        
-        .scrollbar-hide::-webkit-scrollbar-thumb:hover {{
-            background: #9ca3af;
-        }}
-        
-        .scrollbar-hide {{
-            scrollbar-width: thin;
-            scrollbar-color: #d1d5db transparent;
-        }}
-        
-        .divider {{
-            height: 1px;
-            background: hsl(var(--border));
-            margin: 1rem 0;
-        }}
-        
-        /* Markdown Styles */
-        .markdown-content h1 {{
-            font-size: 1.5rem;
-            font-weight: 600;
-            margin: 1rem 0 0.5rem;
-        }}
-        
-        .markdown-content h2 {{
-            font-size: 1.25rem;
-            font-weight: 600;
-            margin: 0.875rem 0 0.5rem;
-        }}
-        
-        .markdown-content h3 {{
-            font-size: 1.125rem;
-            font-weight: 600;
-            margin: 0.75rem 0 0.5rem;
-        }}
-        
-        .markdown-content p {{
-            margin-bottom: 0.75rem;
-            line-height: 1.6;
-        }}
-        
-        .markdown-content ul, .markdown-content ol {{
-            margin: 0.5rem 0;
-            padding-left: 1.5rem;
-        }}
-        
-        .markdown-content li {{
-            margin: 0.25rem 0;
-        }}
-        
-        .markdown-content code {{
-            background: rgba(0,0,0,0.05);
-            padding: 0.125rem 0.375rem;
-            border-radius: 0.25rem;
-            font-family: 'Monaco', 'Menlo', 'Ubuntu Mono', monospace;
-            font-size: 0.875em;
-        }}
-        
-        .markdown-content pre {{
-            background: #f6f8fa;
-            padding: 1rem;
-            border-radius: 0.5rem;
-            overflow-x: auto;
-            margin: 0.75rem 0;
-            border: 1px solid #e1e4e8;
-        }}
-        
-        .markdown-content pre code {{
-            background: none;
-            padding: 0;
-            border-radius: 0;
-        }}
-        
-        .markdown-content blockquote {{
-            border-left: 4px solid #e1e4e8;
-            padding-left: 1rem;
-            margin: 0.75rem 0;
-            color: #6a737d;
-        }}
-        
-        .markdown-content table {{
-            width: 100%;
-            border-collapse: collapse;
-            margin: 0.75rem 0;
-        }}
-        
-        .markdown-content th, .markdown-content td {{
-            border: 1px solid #e1e4e8;
-            padding: 0.5rem;
-            text-align: left;
-        }}
-        
-        .markdown-content th {{
-            background: #f6f8fa;
-            font-weight: 600;
-        }}
-
-        /* Responsive Styles */
-        @media (max-width: 768px) {{
-            #left-sidebar, #right-sidebar {{
-                position: fixed;
-                top: 0;
-                bottom: 0;
-                z-index: 100;
-                width: 85% !important;
-                max-width: 320px;
-                height: 100vh;
-                transform: translateX(-100%);
-                opacity: 1 !important;
-                display: flex !important;
-            }}
-            #right-sidebar {{
-                right: 0;
-                transform: translateX(100%);
-                border-left: 1px solid hsl(var(--border));
-                border-right: none;
-            }}
-            #left-sidebar.active {{
-                transform: translateX(0);
-                padding-top: calc(env(safe-area-inset-top, 44px) + 1rem);
-            }}
-            #right-sidebar.active {{
-                transform: translateX(0);
-                padding-top: calc(env(safe-area-inset-top, 44px) + 1rem);
-            }}
-            .sidebar-overlay {{
-                display: none;
-                position: fixed;
-                inset: 0;
-                background: rgba(0,0,0,0.4);
-                backdrop-filter: blur(2px);
-                z-index: 90;
-            }}
-            .sidebar-overlay.active {{
-                display: block;
-            }}
-            #tab-content-chat {{
-                padding-bottom: env(safe-area-inset-bottom);
-            }}
-            header {{
-                padding-top: calc(env(safe-area-inset-top, 44px) + 1rem) !important;
-                padding-left: 1rem;
-                padding-right: 1rem;
-                min-height: calc(env(safe-area-inset-top, 44px) + 4rem);
-                background-color: white;
-                z-index: 50;
-            }}
-            .chat-bubble-assistant, .chat-bubble-user {{
-                max-width: 92% !important;
-            }}
-        }}
-    </style>
+    <link rel="stylesheet" href="/static/app.css">
 </head>
 <body class="h-screen overflow-hidden bg-gray-50 flex flex-col">
     <!-- Sidebar Overlay for Mobile -->
@@ -909,7 +676,7 @@ async def get_chat_page():
                 <div class="flex items-center justify-between">
                     <div class="flex items-center gap-3">
                         <div class="w-10 h-10 rounded-full bg-gradient-to-br from-gray-700 to-gray-500 flex items-center justify-center text-white font-semibold text-lg shrink-0">
-                            {agent_name[0].upper()}
+                            {initial}
                         </div>
                         <div class="hidden sm:block">
                             <h1 class="font-semibold text-gray-900 leading-none mb-1">{agent_name}</h1>
@@ -1092,9 +859,9 @@ async def get_chat_page():
                         </div>
                         <div class="flex items-center justify-between text-sm">
                             <span class="text-gray-600">Telegram Bot</span>
-                            <span id="status-telegram" class="{'status-badge online' if telegram_enabled else 'status-badge offline'}">
+                            <span id="status-telegram" class="status-badge {tg_class}">
                                 <i class="fas fa-circle text-xs"></i>
-                                {'Enabled' if telegram_enabled else 'Disabled'}
+                                {tg_label}
                             </span>
                         </div>
                     </div>
@@ -1162,40 +929,40 @@ async def get_chat_page():
                         Provider Status
                     </h3>
                     <div class="space-y-2 text-xs">
-                        <div class="flex items-center justify-between p-2.5 rounded-lg border border-subtle {'opacity-50' if not os.getenv('KIMI_API_KEY') else 'provider-online'}">
+                        <div class="flex items-center justify-between p-2.5 rounded-lg border border-subtle {'opacity-50' if not has_key['KIMI_API_KEY'] else 'provider-online'}">
                             <div class="flex items-center gap-2">
-                                <i class="fas fa-circle text-[6px] {'icon-accent' if os.getenv('KIMI_API_KEY') else 'text-tertiary'}"></i>
-                                <span class="text-xs {'font-medium' if os.getenv('KIMI_API_KEY') else 'text-secondary'}">Kimi</span>
+                                <i class="fas fa-circle text-[6px] {'icon-accent' if has_key['KIMI_API_KEY'] else 'text-tertiary'}"></i>
+                                <span class="text-xs {'font-medium' if has_key['KIMI_API_KEY'] else 'text-secondary'}">Kimi</span>
                             </div>
-                            <span class="text-[10px] {'icon-accent' if os.getenv('KIMI_API_KEY') else 'text-tertiary'}">{'Active' if os.getenv('KIMI_API_KEY') else 'Not set'}</span>
+                            <span class="text-[10px] {'icon-accent' if has_key['KIMI_API_KEY'] else 'text-tertiary'}">{'Active' if has_key['KIMI_API_KEY'] else 'Not set'}</span>
                         </div>
-                        <div class="flex items-center justify-between p-2.5 rounded-lg border border-subtle {'opacity-50' if not os.getenv('ANTHROPIC_API_KEY') else 'provider-online'}">
+                        <div class="flex items-center justify-between p-2.5 rounded-lg border border-subtle {'opacity-50' if not has_key['ANTHROPIC_API_KEY'] else 'provider-online'}">
                             <div class="flex items-center gap-2">
-                                <i class="fas fa-circle text-[6px] {'icon-accent' if os.getenv('ANTHROPIC_API_KEY') else 'text-tertiary'}"></i>
-                                <span class="text-xs {'font-medium' if os.getenv('ANTHROPIC_API_KEY') else 'text-secondary'}">Anthropic</span>
+                                <i class="fas fa-circle text-[6px] {'icon-accent' if has_key['ANTHROPIC_API_KEY'] else 'text-tertiary'}"></i>
+                                <span class="text-xs {'font-medium' if has_key['ANTHROPIC_API_KEY'] else 'text-secondary'}">Anthropic</span>
                             </div>
-                            <span class="text-[10px] {'icon-accent' if os.getenv('ANTHROPIC_API_KEY') else 'text-tertiary'}">{'Active' if os.getenv('ANTHROPIC_API_KEY') else 'Not set'}</span>
+                            <span class="text-[10px] {'icon-accent' if has_key['ANTHROPIC_API_KEY'] else 'text-tertiary'}">{'Active' if has_key['ANTHROPIC_API_KEY'] else 'Not set'}</span>
                         </div>
-                        <div class="flex items-center justify-between p-2.5 rounded-lg border border-subtle {'opacity-50' if not os.getenv('OPENAI_API_KEY') else 'provider-online'}">
+                        <div class="flex items-center justify-between p-2.5 rounded-lg border border-subtle {'opacity-50' if not has_key['OPENAI_API_KEY'] else 'provider-online'}">
                             <div class="flex items-center gap-2">
-                                <i class="fas fa-circle text-[6px] {'icon-accent' if os.getenv('OPENAI_API_KEY') else 'text-tertiary'}"></i>
-                                <span class="text-xs {'font-medium' if os.getenv('OPENAI_API_KEY') else 'text-secondary'}">OpenAI</span>
+                                <i class="fas fa-circle text-[6px] {'icon-accent' if has_key['OPENAI_API_KEY'] else 'text-tertiary'}"></i>
+                                <span class="text-xs {'font-medium' if has_key['OPENAI_API_KEY'] else 'text-secondary'}">OpenAI</span>
                             </div>
-                            <span class="text-[10px] {'icon-accent' if os.getenv('OPENAI_API_KEY') else 'text-tertiary'}">{'Active' if os.getenv('OPENAI_API_KEY') else 'Not set'}</span>
+                            <span class="text-[10px] {'icon-accent' if has_key['OPENAI_API_KEY'] else 'text-tertiary'}">{'Active' if has_key['OPENAI_API_KEY'] else 'Not set'}</span>
                         </div>
-                        <div class="flex items-center justify-between p-2.5 rounded-lg border border-subtle {'opacity-50' if not os.getenv('GOOGLE_API_KEY') else 'provider-online'}">
+                        <div class="flex items-center justify-between p-2.5 rounded-lg border border-subtle {'opacity-50' if not has_key['GOOGLE_API_KEY'] else 'provider-online'}">
                             <div class="flex items-center gap-2">
-                                <i class="fas fa-circle text-[6px] {'icon-accent' if os.getenv('GOOGLE_API_KEY') else 'text-tertiary'}"></i>
-                                <span class="text-xs {'font-medium' if os.getenv('GOOGLE_API_KEY') else 'text-secondary'}">Google</span>
+                                <i class="fas fa-circle text-[6px] {'icon-accent' if has_key['GOOGLE_API_KEY'] else 'text-tertiary'}"></i>
+                                <span class="text-xs {'font-medium' if has_key['GOOGLE_API_KEY'] else 'text-secondary'}">Google</span>
                             </div>
-                            <span class="text-[10px] {'icon-accent' if os.getenv('GOOGLE_API_KEY') else 'text-tertiary'}">{'Active' if os.getenv('GOOGLE_API_KEY') else 'Not set'}</span>
+                            <span class="text-[10px] {'icon-accent' if has_key['GOOGLE_API_KEY'] else 'text-tertiary'}">{'Active' if has_key['GOOGLE_API_KEY'] else 'Not set'}</span>
                         </div>
-                        <div class="flex items-center justify-between p-2.5 rounded-lg border border-subtle {'opacity-50' if not os.getenv('OPENROUTER_API_KEY') else 'provider-online'}">
+                        <div class="flex items-center justify-between p-2.5 rounded-lg border border-subtle {'opacity-50' if not has_key['OPENROUTER_API_KEY'] else 'provider-online'}">
                             <div class="flex items-center gap-2">
-                                <i class="fas fa-circle text-[6px] {'icon-accent' if os.getenv('OPENROUTER_API_KEY') else 'text-tertiary'}"></i>
-                                <span class="text-xs {'font-medium' if os.getenv('OPENROUTER_API_KEY') else 'text-secondary'}">OpenRouter</span>
+                                <i class="fas fa-circle text-[6px] {'icon-accent' if has_key['OPENROUTER_API_KEY'] else 'text-tertiary'}"></i>
+                                <span class="text-xs {'font-medium' if has_key['OPENROUTER_API_KEY'] else 'text-secondary'}">OpenRouter</span>
                             </div>
-                            <span class="text-[10px] {'icon-accent' if os.getenv('OPENROUTER_API_KEY') else 'text-tertiary'}">{'Active' if os.getenv('OPENROUTER_API_KEY') else 'Not set'}</span>
+                            <span class="text-[10px] {'icon-accent' if has_key['OPENROUTER_API_KEY'] else 'text-tertiary'}">{'Active' if has_key['OPENROUTER_API_KEY'] else 'Not set'}</span>
                         </div>
                     </div>
                     <p class="text-[10px] text-gray-400 mt-2">
@@ -1216,10 +983,10 @@ async def get_chat_page():
                             <label class="text-xs text-gray-500 block mb-1">Provider</label>
                             <select id="settings-provider" class="w-full text-sm border border-gray-200 rounded px-2 py-1.5" onchange="updateProviderSettings()">
                                 <option value="kimi" selected>Kimi ✓ (Active)</option>
-                                <option value="anthropic">Anthropic {'✓' if os.getenv('ANTHROPIC_API_KEY') else '(Not set)'}</option>
-                                <option value="openai">OpenAI {'✓' if os.getenv('OPENAI_API_KEY') else '(Not set)'}</option>
-                                <option value="google">Google {'✓' if os.getenv('GOOGLE_API_KEY') else '(Not set)'}</option>
-                                <option value="openrouter">OpenRouter {'✓' if os.getenv('OPENROUTER_API_KEY') else '(Not set)'}</option>
+                                <option value="anthropic">Anthropic {'✓' if has_key['ANTHROPIC_API_KEY'] else '(Not set)'}</option>
+                                <option value="openai">OpenAI {'✓' if has_key['OPENAI_API_KEY'] else '(Not set)'}</option>
+                                <option value="google">Google {'✓' if has_key['GOOGLE_API_KEY'] else '(Not set)'}</option>
+                                <option value="openrouter">OpenRouter {'✓' if has_key['OPENROUTER_API_KEY'] else '(Not set)'}</option>
                                 <option value="custom">Custom (Local)</option>
                             </select>
                         </div>
@@ -1312,3118 +1079,68 @@ async def get_chat_page():
 
                 <!-- Remote Access (Ngrok) -->
                 <div class="card">
-                    <h3 class="text-sm font-medium text-gray-900 mb-3 flex items-center gap-2">
-                        <i class="fas fa-globe text-gray-400"></i>
-                        Remote Access (Ngrok)
-                        <span id="ngrok-status-badge" class="status-badge offline ml-auto">Offline</span>
-                    </h3>
-                    <div class="space-y-3">
-                        <div>
-                            <label class="text-xs text-gray-500 block mb-1">Ngrok Authtoken</label>
-                            <input type="password" id="settings-ngrok-token" class="w-full text-sm border border-gray-200 rounded px-2 py-1.5" placeholder="Enter authtoken...">
-                        </div>
-                        <div>
-                            <label class="text-xs text-gray-500 block mb-1">OAuth Provider</label>
-                            <select id="settings-ngrok-oauth" class="w-full text-sm border border-gray-200 rounded px-2 py-1.5">
-                                <option value="">None (Public)</option>
-                                <option value="google">Google</option>
-                                <option value="github">GitHub</option>
-                                <option value="microsoft">Microsoft</option>
-                            </select>
-                        </div>
-                        <div>
-                            <label class="text-xs text-gray-500 block mb-1">Allowed Emails (CSV)</label>
-                            <input type="text" id="settings-ngrok-emails" class="w-full text-sm border border-gray-200 rounded px-2 py-1.5" placeholder="me@gmail.com, you@gmail.com">
-                        </div>
-                        <div id="ngrok-url-container" class="hidden">
-                            <label class="text-xs text-gray-500 block mb-1">Public URL</label>
-                            <div class="flex gap-2">
-                                <input type="text" id="ngrok-public-url" readonly class="flex-1 text-xs bg-gray-50 border border-gray-200 rounded px-2 py-1.5 font-mono" value="">
-                                <button onclick="copyNgrokUrl()" class="p-1.5 text-gray-400 hover:text-blue-600 border border-gray-200 rounded">
-                                    <i class="fas fa-copy"></i>
-                                </button>
-                            </div>
-                        </div>
-                        <div class="flex gap-2 pt-2">
-                            <button onclick="toggleNgrok()" id="ngrok-toggle-btn" class="btn btn-primary flex-1 text-xs py-1.5">
-                                Start Tunnel
-                            </button>
-                        </div>
-                    </div>
-                </div>
-                
-            </div>
-            
-            <!-- Footer -->
-            <div class="p-3 border-t border-gray-200 bg-gray-50">
-                <p class="text-xs text-gray-500 text-center">
-                    Klaus v2.1
-                </p>
-            </div>
-        </div>
-        
-        <!-- Right Sidebar Toggle (visible when collapsed) -->
-        <button id="right-sidebar-toggle" onclick="toggleSidebar('right')" class="fixed right-0 top-1/2 transform -translate-y-1/2 z-50 bg-white border border-gray-200 rounded-l-lg p-2 shadow-lg hover:bg-gray-50" title="Expand Settings" style="display: none;">
-            <i class="fas fa-chevron-left text-gray-600"></i>
-        </button>
-    </div>
-    
-    <script>
-        const AGENT_NAME = "{agent_name}";
-        const USER_NAME = "{user_name}";
-        const chatMessages = document.getElementById('chat-messages');
-        const messageInput = document.getElementById('message-input');
-        const sendBtn = document.getElementById('send-btn');
-        const typingIndicator = document.getElementById('typing-indicator');
-        const connectionStatus = document.getElementById('connection-status');
-        const msgCount = document.getElementById('msg-count');
-        
-        let messageCount = 0;
-        
-        // Check connection on load
-        checkHealth();
-        
-        // Abort controller for stopping requests
-        let currentRequestController = null;
-        let isSending = false;
-        
-        messageInput.addEventListener('keydown', (e) => {{
-            // Enter sends message
-            if (e.key === 'Enter' && !e.shiftKey && !e.metaKey && !e.ctrlKey) {{
-                e.preventDefault();
-                sendMessage();
-            }}
-            // Shift+Enter adds new line (default behavior - no preventDefault)
-            // Cmd/Ctrl+Enter also sends
-            else if (e.key === 'Enter' && (e.metaKey || e.ctrlKey)) {{
-                e.preventDefault();
-                sendMessage();
-            }}
-        }});
-        
-        // Auto-resize textarea
-        messageInput.addEventListener('input', function() {{
-            this.style.height = 'auto';
-            const maxHeight = 160; // Match CSS max-height
-            const newHeight = Math.min(this.scrollHeight, maxHeight);
-            this.style.height = newHeight + 'px';
-        }});
-        
-        sendBtn.addEventListener('click', () => {{
-            if (isSending) {{
-                // Stop current request
-                stopMessage();
-            }} else {{
-                sendMessage();
-            }}
-        }});
-        
-        // Model selector dropdown toggle
-        const modelSelectorBtn = document.getElementById('model-selector-btn');
-        if (modelSelectorBtn) {{
-            modelSelectorBtn.addEventListener('click', (e) => {{
-                e.stopPropagation();
-                toggleModelDropdown();
-            }});
-        }}
-        
-        function addMessage(text, sender, modelInfo = null) {{
-            const div = document.createElement('div');
-            div.className = 'flex ' + (sender === 'user' ? 'justify-end' : 'justify-start');
-            
-            const bubble = document.createElement('div');
-            bubble.className = sender === 'user' ? 'chat-bubble-user' : 'chat-bubble-assistant';
-            bubble.className += ' max-w-[85%] px-4 py-3';
-            
-            const senderLabel = document.createElement('div');
-            senderLabel.className = 'font-medium text-xs opacity-70 mb-2';
-            const modelBadge = modelInfo ? `<span class="ml-2 px-1.5 py-0.5 bg-white/20 rounded text-[10px]">${{modelInfo}}</span>` : '';
-            senderLabel.innerHTML = (sender === 'user' ? USER_NAME : AGENT_NAME) + modelBadge;
-            bubble.appendChild(senderLabel);
-            
-            const content = document.createElement('div');
-            content.className = 'markdown-content text-sm';
-            
-            if (sender === 'user') {{
-                // Plain text for user
-                content.innerHTML = escapeHtml(text).replace(/\\n/g, '<br>');
-            }} else {{
-                // Markdown for assistant
-                // Intercept the file write placeholder and style it nicely
-                const formattedText = text.replace(
-                    /\*\[Arquivo gravado\]\*/g,
-                    '<div class="my-2 inline-flex items-center gap-2 px-3 py-1.5 bg-emerald-50 text-emerald-700 rounded-lg border border-emerald-100 text-xs font-medium"><i class="fas fa-file-check"></i> Arquivo Salvo</div>'
-                );
-                content.innerHTML = marked.parse(formattedText);
-            }}
-            
-            bubble.appendChild(content);
-            div.appendChild(bubble);
-            chatMessages.appendChild(div);
-            
-            // Only auto-scroll if user is near bottom (within 100px)
-            const isNearBottom = chatMessages.scrollHeight - chatMessages.scrollTop - chatMessages.clientHeight < 100;
-            if (isNearBottom) {{
-                chatMessages.scrollTop = chatMessages.scrollHeight;
-            }}
-            
-            // Apply syntax highlighting
-            if (sender === 'assistant') {{
-                content.querySelectorAll('pre code').forEach((block) => {{
-                    hljs.highlightElement(block);
-                }});
-            }}
-            
-            messageCount++;
-            msgCount.textContent = messageCount;
-        }}
-        
-        // Toast notification system
-        function showToast(message, type = 'info') {{
-            // Remove existing toast
-            const existing = document.getElementById('toast-notification');
-            if (existing) existing.remove();
-            
-            const colors = {{
-                'success': 'bg-green-500',
-                'error': 'bg-red-500',
-                'warning': 'bg-yellow-500',
-                'info': 'bg-blue-500'
-            }};
-            
-            const icons = {{
-                'success': 'fa-check-circle',
-                'error': 'fa-exclamation-circle',
-                'warning': 'fa-exclamation-triangle',
-                'info': 'fa-info-circle'
-            }};
-            
-            const toast = document.createElement('div');
-            toast.id = 'toast-notification';
-            toast.className = `fixed top-4 right-4 ${{colors[type]}} text-white px-4 py-3 rounded-lg shadow-lg z-50 flex items-center gap-2 text-sm animate-fade-in`;
-            toast.style.animation = 'fadeIn 0.3s ease-out';
-            toast.innerHTML = `
-                <i class="fas ${{icons[type]}}"></i>
-                <span>${{message}}</span>
-            `;
-            
-            document.body.appendChild(toast);
-            
-            // Auto remove after 3 seconds
-            setTimeout(() => {{
-                toast.style.animation = 'fadeOut 0.3s ease-out';
-                setTimeout(() => toast.remove(), 300);
-            }}, 3000);
-        }}
-        
-        // Button feedback utilities
-        function setButtonLoading(btn, text = 'Loading...') {{
-            btn.dataset.originalHtml = btn.innerHTML;
-            btn.dataset.originalClass = btn.className;
-            btn.innerHTML = `<i class="fas fa-circle-notch fa-spin mr-1"></i>${{text}}`;
-            btn.disabled = true;
-            btn.classList.add('opacity-75', 'cursor-not-allowed');
-        }}
-        
-        function setButtonSuccess(btn, text = 'Saved!') {{
-            btn.innerHTML = `<i class="fas fa-check mr-1"></i>${{text}}`;
-            btn.classList.remove('btn-primary', 'btn-secondary', 'bg-gray-700', 'bg-blue-600');
-            btn.classList.add('bg-green-500', 'text-white');
-            
-            // Flash effect
-            btn.style.boxShadow = '0 0 15px rgba(34, 197, 94, 0.5)';
-            setTimeout(() => {{
-                btn.style.boxShadow = '';
-                restoreButton(btn);
-            }}, 1500);
-        }}
-        
-        function setButtonError(btn, text = 'Failed') {{
-            btn.innerHTML = `<i class="fas fa-exclamation-circle mr-1"></i>${{text}}`;
-            btn.classList.remove('btn-primary', 'btn-secondary', 'bg-gray-700', 'bg-blue-600');
-            btn.classList.add('bg-red-500', 'text-white');
-            
-            setTimeout(() => restoreButton(btn), 2000);
-        }}
-        
-        function restoreButton(btn) {{
-            if (btn.dataset.originalHtml) {{
-                btn.innerHTML = btn.dataset.originalHtml;
-                btn.className = btn.dataset.originalClass || btn.className;
-                btn.disabled = false;
-                btn.classList.remove('opacity-75', 'cursor-not-allowed');
-            }}
-        }}
-        
-        function escapeHtml(text) {{
-            const div = document.createElement('div');
-            div.textContent = text;
-            return div.innerHTML;
-        }}
-        
-        // ===== SIDEBAR TOGGLE =====
-        let leftSidebarCollapsed = false;
-        let rightSidebarCollapsed = false;
-        
-        function toggleSidebar(side) {{
-            const leftSidebar = document.getElementById('left-sidebar');
-            const rightSidebar = document.getElementById('right-sidebar');
-            const leftToggle = document.getElementById('left-sidebar-toggle');
-            const rightToggle = document.getElementById('right-sidebar-toggle');
-            
-            if (side === 'left') {{
-                leftSidebarCollapsed = !leftSidebarCollapsed;
-                if (leftSidebarCollapsed) {{
-                    leftSidebar.style.width = '0';
-                    leftSidebar.style.minWidth = '0';
-                    leftSidebar.style.overflow = 'hidden';
-                    leftSidebar.style.opacity = '0';
-                    if (leftToggle) leftToggle.style.display = 'flex';
-                }} else {{
-                    leftSidebar.style.width = '16rem'; // w-64
-                    leftSidebar.style.minWidth = '16rem';
-                    leftSidebar.style.overflow = '';
-                    leftSidebar.style.opacity = '1';
-                    if (leftToggle) leftToggle.style.display = 'none';
-                }}
-            }} else if (side === 'right') {{
-                rightSidebarCollapsed = !rightSidebarCollapsed;
-                if (rightSidebarCollapsed) {{
-                    rightSidebar.style.width = '0';
-                    rightSidebar.style.minWidth = '0';
-                    rightSidebar.style.overflow = 'hidden';
-                    rightSidebar.style.opacity = '0';
-                    if (rightToggle) rightToggle.style.display = 'flex';
-                }} else {{
-                    rightSidebar.style.width = '24rem'; // w-96
-                    rightSidebar.style.minWidth = '24rem';
-                    rightSidebar.style.overflow = '';
-                    rightSidebar.style.opacity = '1';
-                    if (rightToggle) rightToggle.style.display = 'none';
-                }}
-            }}
-        }}
-        
-        // ===== TAB SYSTEM =====
-        function switchTab(tabName) {{
-            // Hide all tab contents
-            document.getElementById('tab-content-chat').classList.add('hidden');
-            document.getElementById('tab-content-graph').classList.add('hidden');
-            document.getElementById('tab-content-episodic').classList.add('hidden');
-            
-            // Show selected tab
-            document.getElementById('tab-content-' + tabName).classList.remove('hidden');
-            
-            // Update tab buttons
-            const tabs = ['chat', 'graph', 'episodic'];
-            tabs.forEach(t => {{
-                const btn = document.getElementById('tab-' + t);
-                let classes = '';
-                
-                if (t === tabName) {{
-                    classes = 'px-2 sm:px-4 py-1.5 rounded-md text-sm font-medium bg-white text-gray-900 shadow-sm transition-all';
-                }} else {{
-                    classes = 'px-2 sm:px-4 py-1.5 rounded-md text-sm font-medium text-gray-600 hover:text-gray-900 transition-all';
-                }}
-                
-                if (t === 'episodic') {{
-                    classes = 'hidden ' + classes;
-                }}
-                
-                btn.className = classes;
-            }});
-            
-            // Refresh iframes when switching to them and sync theme
-            const currentTheme = localStorage.getItem(THEME_KEY) || DEFAULT_THEME;
-            if (tabName === 'graph') {{
-                const iframe = document.getElementById('iframe-graph');
-                if (iframe && iframe.contentWindow) {{
-                    iframe.contentWindow.location.reload();
-                    // Send theme after a short delay to ensure iframe is loaded
-                    setTimeout(() => syncThemeWithIframes(currentTheme), 500);
-                }}
-            }} else if (tabName === 'episodic') {{
-                const iframe = document.getElementById('iframe-episodic');
-                if (iframe && iframe.contentWindow) {{
-                    iframe.contentWindow.location.reload();
-                    setTimeout(() => syncThemeWithIframes(currentTheme), 500);
-                }}
-            }}
-        }}
-        
-        function openMemoryTab(type) {{
-            switchTab(type === 'graph' ? 'graph' : 'episodic');
-        }}
-        
-        // Configure marked options
-        marked.setOptions({{
-            breaks: true,
-            highlight: function(code, lang) {{
-                const language = hljs.getLanguage(lang) ? lang : 'plaintext';
-                return hljs.highlight(code, {{ language }}).value;
-            }}
-        }});
-        
-        function toggleSidebarMobile(side) {{
-            const sidebar = document.getElementById(side === 'left' ? 'left-sidebar' : 'right-sidebar');
-            const overlay = document.getElementById('sidebar-overlay');
-            sidebar.classList.toggle('active');
-            overlay.classList.toggle('active');
-        }}
-        
-        function closeAllSidebars() {{
-            document.getElementById('left-sidebar').classList.remove('active');
-            document.getElementById('right-sidebar').classList.remove('active');
-            document.getElementById('sidebar-overlay').classList.remove('active');
-        }}
-
-        // Service Worker Registration for PWA
-        if ('serviceWorker' in navigator) {{
-            window.addEventListener('load', () => {{
-                navigator.serviceWorker.register('/sw.js')
-                    .then(reg => console.log('SW Registered!', reg))
-                    .catch(err => console.log('SW Fail:', err));
-            }});
-        }}
-        // File attachment state (declared before functions that use it)
-        let currentAttachment = null;
-        
-        function setSendButtonState(sending) {{
-            isSending = sending;
-            const sendIcon = document.getElementById('send-icon');
-            const stopIcon = document.getElementById('stop-icon');
-            
-            if (sending) {{
-                sendBtn.classList.remove('btn-primary');
-                sendBtn.classList.add('btn-destructive');
-                sendIcon.classList.add('hidden');
-                stopIcon.classList.remove('hidden');
-                messageInput.placeholder = 'Sending... (Click stop to cancel)';
-            }} else {{
-                sendBtn.classList.add('btn-primary');
-                sendBtn.classList.remove('btn-destructive');
-                sendIcon.classList.remove('hidden');
-                stopIcon.classList.add('hidden');
-                messageInput.placeholder = 'Type your message... (Cmd/Ctrl+Enter to send)';
-            }}
-        }}
-        
-        function stopMessage() {{
-            if (currentRequestController) {{
-                currentRequestController.abort();
-                currentRequestController = null;
-            }}
-            typingIndicator.classList.add('hidden');
-            setSendButtonState(false);
-            addMessage('⏹️ Message stopped by user.', 'assistant');
-        }}
-        
-        async function sendMessage() {{
-            console.log('sendMessage called');
-            const text = messageInput.value.trim();
-            console.log('Text:', text);
-            
-            // Allow sending if there's text OR file attachment
-            if (!text && !currentAttachment) return;
-            
-            // Create abort controller for this request
-            currentRequestController = new AbortController();
-            
-            // Build message content
-            let fullMessage = text;
-            if (currentAttachment) {{
-                const fileContext = String.fromCharCode(10) + String.fromCharCode(10) + 
-                    '[Attached file: ' + currentAttachment.filename + ']' + 
-                    String.fromCharCode(10) + '```' + 
-                    String.fromCharCode(10) + 
-                    currentAttachment.content.substring(0, 8000) + 
-                    String.fromCharCode(10) + '```';
-                fullMessage = text ? text + fileContext : fileContext;
-                
-                // Show file in message
-                const attachmentIndicator = '[📎 ' + currentAttachment.filename + ']';
-                const messageWithAttachment = text ? text + String.fromCharCode(10) + String.fromCharCode(10) + attachmentIndicator : attachmentIndicator;
-                addMessage(messageWithAttachment, 'user');
-            }} else {{
-                addMessage(text, 'user');
-            }}
-            
-            messageInput.value = '';
-            setSendButtonState(true);
-            typingIndicator.classList.remove('hidden');
-            
-            // Clear attachment after sending
-            clearFileAttachment();
-            
-            try {{
-                // Use selected model from dropdown (or current settings as fallback)
-                let provider = currentChatProvider || currentSettings?.provider || 'kimi';
-                let model = currentChatModel || currentSettings?.model || 'kimi-k2-0711';
-                
-                const response = await fetch('/api/chat', {{
-                    method: 'POST',
-                    headers: {{ 'Content-Type': 'application/json' }},
-                    body: JSON.stringify({{ 
-                        message: fullMessage,
-                        provider: provider,
-                        model: model
-                    }}),
-                    signal: currentRequestController.signal
-                }});
-                
-                typingIndicator.classList.add('hidden');
-                
-                const data = await response.json();
-                if (data.response) {{
-                    const modelInfo = data.model_used ? `${{data.provider}}/${{data.model_used}}` : null;
-                    addMessage(data.response, 'assistant', modelInfo);
-                    
-                    // Context facts refresh disabled (section removed from UI)
-                }} else if (data.error) {{
-                    addMessage('Error: ' + data.error, 'assistant');
-                    updateConnectionStatus('error');
-                }}
-            }} catch (error) {{
-                typingIndicator.classList.add('hidden');
-                if (error.name === 'AbortError') {{
-                    // Request was cancelled - message already shown by stopMessage
-                }} else {{
-                    addMessage('Connection error. Please try again.', 'assistant');
-                    updateConnectionStatus('error');
-                }}
-            }} finally {{
-                setSendButtonState(false);
-                currentRequestController = null;
-                messageInput.focus();
-            }}
-        }}
-        
-        async function checkHealth() {{
-            console.log('checkHealth called');
-            try {{
-                const response = await fetch('/health');
-                const data = await response.json();
-                
-                if (data.kimi_agent_status === 'ok') {{
-                    updateConnectionStatus('connected');
-                    document.getElementById('status-kimi').className = 'status-badge online';
-                    document.getElementById('status-kimi').innerHTML = '<i class="fas fa-circle text-xs"></i> Online';
-                }} else {{
-                    updateConnectionStatus('error');
-                    document.getElementById('status-kimi').className = 'status-badge offline';
-                    document.getElementById('status-kimi').innerHTML = '<i class="fas fa-circle text-xs"></i> Offline';
-                }}
-            }} catch (error) {{
-                updateConnectionStatus('error');
-                document.getElementById('status-kimi').className = 'status-badge offline';
-                document.getElementById('status-kimi').innerHTML = '<i class="fas fa-circle text-xs"></i> Offline';
-            }}
-        }}
-        
-        function updateConnectionStatus(status) {{
-            if (status === 'connected') {{
-                connectionStatus.className = 'status-badge online';
-                connectionStatus.innerHTML = '<i class="fas fa-circle text-xs"></i> Connected';
-            }} else if (status === 'error') {{
-                connectionStatus.className = 'status-badge offline';
-                connectionStatus.innerHTML = '<i class="fas fa-circle text-xs"></i> Error';
-            }}
-        }}
-        
-        // Store messages for compaction
-        let sessionMessages = [];
-        
-        async function handleFileSelect(event) {{
-            const file = event.target.files[0];
-            if (!file) return;
-            
-            // Check file size (10MB max)
-            if (file.size > 10 * 1024 * 1024) {{
-                alert('File too large. Max size: 10MB');
-                return;
-            }}
-            
-            // Upload file
-            const formData = new FormData();
-            formData.append('file', file);
-            
-            try {{
-                const response = await fetch('/api/upload', {{
-                    method: 'POST',
-                    body: formData
-                }});
-                
-                const data = await response.json();
-                
-                if (data.error) {{
-                    alert('Upload error: ' + data.error);
-                    return;
-                }}
-                
-                // Store attachment
-                currentAttachment = {{
-                    filename: data.filename,
-                    content: data.content,
-                    preview: data.preview,
-                    type: data.type
-                }};
-                
-                // Show attachment preview
-                document.getElementById('file-attachment').classList.remove('hidden');
-                document.getElementById('file-name').textContent = data.filename;
-                document.getElementById('file-size').textContent = `(${{Math.round(data.size / 1024)}}KB)`;
-                document.getElementById('file-preview').textContent = data.preview;
-                
-            }} catch (error) {{
-                console.error('Upload error:', error);
-                alert('Failed to upload file');
-            }}
-        }}
-        
-        function clearFileAttachment() {{
-            currentAttachment = null;
-            document.getElementById('file-attachment').classList.add('hidden');
-            document.getElementById('file-input').value = '';
-        }}
-        
-        async function compactContext() {{
-            console.log('compactContext called');
-            
-            if (sessionMessages.length === 0) {{
-                alert('No messages to compact yet. Start a conversation first!');
-                return;
-            }}
-            
-            if (!confirm('Compact context? This will extract important information and save it to memory.')) {{
-                return;
-            }}
-            
-            try {{
-                const response = await fetch('/api/compact', {{
-                    method: 'POST',
-                    headers: {{ 'Content-Type': 'application/json' }}
-                }});
-                
-                const data = await response.json();
-                
-                if (data.error) {{
-                    alert('Error: ' + data.error);
-                }} else {{
-                    // Clear local session
-                    sessionMessages = [];
-                    
-                    // Show success message
-                    const factsList = data.facts ? data.facts.map(f => "• " + f).join(String.fromCharCode(10)) : "None";
-                    const msg = "Context compacted!" + String.fromCharCode(10) + String.fromCharCode(10) +
-                          "Messages processed: " + data.messages_processed + String.fromCharCode(10) +
-                          "Facts extracted: " + data.facts_extracted + String.fromCharCode(10) + String.fromCharCode(10) +
-                          "Saved facts:";
-                    alert(msg);
-                    if (factsList !== "None") alert(factsList);
-                    
-                    // Reset the chat visually
-                    resetSession();
-                }}
-            }} catch (error) {{
-                console.error('Compact error:', error);
-                alert('Failed to compact context. Check console for details.');
-            }}
-        }}
-        
-        function resetSession() {{
-            if (confirm('Reset session? This will clear the conversation history.')) {{
-                chatMessages.innerHTML = `
-                    <div class="text-center py-12">
-                        <div class="w-16 h-16 mx-auto mb-4 rounded-2xl bg-gradient-to-br from-gray-700 to-gray-500 flex items-center justify-center text-white text-2xl">
-                            <i class="fas fa-wand-magic-sparkles"></i>
-                        </div>
-                        <h2 class="text-xl font-semibold text-gray-900 mb-2">Session Reset</h2>
-                        <p class="text-gray-500">Start a new conversation.</p>
-                    </div>
-                `;
-                messageCount = 0;
-                msgCount.textContent = 0;
-                sessionMessages = [];
-                
-                // Clear important messages widget
-                const topImportantEl = document.getElementById('ca-top-important');
-                if (topImportantEl) {{
-                    topImportantEl.innerHTML = '<div class="text-gray-400">No messages yet</div>';
-                }}
-                
-                // Reset context analyzer status
-                const caStatus = document.getElementById('ca-status');
-                const caTokens = document.getElementById('ca-tokens');
-                const caProgress = document.getElementById('ca-progress');
-                if (caStatus) caStatus.textContent = 'Idle';
-                if (caTokens) caTokens.textContent = '0 / 200,000 (0%)';
-                if (caProgress) caProgress.style.width = '0%';
-            }}
-        }}
-        
-        // ============================================================================
-        // SETTINGS MANAGEMENT
-        // ============================================================================
-        
-        let currentSettings = {{}};
-        let providerModels = {{}};
-        let allProviders = {{}};
-        let providerAvailability = {{}};
-        let modelContextLimits = {{}};
-        let modePresets = {{}};
-        
-        async function loadSettings() {{
-            try {{
-                // Load settings
-                const settingsRes = await fetch('/api/settings');
-                currentSettings = await settingsRes.json();
-                
-                // Load providers
-                const providersRes = await fetch('/api/settings/providers');
-                const providersData = await providersRes.json();
-                providerModels = providersData.models;
-                allProviders = providersData.all_models;
-                providerAvailability = providersData.available;
-                modelContextLimits = providersData.model_context_limits || {{}};
-                modePresets = providersData.mode_presets || {{}};
-                
-                // Populate chat model selector (async)
-                await populateChatModelSelector(providersData);
-                
-                // Safely update UI elements
-                const safeSet = (id, value) => {{
-                    const el = document.getElementById(id);
-                    if (el) {{
-                        if (el.type === 'checkbox') el.checked = !!value;
-                        else el.value = value;
-                        return true;
-                    }}
-                    return false;
-                }};
-                
-                const safeText = (id, text) => {{
-                    const el = document.getElementById(id);
-                    if (el) el.textContent = text;
-                }};
-
-                const providerSelect = document.getElementById('settings-provider');
-                if (providerSelect) {{
-                    // Populate provider dropdown
-                    populateProviderDropdown(providersData.providers, providersData.available);
-                    
-                    // Show info about locked providers
-                    showProviderInfo(providersData);
-                    
-                    // Apply settings to UI
-                    providerSelect.value = currentSettings.provider;
-                    updateModelOptions();
-                    
-                    // Load provider-specific settings (custom model, base URL, etc.)
-                    await updateProviderSettings();
-                    
-                    safeSet('settings-model', currentSettings.model);
-                    safeSet('settings-temperature', currentSettings.temperature);
-                    safeText('temp-value', currentSettings.temperature);
-                    safeSet('settings-max-tokens', currentSettings.max_tokens);
-                    
-                    // Update mode buttons
-                    updateModeButtons(currentSettings.mode);
-
-                    // Ngrok settings
-                    safeSet('settings-ngrok-token', currentSettings.ngrok_authtoken || '');
-                    safeSet('settings-ngrok-oauth', currentSettings.ngrok_oauth_provider || '');
-                    safeSet('settings-ngrok-emails', currentSettings.ngrok_oauth_allow_emails || '');
-                }}
-                
-                // Always check statuses
-                updateNgrokStatusDisplay();
-                checkTelegramStatus();
-                
-            }} catch (error) {{
-                console.error('Failed to load settings:', error);
-            }}
-        }}
-        
-        async function updateNgrokStatusDisplay() {{
-            try {{
-                const res = await fetch('/api/remote/status');
-                const status = await res.json();
-                
-                const badge = document.getElementById('ngrok-status-badge');
-                const toggleBtn = document.getElementById('ngrok-toggle-btn');
-                const urlContainer = document.getElementById('ngrok-url-container');
-                const urlInput = document.getElementById('ngrok-public-url');
-                
-                if (!badge || !toggleBtn) return;
-
-                if (status.enabled) {{
-                    badge.textContent = 'Online';
-                    badge.className = 'status-badge online ml-auto';
-                    toggleBtn.textContent = 'Stop Tunnel';
-                    toggleBtn.className = 'btn btn-secondary flex-1 text-xs py-1.5';
-                    if (urlContainer) {{
-                        urlContainer.classList.remove('hidden');
-                        urlInput.value = status.url;
-                    }}
-                }} else {{
-                    badge.textContent = 'Offline';
-                    badge.className = 'status-badge offline ml-auto';
-                    toggleBtn.textContent = 'Start Tunnel';
-                    toggleBtn.className = 'btn btn-primary flex-1 text-xs py-1.5';
-                    if (urlContainer) urlContainer.classList.add('hidden');
-                }}
-            }} catch (e) {{
-                console.error("Failed to check ngrok status:", e);
-            }}
-        }}
-
-        async function toggleNgrok() {{
-            const toggleBtn = document.getElementById('ngrok-toggle-btn');
-            const authtokenField = document.getElementById('settings-ngrok-token');
-            const authtoken = authtokenField ? authtokenField.value : '';
-            
-            if (toggleBtn.textContent.includes('Start')) {{
-                if (!authtoken) {{
-                    alert("Please enter an Ngrok Authtoken first.");
-                    return;
-                }}
-                
-                // Save configs first
-                currentSettings.ngrok_authtoken = authtoken;
-                currentSettings.ngrok_oauth_provider = document.getElementById('settings-ngrok-oauth').value;
-                currentSettings.ngrok_oauth_allow_emails = document.getElementById('settings-ngrok-emails').value;
-                await saveSettingsSync();
-                
-                toggleBtn.disabled = true;
-                toggleBtn.textContent = 'Starting...';
-                
-                try {{
-                    const res = await fetch('/api/remote/start', {{ method: 'POST' }});
-                    const data = await res.json();
-                    if (data.error) throw new Error(data.error);
-                }} catch (e) {{
-                    alert("Failed to start tunnel: " + e.message);
-                }} finally {{
-                    toggleBtn.disabled = false;
-                    updateNgrokStatusDisplay();
-                }}
-            }} else {{
-                toggleBtn.disabled = true;
-                toggleBtn.textContent = 'Stopping...';
-                
-                try {{
-                    const res = await fetch('/api/remote/stop', {{ method: 'POST' }});
-                }} catch (e) {{
-                    alert("Failed to stop tunnel: " + e.message);
-                }} finally {{
-                    toggleBtn.disabled = false;
-                    updateNgrokStatusDisplay();
-                }}
-            }}
-        }}
-
-        function copyNgrokUrl() {{
-            const urlInput = document.getElementById('ngrok-public-url');
-            if (urlInput) {{
-                urlInput.select();
-                document.execCommand('copy');
-                alert("URL copied to clipboard!");
-            }}
-        }}
-
-        async function saveSettingsSync() {{
-            try {{
-                await fetch('/api/settings', {{
-                    method: 'POST',
-                    headers: {{ 'Content-Type': 'application/json' }},
-                    body: JSON.stringify(currentSettings)
-                }});
-            }} catch (e) {{
-                console.error("Failed to save settings:", e);
-            }}
-        }}
-
-        function populateProviderDropdown(enabledProviders, availability) {{
-            const select = document.getElementById('settings-provider');
-            if (!select) return;
-            
-            const providerNames = {{
-                'kimi': 'Kimi (Moonshot)',
-                'openrouter': 'OpenRouter',
-                'anthropic': 'Anthropic (Claude)',
-                'openai': 'OpenAI',
-                'google': 'Google (Gemini)',
-                'custom': 'Custom (Local)'
-            }};
-            
-            let html = '';
-            
-            // Enabled providers
-            enabledProviders.forEach(p => {{
-                html += `<option value="${{p}}">${{providerNames[p]}} ✅</option>`;
-            }});
-            
-            // Disabled providers (grayed out)
-            Object.keys(availability).forEach(p => {{
-                if (!availability[p]) {{
-                    html += `<option value="${{p}}" disabled>${{providerNames[p]}} 🔒 (add API key)</option>`;
-                }}
-            }});
-            
-            select.innerHTML = html;
-        }}
-        
-        let currentChatProvider = null;
-        let currentChatModel = null;
-        
-        async function populateChatModelSelector(providersData) {{
-            const container = document.getElementById('model-options');
-            const label = document.getElementById('model-label');
-            const icon = document.getElementById('model-icon');
-            if (!container) return;
-            
-            const enabledProviders = providersData.providers || [];
-            const allModels = providersData.all_models || {{}};
-            const currentModel = currentSettings?.model || 'kimi-k2-0711';
-            const currentProvider = currentSettings?.provider || 'kimi';
-            
-            // Set current chat provider/model
-            currentChatProvider = currentProvider;
-            currentChatModel = currentModel;
-            
-            let html = '';
-            
-            // Fetch custom provider model if needed
-            let customModel = null;
-            if (enabledProviders.includes('custom')) {{
-                try {{
-                    const customRes = await fetch('/api/settings/provider/custom');
-                    const customData = await customRes.json();
-                    customModel = customData.configured_model || 'custom-model';
-                }} catch (e) {{
-                    customModel = currentModel || 'custom-model';
-                }}
-            }}
-            
-            // Build options for each enabled provider
-            enabledProviders.forEach(provider => {{
-                const models = allModels[provider] || [];
-                const providerLabel = provider.charAt(0).toUpperCase() + provider.slice(1);
-                
-                if (models.length > 0) {{
-                    models.forEach(model => {{
-                        const isSelected = (provider === currentProvider && model === currentModel);
-                        const shortName = model.split('/').pop();
-                        const providerColor = provider === 'kimi' ? 'bg-orange-500' : 
-                                            provider === 'custom' ? 'bg-blue-500' : 
-                                            provider === 'openai' ? 'bg-green-500' : 
-                                            provider === 'anthropic' ? 'bg-orange-500' : 'bg-gray-500';
-                        
-                        html += `
-                            <button class="w-full px-3 py-2 flex items-center gap-3 hover:bg-gray-50 transition-colors text-left ${{isSelected ? 'bg-gray-100' : ''}}" 
-                                    onclick="selectModel('${{provider}}', '${{model}}', '${{shortName}}', '${{providerLabel}}')">
-                                <span class="w-2 h-2 rounded-full ${{providerColor}}"></span>
-                                <div class="flex-1">
-                                    <div class="text-sm font-medium text-gray-700">${{shortName}}</div>
-                                    <div class="text-xs text-gray-400">${{providerLabel}}</div>
-                                </div>
-                                ${{isSelected ? '<i class="fas fa-check text-orange-500 text-xs"></i>' : ''}}
-                            </button>
-                        `;
-                        
-                        if (isSelected) {{
-                            label.textContent = shortName;
-                            icon.className = `w-2 h-2 rounded-full ${{providerColor}}`;
-                        }}
-                    }});
-                }} else if (provider === 'custom') {{
-                    const modelToUse = customModel || 'custom-model';
-                    const isSelected = (provider === currentProvider);
-                    const shortName = modelToUse;
-                    
-                    html += `
-                        <button class="w-full px-3 py-2 flex items-center gap-3 hover:bg-gray-50 transition-colors text-left ${{isSelected ? 'bg-gray-100' : ''}}" 
-                                onclick="selectModel('custom', '${{modelToUse}}', '${{shortName}}', 'Custom')">
-                            <span class="w-2 h-2 rounded-full bg-blue-500"></span>
-                            <div class="flex-1">
-                                <div class="text-sm font-medium text-gray-700">${{shortName}}</div>
-                                <div class="text-xs text-gray-400">Custom</div>
-                            </div>
-                            ${{isSelected ? '<i class="fas fa-check text-orange-500 text-xs"></i>' : ''}}
-                        </button>
-                    `;
-                    
-                    if (isSelected) {{
-                        label.textContent = shortName;
-                        icon.className = 'w-2 h-2 rounded-full bg-blue-500';
-                    }}
-                }}
-            }});
-            
-            container.innerHTML = html;
-        }}
-        
-        function selectModel(provider, model, shortName, providerLabel) {{
-            currentChatProvider = provider;
-            currentChatModel = model;
-            
-            // Update button display
-            const label = document.getElementById('model-label');
-            const icon = document.getElementById('model-icon');
-            if (label) label.textContent = shortName;
-            
-            const providerColor = provider === 'kimi' ? 'bg-orange-500' : 
-                                provider === 'custom' ? 'bg-blue-500' : 
-                                provider === 'openai' ? 'bg-green-500' : 
-                                provider === 'anthropic' ? 'bg-orange-500' : 'bg-gray-500';
-            if (icon) icon.className = `w-2 h-2 rounded-full ${{providerColor}}`;
-            
-            // Update context info
-            updateModelContextInfo(provider, model);
-            
-            // Hide dropdown
-            const dropdown = document.getElementById('model-dropdown');
-            if (dropdown) dropdown.classList.add('hidden');
-            
-            // Update checkmarks in dropdown without full re-render
-            const buttons = document.querySelectorAll('#model-options button');
-            buttons.forEach(btn => {{
-                const onclick = btn.getAttribute('onclick');
-                const isSelected = onclick && onclick.includes(`'${{provider}}', '${{model}}'`);
-                
-                // Remove checkmark from all
-                const check = btn.querySelector('.fa-check');
-                if (check) check.remove();
-                btn.classList.remove('bg-gray-100');
-                
-                // Add checkmark to selected
-                if (isSelected) {{
-                    btn.classList.add('bg-gray-100');
-                    btn.innerHTML += '<i class="fas fa-check text-orange-500 text-xs ml-auto"></i>';
-                }}
-            }});
-        }}
-        
-        function toggleModelDropdown() {{
-            const dropdown = document.getElementById('model-dropdown');
-            dropdown.classList.toggle('hidden');
-        }}
-        
-        // Close dropdown when clicking outside
-        document.addEventListener('click', (e) => {{
-            const container = document.getElementById('model-selector-container');
-            const dropdown = document.getElementById('model-dropdown');
-            if (container && dropdown && !container.contains(e.target)) {{
-                dropdown.classList.add('hidden');
-            }}
-        }});
-        
-        function updateModelContextInfo(provider, model) {{
-            const infoEl = document.getElementById('model-context-info');
-            if (!infoEl) return;
-            
-            const limits = {{
-                'kimi-k2-0711': '267k',
-                'kimi-latest': '267k',
-                'claude-3-5-sonnet': '200k',
-                'gpt-4o': '128k',
-                'hermes3:8b': '8k'
-            }};
-            
-            const shortName = model.split('/').pop();
-            const limit = limits[model] || limits[shortName] || 'Unknown';
-            infoEl.textContent = `${{shortName}} · ${{limit}} ctx`;
-        }}
-        
-        function showProviderInfo(providersData) {{
-            const enabledCount = providersData.providers.length;
-            const totalCount = Object.keys(providersData.all_models).length;
-            
-            if (enabledCount < totalCount) {{
-                const infoDiv = document.getElementById('provider-info');
-                const infoText = document.getElementById('provider-info-text');
-                if (infoDiv && infoText) {{
-                    infoDiv.classList.remove('hidden');
-                    infoText.textContent = `${{enabledCount}}/${{totalCount}} providers enabled. Add API keys to .env to enable more.`;
-                }}
-            }}
-        }}
-        
-        function updateModelOptions() {{
-            const providerSelect = document.getElementById('settings-provider');
-            const modelSelect = document.getElementById('settings-model');
-            if (!providerSelect || !modelSelect) return;
-            
-            const provider = providerSelect.value;
-            const models = providerModels[provider] || [];
-            
-            if (models.length === 0) {{
-                modelSelect.innerHTML = '<option value="">No models available</option>';
-                return;
-            }}
-            
-            modelSelect.innerHTML = models.map(m => `<option value="${{m}}">${{m}}</option>`).join('');
-            
-            // Select first model as default if current not in list
-            const currentModel = currentSettings.model;
-            if (models.includes(currentModel)) {{
-                modelSelect.value = currentModel;
-            }} else {{
-                modelSelect.value = models[0];
-                // Update settings with new default model
-                currentSettings.model = models[0];
-            }}
-            
-            // Update max tokens based on new model
-            updateMaxTokensForCurrentModel();
-        }}
-        
-        // Handle provider change - update models and save
-        function setupProviderListener() {{
-            const providerSelect = document.getElementById('settings-provider');
-            if (providerSelect) {{
-                providerSelect.addEventListener('change', () => {{
-                    console.log('Provider changed to:', providerSelect.value);
-                    updateModelOptions();
-                    updateSettings();
-                }});
-            }}
-        }}
-        
-        // Handle model change - update max tokens and save settings
-        function setupModelListener() {{
-            const modelSelect = document.getElementById('settings-model');
-            if (modelSelect) {{
-                modelSelect.addEventListener('change', () => {{
-                    console.log('Model changed to:', modelSelect.value);
-                    updateMaxTokensForCurrentModel();
-                    updateSettings();
-                }});
-            }}
-        }}
-        
-        function updateTempDisplay() {{
-            const tempInput = document.getElementById('settings-temperature');
-            const tempValue = document.getElementById('temp-value');
-            if (tempInput && tempValue) {{
-                tempValue.textContent = tempInput.value;
-            }}
-        }}
-        
-        async function updateSettings() {{
-            const providerSelect = document.getElementById('settings-provider');
-            if (!providerSelect) return;
-            
-            const getVal = (id, def) => {{
-                const el = document.getElementById(id);
-                return el ? el.value : def;
-            }};
-            
-            const newSettings = {{
-                provider: providerSelect.value,
-                model: getVal('settings-model', currentSettings.model),
-                temperature: parseFloat(getVal('settings-temperature', 0.7)),
-                max_tokens: parseInt(getVal('settings-max-tokens', 100000)),
-                mode: currentSettings.mode || 'balanced',
-                auto_save: currentSettings.auto_save !== false,
-                auto_save_interval: currentSettings.auto_save_interval || 10,
-                ngrok_enabled: currentSettings.ngrok_enabled || false,
-                ngrok_authtoken: getVal('settings-ngrok-token', currentSettings.ngrok_authtoken),
-                ngrok_oauth_provider: getVal('settings-ngrok-oauth', currentSettings.ngrok_oauth_provider),
-                ngrok_oauth_allow_emails: getVal('settings-ngrok-emails', currentSettings.ngrok_oauth_allow_emails)
-            }};
-            
-            try {{
-                await fetch('/api/settings', {{
-                    method: 'POST',
-                    headers: {{ 'Content-Type': 'application/json' }},
-                    body: JSON.stringify(newSettings)
-                }});
-                currentSettings = newSettings;
-            }} catch (error) {{
-                console.error('Failed to update settings:', error);
-            }}
-        }}
-        
-        async function setMode(mode) {{
-            try {{
-                // Only update if settings elements exist in sidebar
-                const modelSelect = document.getElementById('settings-model');
-                const tempInput = document.getElementById('settings-temperature');
-                const maxTokensInput = document.getElementById('settings-max-tokens');
-                
-                if (modelSelect) {{
-                    // Calculate max tokens for current model and new mode
-                    const model = modelSelect.value;
-                    const maxTokens = calculateMaxTokens(model, mode);
-                    
-                    const res = await fetch(`/api/settings/mode/${{mode}}`, {{ method: 'POST' }});
-                    const data = await res.json();
-                    if (data.settings) {{
-                        currentSettings = data.settings;
-                        if (tempInput) tempInput.value = currentSettings.temperature;
-                        const tempValue = document.getElementById('temp-value');
-                        if (tempValue) tempValue.textContent = currentSettings.temperature;
-                        if (maxTokensInput) maxTokensInput.value = maxTokens;
-                        updateModeButtons(mode);
-                        // Update settings with new max_tokens
-                        updateSettings();
-                    }}
-                }}
-            }} catch (error) {{
-                console.error('Failed to set mode:', error);
-            }}
-        }}
-        
-        function updateModeButtons(activeMode) {{
-            ['fast', 'balanced', 'deep'].forEach(mode => {{
-                const btn = document.getElementById(`mode-${{mode}}`);
-                if (btn) {{
-                    if (mode === activeMode) {{
-                        btn.className = 'flex-1 btn btn-primary text-xs py-1.5';
-                    }} else {{
-                        btn.className = 'flex-1 btn btn-secondary text-xs py-1.5';
-                    }}
-                }}
-            }});
-        }}
-        
-        function calculateMaxTokens(model, mode) {{
-            // Get context limit for model (default 128k)
-            const contextLimit = modelContextLimits[model] || 128000;
-            // Get percentage for mode (default balanced 40%)
-            const percent = (modePresets[mode] && modePresets[mode].max_tokens_percent) || 0.40;
-            return Math.floor(contextLimit * percent);
-        }}
-        
-        function updateMaxTokensForCurrentModel() {{
-            const modelSelect = document.getElementById('settings-model');
-            const maxTokensInput = document.getElementById('settings-max-tokens');
-            if (!modelSelect || !maxTokensInput) return;
-            
-            const model = modelSelect.value;
-            const mode = currentSettings.mode || 'balanced';
-            const maxTokens = calculateMaxTokens(model, mode);
-            maxTokensInput.value = maxTokens;
-            updateSettings();
-        }}
-        
-        // ============================================================================
-        // SESSIONS MANAGEMENT
-        // ============================================================================
-        
-        async function loadSessions() {{
-            try {{
-                const res = await fetch('/api/sessions');
-                const sessions = await res.json();
-                renderSessions(sessions);
-                
-                // Auto-select first session if none selected
-                if (!currentSessionId && sessions.length > 0) {{
-                    console.log('Auto-selecting first session:', sessions[0].id);
-                    await loadSession(sessions[0].id);
-                }}
-            }} catch (error) {{
-                console.error('Failed to load sessions:', error);
-            }}
-        }}
-        
-        function renderSessions(sessions) {{
-            const container = document.getElementById('sessions-list');
-            
-            if (sessions.length === 0) {{
-                container.innerHTML = '<div class="text-sm text-gray-400 text-center py-4">No saved sessions</div>';
-                // Clear current session if no sessions exist
-                currentSessionId = '';
-                updateChatHeader(null);
-                return;
-            }}
-            
-            container.innerHTML = sessions.map(s => {{
-                const isCurrent = s.id === (currentSessionId || '');
-                const date = new Date(s.updated_at).toLocaleDateString();
-                const templateBadge = s.template && s.template !== 'default' 
-                    ? `<span class="ml-1 px-1.5 py-0.5 bg-gray-200 text-gray-600 rounded text-[10px]">${{s.template}}</span>` 
-                    : '';
-                // context_limit removed - no message limit
-                const contextBadge = '';
-                return `
-                    <div class="group p-2 rounded-lg border ${{isCurrent ? 'border-l-2 border-orange-400 bg-gray-100' : 'border-gray-200 hover:border-gray-300'}} cursor-pointer transition-colors"
-                         onclick="loadSession('${{s.id}}')">
-                        <div class="flex items-center justify-between">
-                            <span class="text-sm font-medium text-gray-900 truncate flex-1">${{s.name}}${{templateBadge}}</span>
-                            ${{isCurrent ? '<i class="fas fa-check text-orange-500 text-xs"></i>' : ''}}
-                        </div>
-                        <div class="flex items-center justify-between mt-1">
-                            <span class="text-xs text-gray-500">${{s.message_count}} msgs · ${{date}}${{contextBadge}}</span>
-                            <div class="flex gap-2 opacity-0 group-hover:opacity-100 transition-opacity">
-                                <button onclick="event.stopPropagation(); renameSession('${{s.id}}', '${{s.name}}')" 
-                                        class="text-gray-400 hover:text-blue-500">
-                                    <i class="fas fa-edit text-xs"></i>
-                                </button>
-                                <button onclick="event.stopPropagation(); deleteSession('${{s.id}}')" 
-                                        class="text-gray-400 hover:text-red-500">
-                                    <i class="fas fa-trash text-xs"></i>
-                                </button>
-                            </div>
-                        </div>
-                    </div>
-                `;
-            }}).join('');
-        }}
-        
-        // Update chat header when session changes
-        function updateChatHeader(session) {{
-            const nameEl = document.getElementById('current-session-name');
-            const countEl = document.getElementById('session-message-count');
-            const templateEl = document.getElementById('current-session-template');
-            const contextEl = document.getElementById('current-session-context');
-            
-            if (!session) {{
-                // No session selected
-                if (nameEl) nameEl.textContent = 'No Session';
-                if (countEl) countEl.textContent = '0';
-                if (templateEl) templateEl.classList.add('hidden');
-                if (contextEl) contextEl.classList.add('hidden');
-            }} else {{
-                // Session selected
-                if (nameEl) nameEl.textContent = session.name || 'Untitled Session';
-                if (countEl) countEl.textContent = session.message_count || '0';
-                if (templateEl) {{
-                    if (session.template && session.template !== 'default') {{
-                        templateEl.textContent = session.template;
-                        templateEl.classList.remove('hidden');
-                    }} else {{
-                        templateEl.classList.add('hidden');
-                    }}
-                }}
-                if (contextEl) {{
-                    if (session.context_limit) {{
-                        contextEl.textContent = `${{session.context_limit}} ctx`;
-                        contextEl.classList.remove('hidden');
-                    }} else {{
-                        contextEl.classList.add('hidden');
-                    }}
-                }}
-            }}
-        }}
-        
-        let currentSessionId = '';
-        
-        async function createNewSession() {{
-            // Load templates and current agent info
-            let templates = [];
-            let currentAgent = {{name: 'Agent', role: 'AI Assistant'}};
-            let providersData = {{}};
-            
-            try {{
-                const [templatesRes, providersRes] = await Promise.all([
-                    fetch('/api/templates'),
-                    fetch('/api/settings/providers')
-                ]);
-                const templatesJson = await templatesRes.json();
-                templates = templatesJson.templates || [];
-                currentAgent = templatesJson.current_agent || currentAgent;
-                providersData = await providersRes.json();
-            }} catch (e) {{
-                console.error('Could not load data:', e);
-            }}
-            
-            // Build template options
-            const templateOptions = templates.map(t => 
-                `<option value="${{t.id}}">${{t.name}} - ${{t.role}}</option>`
-            ).join('');
-            
-            // Format current agent display
-            const currentAgentDisplay = `${{currentAgent.name}} - ${{currentAgent.role}}`;
-            
-            // Build provider options
-            const providers = providersData.providers || ['kimi'];
-            const allModels = providersData.all_models || {{}};
-            const providerOptions = providers.map(p => 
-                `<option value="${{p}}">${{p.charAt(0).toUpperCase() + p.slice(1)}}</option>`
-            ).join('');
-            
-            // Create modal HTML with AI Configuration
-            const modalHtml = `
-                <div id="new-session-modal" class="fixed inset-0 bg-black/50 flex items-center justify-center z-50">
-                    <div class="bg-white rounded-lg p-6 w-[500px] max-w-full max-h-[90vh] overflow-y-auto">
-                        <h3 class="text-lg font-semibold mb-4">Create New Session</h3>
-                        
-                        <!-- Session Name -->
-                        <div class="mb-4">
-                            <label class="block text-sm text-gray-600 mb-1">Session Name</label>
-                            <input type="text" id="new-session-name" placeholder="Session name (optional)" 
-                                   class="w-full px-3 py-2 border border-gray-300 rounded-lg">
-                        </div>
-                        
-                        <!-- Agent Template -->
-                        <div class="mb-4">
-                            <label class="block text-sm text-gray-600 mb-1">Agent Template</label>
-                            <select id="new-session-template" class="w-full px-3 py-2 border border-gray-300 rounded-lg">
-                                <option value="default">${{currentAgentDisplay}} (Current)</option>
-                                ${{templateOptions}}
-                            </select>
-                        </div>
-                        
-                        <div class="flex gap-3 mt-6">
-                            <button onclick="closeNewSessionModal()" class="flex-1 px-4 py-2 bg-gray-100 text-gray-700 rounded-lg hover:bg-gray-200">
-                                Cancel
-                            </button>
-                            <button onclick="submitNewSession()" class="flex-1 px-4 py-2 bg-gray-700 text-white rounded-lg hover:bg-gray-800">
-                                Create
-                            </button>
-                        </div>
-                    </div>
-                </div>
-            `;
-            
-            // Show modal
-            document.body.insertAdjacentHTML('beforeend', modalHtml);
-        }}
-        
-        function closeNewSessionModal() {{
-            const modal = document.getElementById('new-session-modal');
-            if (modal) modal.remove();
-        }}
-        
-        async function submitNewSession() {{
-            const nameInput = document.getElementById('new-session-name');
-            const templateInput = document.getElementById('new-session-template');
-            
-            const name = nameInput.value.trim() || undefined;
-            const template = templateInput.value;
-            
-            closeNewSessionModal();
-            
-            try {{
-                // Create session (uses current settings for AI config)
-                const res = await fetch('/api/sessions', {{
-                    method: 'POST',
-                    headers: {{ 'Content-Type': 'application/json' }},
-                    body: JSON.stringify({{ name, template }})
-                }});
-                const data = await res.json();
-                
-                if (data.session) {{
-                    currentSessionId = data.session.id;
-                    document.getElementById('current-session-name').textContent = data.session.name;
-                    document.getElementById('session-message-count').textContent = '0';
-                    
-                    // Update template and context display
-                    const templateEl = document.getElementById('current-session-template');
-                    const contextEl = document.getElementById('current-session-context');
-                    
-                    if (data.session.template && data.session.template !== 'default') {{
-                        templateEl.textContent = data.session.template;
-                        templateEl.classList.remove('hidden');
-                    }} else {{
-                        templateEl.classList.add('hidden');
-                    }}
-                    
-                    // context_limit removed - always hide
-                    contextEl.classList.add('hidden');
-                    
-                    // Clear chat
-                    chatMessages.innerHTML = `
-                        <div class="text-center py-12">
-                            <div class="w-16 h-16 mx-auto mb-4 rounded-2xl bg-gradient-to-br from-gray-700 to-gray-500 flex items-center justify-center text-white text-2xl">
-                                <i class="fas fa-wand-magic-sparkles"></i>
-                            </div>
-                            <h2 class="text-xl font-semibold text-gray-900 mb-2">${{data.session.name}}</h2>
-                            <p class="text-gray-500">Start a new conversation.</p>
-                            ${{data.session.template && data.session.template !== 'default' ? `<p class="text-sm text-gray-600 mt-2"><i class="fas fa-user-circle mr-1"></i>Agent: ${{data.session.template}}</p>` : ''}}
-                            <p class="text-xs text-gray-400 mt-1">No message limit</p>
-                        </div>
-                    `;
-                    messageCount = 0;
-                    msgCount.textContent = 0;
-                    sessionMessages = [];
-                    
-                    loadSessions();
-                }}
-            }} catch (error) {{
-                console.error('Failed to create session:', error);
-            }}
-        }}
-
-        async function showForkModal() {{
-            if (!currentSessionId) {{
-                alert('Please select a session to fork first.');
-                return;
-            }}
-            
-            // Load templates
-            let templates = [];
-            try {{
-                const res = await fetch('/api/templates');
-                const data = await res.json();
-                templates = data.templates || [];
-            }} catch (e) {{
-                console.error('Could not load templates:', e);
-            }}
-            
-            // Build template options
-            const templateOptions = templates.map(t => 
-                `<option value="${{t.id}}">${{t.name}} - ${{t.role}}</option>`
-            ).join('');
-            
-            // Create modal HTML
-            const modalHtml = `
-                <div id="fork-session-modal" class="fixed inset-0 bg-black/50 flex items-center justify-center z-50">
-                    <div class="bg-white rounded-lg p-6 w-[400px] max-w-full shadow-xl">
-                        <div class="flex items-center gap-3 mb-2">
-                            <div class="w-8 h-8 rounded-full bg-gray-200 text-gray-600 flex items-center justify-center">
-                                <i class="fas fa-code-branch"></i>
-                            </div>
-                            <h3 class="text-lg font-semibold text-gray-900">Fork Context to Agent</h3>
-                        </div>
-                        <p class="text-sm text-gray-500 mb-6">Branch this session's history into a new space where the selected Agent will continue the work.</p>
-                        
-                        <!-- Agent Template -->
-                        <div class="mb-6">
-                            <label class="block text-sm font-medium text-gray-700 mb-1">Target Agent Template</label>
-                            <select id="fork-session-template" class="w-full px-3 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-gray-400 focus:border-gray-400 outline-none">
-                                <option value="default">Default Assistant</option>
-                                ${{templateOptions}}
-                            </select>
-                        </div>
-                        
-                        <!-- Actions -->
-                        <div class="flex justify-end gap-3 mt-6">
-                            <button onclick="closeForkModal()" class="px-4 py-2 text-sm text-gray-600 hover:text-gray-900 font-medium">Cancel</button>
-                            <button onclick="submitForkSession()" class="px-4 py-2 text-sm bg-gray-700 text-white rounded-lg hover:bg-gray-800 font-medium transition-colors shadow-sm">
-                                Create Fork
-                            </button>
-                        </div>
-                    </div>
-                </div>
-            `;
-            
-            document.body.insertAdjacentHTML('beforeend', modalHtml);
-        }}
-        
-        function closeForkModal() {{
-            const modal = document.getElementById('fork-session-modal');
-            if (modal) modal.remove();
-        }}
-        
-        async function submitForkSession() {{
-            const templateInput = document.getElementById('fork-session-template');
-            const template = templateInput.value;
-            
-            closeForkModal();
-            
-            try {{
-                const res = await fetch('/api/sessions/' + currentSessionId + '/fork', {{
-                    method: 'POST',
-                    headers: {{ 'Content-Type': 'application/json' }},
-                    body: JSON.stringify({{ template }})
-                }});
-                const data = await res.json();
-                
-                if (data.session) {{
-                    currentSessionId = data.session.id;
-                    document.getElementById('current-session-name').textContent = data.session.name;
-                    document.getElementById('session-message-count').textContent = data.session.message_count;
-                    
-                    // Update template and context display
-                    const templateEl = document.getElementById('current-session-template');
-                    
-                    if (data.session.template && data.session.template !== 'default') {{
-                        templateEl.textContent = data.session.template;
-                        templateEl.classList.remove('hidden');
-                    }} else {{
-                        templateEl.classList.add('hidden');
-                    }}
-                    
-                    // Render messages locally
-                    sessionMessages = data.session.messages || [];
-                    messageCount = sessionMessages.length;
-                    msgCount.textContent = messageCount;
-                    
-                    chatMessages.innerHTML = '';
-                    sessionMessages.forEach(m => {{
-                        const content = m.content || m.text;
-                        const role = (m.role === 'user' || m.sender === 'user') ? 'user' : 'bot';
-                        if(m.role !== 'system') {{
-                            addMessage(content, role);
-                        }} else {{
-                            // Check if it's an internal command response that should be hidden
-                            if (content.startsWith('[SYSTEM:')) {{
-                                // Do not render internal file I/O context directly to user
-                                return;
-                            }}
-                            // Otherwise, render system notification bubble natively
-                            const systemDiv = document.createElement('div');
-                            systemDiv.className = 'flex justify-center my-4';
-                            systemDiv.innerHTML = `<div class="bg-gray-100 text-gray-700 px-4 py-2 rounded-full text-xs font-medium border border-gray-200">${{content}}</div>`;
-                            chatMessages.appendChild(systemDiv);
-                        }}
-                    }});
-                    
-                    loadSessions();
-                }}
-            }} catch (error) {{
-                console.error('Failed to fork session:', error);
-                alert('Failed to fork session: ' + error.message);
-            }}
-        }}
-
-        async function loadSession(sessionId) {{
-            try {{
-                const res = await fetch(`/api/sessions/${{sessionId}}/load`, {{ method: 'POST' }});
-                const data = await res.json();
-                
-                if (data.session) {{
-                    currentSessionId = data.session.id;
-                    document.getElementById('current-session-name').textContent = data.session.name;
-                    document.getElementById('session-message-count').textContent = data.session.message_count;
-                    
-                    // Update template and context display
-                    const templateEl = document.getElementById('current-session-template');
-                    const contextEl = document.getElementById('current-session-context');
-                    
-                    if (data.session.template && data.session.template !== 'default') {{
-                        templateEl.textContent = data.session.template;
-                        templateEl.classList.remove('hidden');
-                    }} else {{
-                        templateEl.classList.add('hidden');
-                    }}
-                    
-                    if (data.session.context_limit) {{
-                        contextEl.textContent = `${{data.session.context_limit}} ctx`;
-                        contextEl.classList.remove('hidden');
-                    }} else {{
-                        contextEl.classList.add('hidden');
-                    }}
-                    
-                    // Load messages
-                    sessionMessages = data.messages || [];
-                    messageCount = sessionMessages.length;
-                    msgCount.textContent = messageCount;
-                    
-                    // Render messages
-                    chatMessages.innerHTML = '';
-                    sessionMessages.forEach(m => {{
-                        const content = m.content || m.text;
-                        const role = (m.role === 'user' || m.sender === 'user') ? 'user' : 'bot';
-                        if(m.role !== 'system') {{
-                            addMessage(content, role);
-                        }} else {{
-                            // Check if it's an internal command response that should be hidden
-                            if (content.startsWith('[SYSTEM:')) {{
-                                // Do not render internal file I/O context directly to user
-                                return;
-                            }}
-                            // Otherwise, render system notification bubble natively
-                            const systemDiv = document.createElement('div');
-                            systemDiv.className = 'flex justify-center my-4';
-                            systemDiv.innerHTML = `<div class="bg-gray-100 text-gray-700 px-4 py-2 rounded-full text-xs font-medium border border-gray-200">${{content}}</div>`;
-                            chatMessages.appendChild(systemDiv);
-                        }}
-                    }});
-                    
-                    // Context facts loading disabled
-                    
-                    // Refresh semantic memory for this session
-                    loadSemanticMemory();
-                    
-                    loadSessions();
-                }}
-            }} catch (error) {{
-                console.error('Failed to load session:', error);
-            }}
-        }}
-        
-        async function renameSession(sessionId, currentName) {{
-            const newName = prompt('New session name:', currentName);
-            if (newName === null || newName.trim() === '' || newName === currentName) return;
-            
-            try {{
-                const res = await fetch(`/api/sessions/${{sessionId}}/rename`, {{
-                    method: 'POST',
-                    headers: {{ 'Content-Type': 'application/json' }},
-                    body: JSON.stringify({{ name: newName.trim() }})
-                }});
-                
-                if (res.ok) {{
-                    // Update current session name if it's the same session
-                    if (sessionId === currentSessionId) {{
-                        document.getElementById('current-session-name').textContent = newName.trim();
-                    }}
-                    loadSessions();
-                }} else {{
-                    alert('Failed to rename session');
-                }}
-            }} catch (error) {{
-                console.error('Failed to rename session:', error);
-                alert('Failed to rename session');
-            }}
-        }}
-        
-        async function deleteSession(sessionId) {{
-            if (!confirm('Delete this session?')) return;
-            
-            try {{
-                await fetch(`/api/sessions/${{sessionId}}`, {{ method: 'DELETE' }});
-                loadSessions();
-            }} catch (error) {{
-                console.error('Failed to delete session:', error);
-            }}
-        }}
-        
-        async function saveCurrentSession() {{
-            try {{
-                // Current session is auto-saved, but we can trigger a manual save
-                const res = await fetch('/api/session/current');
-                const data = await res.json();
-                if (data.id) {{
-                    alert('Session saved!');
-                    loadSessions();
-                }}
-            }} catch (error) {{
-                console.error('Failed to save session:', error);
-            }}
-        }}
-        
-        // ============================================================================
-        // PROVIDER SETTINGS
-        // ============================================================================
-        
-        const settingsProviderModels = {{
-            kimi: [
-                {{value: 'kimi-k2-0711', label: 'Kimi K2 (Default)'}},
-                {{value: 'kimi-latest', label: 'Kimi Latest'}},
-            ],
-            anthropic: [
-                {{value: 'claude-sonnet-4-6', label: 'Claude Sonnet 4.6 (Default)'}},
-                {{value: 'claude-opus-4-6', label: 'Claude Opus 4.6'}},
-            ],
-            openai: [
-                {{value: 'gpt-4o', label: 'GPT-4o'}},
-                {{value: 'gpt-4o-mini', label: 'GPT-4o Mini'}},
-            ],
-            google: [
-                {{value: 'gemini-2.5-flash', label: 'Gemini 2.5 Flash (Default)'}},
-                {{value: 'gemini-2.5-pro', label: 'Gemini 2.5 Pro'}},
-                {{value: 'gemini-2.5-flash-lite', label: 'Gemini 2.5 Flash Lite'}},
-                {{value: 'gemini-3-flash-preview', label: 'Gemini 3 Flash (Preview)'}},
-            ],
-            openrouter: [
-                {{value: 'anthropic/claude-sonnet-4-6', label: 'Claude Sonnet 4.6'}},
-                {{value: 'openai/gpt-4o', label: 'GPT-4o'}},
-                {{value: 'google/gemini-2.5-flash', label: 'Gemini 2.5 Flash'}},
-                {{value: 'meta-llama/llama-3.1-405b', label: 'Llama 3.1 405B'}},
-            ],
-            custom: [
-                {{value: 'custom', label: 'Custom Model'}},
-            ]
-        }};
-        
-        async function updateProviderSettings() {{
-            const provider = document.getElementById('settings-provider').value;
-            const modelSelect = document.getElementById('settings-model');
-            const customUrlContainer = document.getElementById('settings-custom-url-container');
-            const modelContainer = document.getElementById('settings-model-container');
-            const customModelContainer = document.getElementById('settings-custom-model-container');
-            const apiKeyInput = document.getElementById('settings-api-key');
-            
-            // Show/hide custom URL field
-            if (provider === 'custom' || provider === 'openrouter') {{
-                customUrlContainer.classList.remove('hidden');
-            }} else {{
-                customUrlContainer.classList.add('hidden');
-            }}
-            
-            // For custom provider: hide dropdown, show text input
-            if (provider === 'custom') {{
-                modelContainer.classList.add('hidden');
-                customModelContainer.classList.remove('hidden');
-            }} else {{
-                modelContainer.classList.remove('hidden');
-                customModelContainer.classList.add('hidden');
-            }}
-            
-            // Update model options
-            const models = settingsProviderModels[provider] || [];
-            modelSelect.innerHTML = models.map(m => 
-                `<option value="${{m.value}}">${{m.label}}</option>`
-            ).join('');
-            
-            // Load provider-specific settings from backend
-            try {{
-                const res = await fetch(`/api/settings/provider/${{provider}}`);
-                const providerData = await res.json();
-                
-                // Update API key placeholder based on whether a key exists
-                if (providerData.has_api_key) {{
-                    // Show masked key like sk-...XXXX or ••••••••••••••XXXX
-                    apiKeyInput.placeholder = providerData.masked_key + " (enter new to replace)";
-                    apiKeyInput.value = "";  // Clear any previous value
-                }} else {{
-                    apiKeyInput.placeholder = "Enter API key...";
-                    apiKeyInput.value = "";
-                }}
-                
-                // Update model selection if a model is configured for this provider
-                if (providerData.configured_model) {{
-                    if (provider === 'custom') {{
-                        document.getElementById('settings-custom-model').value = providerData.configured_model;
-                    }} else {{
-                        // Try to select the configured model, fallback to first option
-                        const modelExists = Array.from(modelSelect.options).some(o => o.value === providerData.configured_model);
-                        if (modelExists) {{
-                            modelSelect.value = providerData.configured_model;
-                        }}
-                    }}
-                }}
-                
-                // Update base URL if configured
-                if (providerData.base_url) {{
-                    document.getElementById('settings-base-url').value = providerData.base_url;
-                }} else {{
-                    document.getElementById('settings-base-url').value = '';
-                }}
-                
-            }} catch (error) {{
-                console.error('Failed to load provider settings:', error);
-                apiKeyInput.placeholder = "Enter API key...";
-                apiKeyInput.value = "";
-            }}
-        }}
-        
-        async function saveProviderSettings() {{
-            const btn = document.querySelector('button[onclick="saveProviderSettings()"]');
-            const provider = document.getElementById('settings-provider').value;
-            let apiKey = document.getElementById('settings-api-key').value;
-            let model = document.getElementById('settings-model').value;
-            const baseUrl = document.getElementById('settings-base-url').value;
-            
-            // For custom provider, get model name from text input
-            if (provider === 'custom') {{
-                model = document.getElementById('settings-custom-model').value;
-                if (!model) {{
-                    showToast('Please enter a model name', 'error');
-                    return;
-                }}
-                if (!baseUrl) {{
-                    showToast('Please enter a base URL', 'error');
-                    return;
-                }}
-            }}
-            
-            // Don't overwrite if user left the "..." placeholder
-            if (apiKey.endsWith('...')) {{
-                apiKey = null;  // Signal to backend to keep existing
-            }}
-            
-            setButtonLoading(btn, 'Saving...');
-            
-            try {{
-                const res = await fetch('/api/settings/provider', {{
-                    method: 'POST',
-                    headers: {{'Content-Type': 'application/json'}},
-                    body: JSON.stringify({{provider, api_key: apiKey, model, base_url: baseUrl}})
-                }});
-                const data = await res.json();
-                if (data.status === 'ok') {{
-                    setButtonSuccess(btn, 'Saved!');
-                    showToast('Provider settings saved!', 'success');
-                    // Reload page to update status table
-                    setTimeout(() => location.reload(), 1500);
-                }} else {{
-                    setButtonError(btn, 'Failed');
-                    showToast('Failed: ' + data.error, 'error');
-                }}
-            }} catch (error) {{
-                setButtonError(btn, 'Error');
-                showToast('Error saving settings', 'error');
-            }}
-        }}
-        
-        async function testProviderConnection() {{
-            const btn = document.querySelector('button[onclick="testProviderConnection()"]');
-            const provider = document.getElementById('settings-provider').value;
-            const apiKey = document.getElementById('settings-api-key').value;
-            const baseUrl = document.getElementById('settings-base-url').value;
-            
-            setButtonLoading(btn, 'Testing...');
-            
-            try {{
-                const res = await fetch('/api/settings/provider/test', {{
-                    method: 'POST',
-                    headers: {{'Content-Type': 'application/json'}},
-                    body: JSON.stringify({{provider, api_key: apiKey, base_url: baseUrl}})
-                }});
-                const data = await res.json();
-                if (data.status === 'ok') {{
-                    setButtonSuccess(btn, 'Connected!');
-                    showToast('✓ ' + data.message, 'success');
-                }} else if (data.status === 'warning') {{
-                    setButtonError(btn, 'Warning');
-                    showToast('⚠ ' + data.message, 'warning');
-                }} else {{
-                    setButtonError(btn, 'Failed');
-                    showToast('✗ ' + (data.error || 'Connection failed'), 'error');
-                }}
-            }} catch (error) {{
-                setButtonError(btn, 'Error');
-                showToast('✗ Connection failed: ' + error.message, 'error');
-            }}
-        }}
-        
-        // ============================================================================
-        // TELEGRAM SETTINGS
-        // ============================================================================
-        
-        function toggleTelegramSettings() {{
-            const enabled = document.getElementById('settings-telegram-enabled').checked;
-            const configDiv = document.getElementById('telegram-config');
-            if (enabled) {{
-                configDiv.classList.remove('hidden');
-            }} else {{
-                configDiv.classList.add('hidden');
-            }}
-        }}
-        
-        async function saveTelegramSettings() {{
-            const btn = document.querySelector('button[onclick="saveTelegramSettings()"]');
-            const token = document.getElementById('settings-telegram-token').value;
-            const chatIds = document.getElementById('settings-telegram-chats').value;
-            const tokenSaved = document.getElementById('settings-telegram-token').placeholder.includes('saved');
-
-            if ((!token && !tokenSaved) || !chatIds) {{
-                showToast('Please fill in both Bot Token and Chat ID', 'error');
-                return;
-            }}
-            
-            setButtonLoading(btn, 'Saving...');
-            
-            try {{
-                const res = await fetch('/api/settings/telegram', {{
-                    method: 'POST',
-                    headers: {{'Content-Type': 'application/json'}},
-                    body: JSON.stringify({{
-                        enabled: true,
-                        token,
-                        allowed_chat_ids: chatIds.split(',').map(s => s.trim()).filter(s => s)
-                    }})
-                }});
-                const data = await res.json();
-                if (data.status === 'ok') {{
-                    setButtonSuccess(btn, 'Saved!');
-                    showToast('Telegram settings saved!', 'success');
-                    updateTelegramStatusBadge('configured');
-                }} else {{
-                    setButtonError(btn, 'Failed');
-                    showToast('Failed: ' + data.error, 'error');
-                }}
-            }} catch (error) {{
-                setButtonError(btn, 'Error');
-                showToast('Error saving settings', 'error');
-            }}
-        }}
-        
-        function setTelegramButtons(isOnline) {{
-            const startBtn = document.getElementById('telegram-start-btn');
-            const stopBtn = document.getElementById('telegram-stop-btn');
-            const stateLabel = document.getElementById('telegram-container-state');
-            if (!startBtn || !stopBtn) return;
-            if (isOnline) {{
-                startBtn.style.display = 'none';
-                stopBtn.style.display = '';
-                if (stateLabel) {{ stateLabel.textContent = '🟢 Online'; stateLabel.className = 'text-xs font-medium text-green-600'; }}
-            }} else {{
-                startBtn.style.display = '';
-                stopBtn.style.display = 'none';
-                if (stateLabel) {{ stateLabel.textContent = '🔴 Offline'; stateLabel.className = 'text-xs font-medium text-red-500'; }}
-            }}
-        }}
-
-        async function startTelegramBot() {{
-            const btn = document.getElementById('telegram-start-btn');
-            const token = document.getElementById('settings-telegram-token').value;
-            const chatIds = document.getElementById('settings-telegram-chats').value;
-            const tokenSaved = document.getElementById('settings-telegram-token').placeholder.includes('saved');
-
-            // Only require token input if not already saved
-            if (!token && !tokenSaved) {{
-                showToast('Please fill in Bot Token and Chat ID first', 'error');
-                return;
-            }}
-
-            setButtonLoading(btn, 'Starting...');
-
-            try {{
-                // Only save new values if user actually typed something (not pre-filled by checkTelegramStatus)
-                const hasNewToken = !!token;  // only if user typed in the field
-                const hasNewChatIds = !!chatIds && !tokenSaved;  // chatIds only counts as new if token isn't already saved
-                if (hasNewToken || hasNewChatIds) {{
-                    await fetch('/api/settings/telegram', {{
-                        method: 'POST',
-                        headers: {{'Content-Type': 'application/json'}},
-                        body: JSON.stringify({{
-                            enabled: true,
-                            ...(hasNewToken && {{ token }}),
-                            ...(hasNewChatIds && {{ allowed_chat_ids: chatIds.split(',').map(s => s.trim()).filter(s => s) }})
-                        }})
-                    }});
-                }} else {{
-                    // Token already saved — just mark as enabled
-                    await fetch('/api/settings/telegram', {{
-                        method: 'POST',
-                        headers: {{'Content-Type': 'application/json'}},
-                        body: JSON.stringify({{ enabled: true }})
-                    }});
-                }}
-
-                // Restart the container
-                const res = await fetch('/api/settings/telegram/restart', {{
-                    method: 'POST',
-                    headers: {{'Content-Type': 'application/json'}}
-                }});
-                const data = await res.json();
-
-                if (data.status === 'ok') {{
-                    setButtonSuccess(btn, 'Online!');
-                    showToast('Bot started! ✅', 'success');
-                    updateTelegramStatusBadge('online');
-                    setTelegramButtons(true);
-                }} else {{
-                    setButtonError(btn, 'Failed');
-                    showToast('Error: ' + data.error, 'error');
-                    updateTelegramStatusBadge('error');
-                }}
-            }} catch (error) {{
-                setButtonError(btn, 'Error');
-                showToast('Failed to start bot: ' + error.message, 'error');
-            }}
-        }}
-
-        async function stopTelegramBot() {{
-            const btn = document.getElementById('telegram-stop-btn');
-            setButtonLoading(btn, 'Stopping...');
-
-            try {{
-                const res = await fetch('/api/settings/telegram/stop', {{
-                    method: 'POST',
-                    headers: {{'Content-Type': 'application/json'}}
-                }});
-                const data = await res.json();
-
-                if (data.status === 'ok') {{
-                    setButtonSuccess(btn, 'Stopped');
-                    showToast('Bot stopped ✅', 'success');
-                    updateTelegramStatusBadge('offline');
-                    setTelegramButtons(false);
-                }} else {{
-                    setButtonError(btn, 'Failed');
-                    showToast('Error: ' + data.error, 'error');
-                }}
-            }} catch (error) {{
-                setButtonError(btn, 'Error');
-                showToast('Failed to stop bot: ' + error.message, 'error');
-            }}
-        }}
-        
-        function updateTelegramStatusBadge(status, info = null) {{
-            const badge = document.getElementById('telegram-status-badge');
-            const statusDiv = document.getElementById('telegram-last-status');
-            if (!badge) return;
-            
-            // Status badge styling - standardized outline badges
-            const statusConfig = {{
-                'offline': {{ class: 'status-badge offline', text: 'Offline' }},
-                'configured': {{ class: 'status-badge warning', text: 'Saved' }},
-                'online': {{ class: 'status-badge online', text: 'Online' }},
-                'error': {{ class: 'status-badge offline', text: 'Error' }},
-                'launching': {{ class: 'status-badge warning', text: 'Launching' }}
-            }};
-            
-            const config = statusConfig[status] || statusConfig['offline'];
-            badge.className = config.class + ' ml-auto';
-            badge.textContent = config.text;
-            
-            // Show detailed status
-            if (statusDiv) {{
-                statusDiv.classList.remove('hidden');
-                if (info) {{
-                    if (typeof info === 'object') {{
-                        statusDiv.innerHTML = `<i class="fas fa-robot mr-1"></i>@${{info.username || 'bot'}} • ${{new Date().toLocaleTimeString()}}`;
-                    }} else {{
-                        statusDiv.innerHTML = `<i class="fas fa-info-circle mr-1"></i>${{info}}`;
-                    }}
-                }} else {{
-                    statusDiv.innerHTML = `<i class="fas fa-clock mr-1"></i>Last checked: ${{new Date().toLocaleTimeString()}}`;
-                }}
-            }}
-        }}
-        
-        // Check Telegram status on load
-        async function checkTelegramStatus() {{
-            try {{
-                const res = await fetch('/api/settings/telegram/status');
-                if (res.ok) {{
-                    const data = await res.json();
-                    if (data.enabled) {{
-                        document.getElementById('settings-telegram-token').placeholder = '•••••••••••• (saved)';
-                        document.getElementById('settings-telegram-chats').value = data.chat_ids?.join(', ') || '';
-                        const isOnline = data.status === 'online';
-                        updateTelegramStatusBadge(isOnline ? 'online' : 'configured', data.bot_info);
-                        setTelegramButtons(isOnline);
-                        // Sync System Status badge with real container state
-                        const sysBadge = document.getElementById('status-telegram');
-                        if (sysBadge) {{
-                            sysBadge.className = isOnline ? 'status-badge online' : 'status-badge warning';
-                            sysBadge.innerHTML = `<i class="fas fa-circle text-xs"></i> ${{isOnline ? 'Online' : 'Configured'}}`;
-                        }}
-                    }} else {{
-                        setTelegramButtons(false);
-                        // Even when disabled, show saved credentials if they exist
-                        if (data.has_token) {{
-                            document.getElementById('settings-telegram-token').placeholder = '•••••••••••• (saved)';
-                            document.getElementById('settings-telegram-chats').value = data.chat_ids?.join(', ') || '';
-                        }}
-                        const sysBadge = document.getElementById('status-telegram');
-                        if (sysBadge) {{
-                            sysBadge.className = 'status-badge offline';
-                            sysBadge.innerHTML = '<i class="fas fa-circle text-xs"></i> Offline';
-                        }}
-                    }}
-                }}
-            }} catch (e) {{
-                console.log('Telegram status check failed:', e);
-            }}
-        }}
-        
-        // ============================================================================
-        // MEMORY EXPLORER
-        // ============================================================================
-        
-        let memoryOffset = 0;
-        let memorySearchType = 'quick';
-        let currentMemoryQuery = '';
-        
-        function toggleMemoryPanel() {{
-            const panel = document.getElementById('memory-panel');
-            const icon = document.getElementById('memory-toggle-icon');
-            panel.classList.toggle('hidden');
-            icon.classList.toggle('fa-chevron-down');
-            icon.classList.toggle('fa-chevron-up');
-            
-            if (!panel.classList.contains('hidden') && memoryOffset === 0) {{
-                loadMemories();
-                loadMemoryStats();
-            }}
-        }}
-        
-        // Context Facts Panel
-        function toggleContextFactsPanel() {{
-            const panel = document.getElementById('context-facts-panel');
-            const icon = document.getElementById('context-facts-toggle-icon');
-            panel.classList.toggle('hidden');
-            icon.classList.toggle('fa-chevron-down');
-            icon.classList.toggle('fa-chevron-up');
-            
-            if (!panel.classList.contains('hidden')) {{
-                loadContextFacts();
-            }}
-        }}
-        
-        // Context Analyzer Panel
-        function toggleContextAnalyzerPanel() {{
-            const panel = document.getElementById('context-analyzer-panel');
-            const icon = document.getElementById('context-analyzer-toggle-icon');
-            panel.classList.toggle('hidden');
-            icon.classList.toggle('fa-chevron-down');
-            icon.classList.toggle('fa-chevron-up');
-        }}
-        
-        async function analyzeContext() {{
-            if (!currentSessionId) {{
-                alert('No active session');
-                return;
-            }}
-            
-            const statusEl = document.getElementById('context-analyzer-status');
-            const statsEl = document.getElementById('context-analyzer-stats');
-            const compactBtn = document.getElementById('btn-compact-context');
-            
-            // Reset UI state for new analysis
-            statusEl.classList.remove('hidden');
-            statsEl.classList.add('hidden');
-            statusEl.textContent = 'Analyzing...';
-            
-            try {{
-                const res = await fetch(`/api/sessions/${{currentSessionId}}/context/analyze`);
-                const data = await res.json();
-                
-                if (data.error) {{
-                    statusEl.textContent = 'Error: ' + data.error;
-                    return;
-                }}
-                
-                // Clear top important if not enough messages
-                const topImportantEl = document.getElementById('ca-top-important');
-                if (!data.top_important || data.top_important.length === 0 || data.message_count < 3) {{
-                    if (topImportantEl) {{
-                        topImportantEl.innerHTML = '<div class="text-gray-400">Not enough data</div>';
-                    }}
-                }}
-                
-                statusEl.classList.add('hidden');
-                statsEl.classList.remove('hidden');
-                
-                document.getElementById('ca-messages').textContent = data.message_count;
-                
-                // Update tokens display with progress bar
-                const tokenPct = Math.min(100, (data.estimated_tokens / data.max_tokens) * 100);
-                document.getElementById('ca-tokens-text').textContent = `${{data.estimated_tokens.toLocaleString()}} / ${{data.max_tokens.toLocaleString()}} (${{tokenPct.toFixed(0)}}%)`;
-                const tokenBar = document.getElementById('ca-tokens-bar');
-                tokenBar.style.width = `${{tokenPct}}%`;
-                tokenBar.className = `h-2 rounded-full transition-all ${{tokenPct > 80 ? 'bg-red-500' : tokenPct > 60 ? 'bg-orange-500' : 'bg-green-500'}}`;
-                
-                const statusSpan = document.getElementById('ca-status');
-                const expandBtn = document.getElementById('btn-expand-analyzer');
-                const resetBtn = document.getElementById('btn-reset-context');
-                
-                if (data.should_compact) {{
-                    statusSpan.textContent = 'Should Compact ⚠️';
-                    statusSpan.className = 'font-medium text-orange-600';
-                    compactBtn.classList.remove('hidden');
-                }} else {{
-                    statusSpan.textContent = 'OK ✅';
-                    statusSpan.className = 'font-medium text-green-600';
-                    compactBtn.classList.add('hidden');
-                }}
-                expandBtn.classList.remove('hidden');
-                resetBtn.classList.remove('hidden');
-                
-                // Show top important messages (reuse topImportantEl declared earlier)
-                if (data.top_important && data.top_important.length > 0) {{
-                    topImportantEl.innerHTML = data.top_important.slice(0, 3).map((item, i) => `
-                        <div class="text-gray-600 truncate" title="${{item.content}}">
-                            ${{i + 1}}. ${{item.content.substring(0, 40)}}... 
-                            <span class="text-indigo-600">(${{(item.importance_score * 100).toFixed(0)}}%)</span>
-                        </div>
-                    `).join('');
-                }} else {{
-                    topImportantEl.innerHTML = '<div class="text-gray-400">Not enough data</div>';
-                }}
-                
-            }} catch (error) {{
-                statusEl.textContent = 'Failed to analyze: ' + error.message;
-            }}
-        }}
-        
-        async function compactContextNow() {{
-            if (!currentSessionId) return;
-            
-            if (!confirm('Compact context? This will summarize older messages.')) return;
-            
-            const btn = document.getElementById('btn-compact-context');
-            btn.disabled = true;
-            btn.innerHTML = '<i class="fas fa-spinner fa-spin mr-1"></i>Compacting...';
-            
-            try {{
-                const res = await fetch(`/api/sessions/${{currentSessionId}}/context/compact`, {{
-                    method: 'POST',
-                    headers: {{'Content-Type': 'application/json'}},
-                    body: JSON.stringify({{preserve_recent: 5, force: true}})
-                }});
-                
-                const data = await res.json();
-                
-                if (data.status === 'ok') {{
-                    alert(`Context compacted!\\nReduced from ${{data.original_count}} to ${{data.new_count}} messages`);
-                    analyzeContext(); // Refresh analysis
-                    // Force clear and reload chat
-                    chatMessages.innerHTML = '';
-                    sessionMessages = [];
-                    messageCount = 0;
-                    if (currentSessionId) {{
-                        await loadSession(currentSessionId);
-                        // Scroll to bottom
-                        chatMessages.scrollTop = chatMessages.scrollHeight;
-                    }}
-                }} else {{
-                    alert('Failed: ' + (data.error || 'Unknown error'));
-                }}
-            }} catch (error) {{
-                alert('Error: ' + error.message);
-            }} finally {{
-                btn.disabled = false;
-                btn.innerHTML = '<i class="fas fa-compress-alt mr-1"></i>Compact';
-            }}
-        }}
-        
-        async function resetContextNow() {{
-            if (!currentSessionId) return;
-            
-            if (!confirm('⚠️ WARNING: This will DELETE ALL messages in this session!\\n\\nAre you sure?')) return;
-            if (!confirm('Really sure? This cannot be undone.')) return;
-            
-            const btn = document.getElementById('btn-reset-context');
-            btn.disabled = true;
-            btn.innerHTML = '<i class="fas fa-spinner fa-spin mr-1"></i>Resetting...';
-            
-            try {{
-                const res = await fetch(`/api/sessions/${{currentSessionId}}/messages`, {{
-                    method: 'DELETE'
-                }});
-                
-                if (res.ok) {{
-                    alert('Context reset! All messages deleted.');
-                    analyzeContext(); // Refresh analysis
-                    if (currentSessionId) loadSession(currentSessionId); // Refresh chat (will be empty)
-                }} else {{
-                    alert('Failed to reset context');
-                }}
-            }} catch (error) {{
-                alert('Error: ' + error.message);
-            }} finally {{
-                btn.disabled = false;
-                btn.innerHTML = '<i class="fas fa-trash-alt mr-1"></i>Reset';
-            }}
-        }}
-        
-        // Full Context Analyzer Modal
-        let currentAnalysisData = null;
-        
-        function openFullContextAnalyzer() {{
-            const modal = document.getElementById('full-analyzer-modal');
-            modal.classList.remove('hidden');
-            modal.classList.add('flex');
-            loadFullAnalysis();
-        }}
-        
-        function closeFullAnalyzer() {{
-            const modal = document.getElementById('full-analyzer-modal');
-            modal.classList.add('hidden');
-            modal.classList.remove('flex');
-        }}
-        
-        async function loadFullAnalysis() {{
-            if (!currentSessionId) return;
-            
-            const content = document.getElementById('full-analyzer-content');
-            content.innerHTML = '<div class="text-center py-8"><i class="fas fa-spinner fa-spin text-2xl text-indigo-500"></i><p class="mt-2 text-gray-500">Analyzing all messages...</p></div>';
-            
-            try {{
-                const res = await fetch(`/api/sessions/${{currentSessionId}}/context/analyze?full=true`);
-                const data = await res.json();
-                currentAnalysisData = data;
-                
-                if (data.error) {{
-                    content.innerHTML = `<div class="text-red-500">Error: ${{data.error}}</div>`;
-                    return;
-                }}
-                
-                // Stats summary
-                document.getElementById('full-analyzer-stats').innerHTML = `
-                    <span class="font-medium">${{data.message_count}}</span> messages · 
-                    <span class="font-medium">${{data.estimated_tokens}}</span> tokens · 
-                    <span class="${{data.should_compact ? 'text-orange-600' : 'text-green-600'}}">${{data.should_compact ? 'Should Compact' : 'OK'}}</span>
-                `;
-                
-                // Build full analysis view
-                let html = `
-                    <div class="grid grid-cols-2 gap-4 mb-4">
-                        <div class="p-3 bg-indigo-50 rounded-lg">
-                            <p class="text-sm font-medium text-indigo-900">Topics Detected</p>
-                            <p class="text-2xl font-bold text-indigo-600">${{data.topics?.length || 0}}</p>
-                        </div>
-                        <div class="p-3 bg-green-50 rounded-lg">
-                            <p class="text-sm font-medium text-green-900">Key Decisions</p>
-                            <p class="text-2xl font-bold text-green-600">${{data.decisions?.length || 0}}</p>
-                        </div>
-                    </div>
-                `;
-                
-                // Topics
-                if (data.topics && data.topics.length > 0) {{
-                    html += `
-                        <div class="mb-4">
-                            <h3 class="font-medium text-gray-900 mb-2">Topics</h3>
-                            <div class="flex flex-wrap gap-2">
-                                ${{data.topics.map(t => `<span class="px-2 py-1 bg-indigo-100 text-indigo-700 rounded text-sm">${{t}}</span>`).join('')}}
-                            </div>
-                        </div>
-                    `;
-                }}
-                
-                // All messages with importance scores
-                if (data.all_messages && data.all_messages.length > 0) {{
-                    const lowImportanceCount = data.all_messages.filter(m => m.importance_score < 0.6).length;
-                    html += `
-                        <div>
-                            <div class="flex items-center justify-between mb-2">
-                                <h3 class="font-medium text-gray-900">Message Importance Analysis</h3>
-                                <div class="flex gap-2">
-                                    <button onclick="selectLowImportanceMessages()" class="text-xs px-2 py-1 bg-orange-100 text-orange-700 rounded hover:bg-orange-200">
-                                        Select Low (${{lowImportanceCount}})
-                                    </button>
-                                    <button onclick="selectAllMessagesForCompact(true)" class="text-xs px-2 py-1 bg-gray-100 text-gray-700 rounded hover:bg-gray-200">All</button>
-                                    <button onclick="selectAllMessagesForCompact(false)" class="text-xs px-2 py-1 bg-gray-100 text-gray-700 rounded hover:bg-gray-200">None</button>
-                                </div>
-                            </div>
-                            <p class="text-xs text-gray-500 mb-2">
-                                <span class="text-green-600 font-medium">Green = Keep</span> • 
-                                <span class="text-orange-600 font-medium">Orange = Review</span> • 
-                                <span class="text-gray-500">Gray = Compact</span>
-                            </p>
-                            <div class="space-y-2 max-h-[50vh] overflow-y-auto" id="message-compact-list">
-                                ${{data.all_messages.map((msg, idx) => `
-                                    <div class="flex items-start gap-3 p-3 border rounded hover:bg-gray-50 ${{msg.importance_score > 0.7 ? 'bg-green-50 border-green-200' : msg.importance_score > 0.4 ? 'bg-orange-50 border-orange-200' : 'bg-gray-50 border-gray-200'}}" data-importance="${{msg.importance_score}}">
-                                        <input type="checkbox" id="msg-compact-${{idx}}" class="mt-1 compact-msg-checkbox" ${{msg.importance_score < 0.6 ? 'checked' : ''}}>
-                                        <div class="flex-1">
-                                            <div class="flex items-center gap-2 mb-1">
-                                                <span class="text-xs font-medium ${{msg.role === 'user' ? 'text-blue-600' : 'text-gray-600'}}">${{msg.role}}</span>
-                                                <span class="text-xs text-gray-400">#${{idx + 1}}</span>
-                                                <div class="flex-1"></div>
-                                                <span class="text-xs font-medium ${{msg.importance_score > 0.7 ? 'text-green-600' : msg.importance_score > 0.4 ? 'text-orange-600' : 'text-gray-500'}}">${{(msg.importance_score * 100).toFixed(0)}}%</span>
-                                            </div>
-                                            <p class="text-sm text-gray-700 line-clamp-2">${{msg.content}}</p>
-                                        </div>
-                                    </div>
-                                `).join('')}}
-                            </div>
-                        </div>
-                    `;
-                }}
-                
-                content.innerHTML = html;
-                
-            }} catch (error) {{
-                content.innerHTML = `<div class="text-red-500">Failed to load: ${{error.message}}</div>`;
-            }}
-        }}
-        
-        function selectLowImportanceMessages() {{
-            const checkboxes = document.querySelectorAll('.compact-msg-checkbox');
-            checkboxes.forEach((cb, idx) => {{
-                const row = cb.closest('[data-importance]');
-                const importance = parseFloat(row?.dataset.importance || 0);
-                cb.checked = importance < 0.6;
-            }});
-        }}
-        
-        function selectAllMessagesForCompact(select) {{
-            const checkboxes = document.querySelectorAll('.compact-msg-checkbox');
-            checkboxes.forEach(cb => cb.checked = select);
-        }}
-        
-        async function compactSelectedMessages() {{
-            if (!currentSessionId || !currentAnalysisData) return;
-            
-            // Get selected message indices
-            const checkboxes = document.querySelectorAll('.compact-msg-checkbox');
-            const selectedIndices = [];
-            checkboxes.forEach((cb, idx) => {{
-                if (cb.checked) selectedIndices.push(idx);
-            }});
-            
-            if (selectedIndices.length === 0) {{
-                alert('No messages selected for compaction');
-                return;
-            }}
-            
-            if (!confirm(`Compact ${{selectedIndices.length}} selected messages?`)) return;
-            
-            try {{
-                const res = await fetch(`/api/sessions/${{currentSessionId}}/context/compact`, {{
-                    method: 'POST',
-                    headers: {{'Content-Type': 'application/json'}},
-                    body: JSON.stringify({{message_indices: selectedIndices}})
-                }});
-                
-                const data = await res.json();
-                
-                if (data.status === 'ok') {{
-                    alert(`Compacted! ${{data.summary}}`);
-                    closeFullAnalyzer();
-                    analyzeContext();
-                }} else {{
-                    alert('Failed: ' + (data.error || 'Unknown error'));
-                }}
-            }} catch (error) {{
-                alert('Error: ' + error.message);
-            }}
-        }}
-        
-        async function loadContextFacts_disabled() {{
-            if (!currentSessionId) return;
-            
-            try {{
-                const res = await fetch(`/api/sessions/${{currentSessionId}}/facts`);
-                const data = await res.json();
-                
-                const list = document.getElementById('context-facts-list');
-                const count = document.getElementById('context-facts-count');
-                
-                count.textContent = data.count || 0;
-                
-                const manageBtn = document.getElementById('btn-manage-facts');
-                if (!data.facts || data.facts.length === 0) {{
-                    list.innerHTML = '<div class="text-gray-400 text-center py-2">No facts extracted yet. Keep chatting!</div>';
-                    if (manageBtn) manageBtn.disabled = true;
-                }} else {{
-                    if (manageBtn) manageBtn.disabled = false;
-                    list.innerHTML = data.facts.slice(-10).reverse().map(f => {{
-                        const categoryColors = {{
-                            'preference': 'bg-purple-100 text-purple-700',
-                            'decision': 'bg-green-100 text-green-700',
-                            'information': 'bg-blue-100 text-blue-700',
-                            'task': 'bg-orange-100 text-orange-700'
-                        }};
-                        const color = categoryColors[f.category] || 'bg-gray-100 text-gray-700';
-                        return `
-                            <div class="p-2 bg-white border border-gray-200 rounded">
-                                <span class="px-1.5 py-0.5 ${{color}} rounded text-[10px] uppercase">${{f.category}}</span>
-                                <p class="mt-1 text-gray-700">${{f.content}}</p>
-                            </div>
-                        `;
-                    }}).join('');
-                }}
-            }} catch (error) {{
-                console.error('Failed to load context facts:', error);
-            }}
-        }}
-        
-        // Facts Manager
-        let currentFactsData = [];
-        
-        function openFactsManager() {{
-            const modal = document.getElementById('facts-manager-modal');
-            modal.classList.remove('hidden');
-            modal.classList.add('flex');
-            loadFactsForManagement();
-        }}
-        
-        function closeFactsManager() {{
-            const modal = document.getElementById('facts-manager-modal');
-            modal.classList.add('hidden');
-            modal.classList.remove('flex');
-        }}
-        
-        async function loadFactsForManagement() {{
-            if (!currentSessionId) return;
-            
-            const list = document.getElementById('facts-manager-list');
-            list.innerHTML = '<div class="text-center py-4"><i class="fas fa-spinner fa-spin text-indigo-500"></i></div>';
-            
-            try {{
-                const res = await fetch(`/api/sessions/${{currentSessionId}}/facts`);
-                const data = await res.json();
-                currentFactsData = data.facts || [];
-                
-                if (currentFactsData.length === 0) {{
-                    list.innerHTML = '<div class="text-gray-400 text-center py-4">No facts available</div>';
-                    return;
-                }}
-                
-                const categoryColors = {{
-                    'preference': 'bg-purple-100 text-purple-700',
-                    'decision': 'bg-green-100 text-green-700',
-                    'information': 'bg-blue-100 text-blue-700',
-                    'task': 'bg-orange-100 text-orange-700'
-                }};
-                
-                list.innerHTML = currentFactsData.map((f, idx) => {{
-                    const color = categoryColors[f.category] || 'bg-gray-100 text-gray-700';
-                    return `
-                        <div class="flex items-start gap-3 p-3 border rounded hover:bg-gray-50">
-                            <input type="checkbox" id="fact-select-${{idx}}" class="mt-1 fact-checkbox" data-idx="${{idx}}">
-                            <div class="flex-1">
-                                <span class="px-1.5 py-0.5 ${{color}} rounded text-[10px] uppercase">${{f.category}}</span>
-                                <p class="mt-1 text-sm text-gray-700">${{f.content}}</p>
-                                <p class="text-xs text-gray-400 mt-1">${{new Date(f.timestamp).toLocaleDateString()}}</p>
-                            </div>
-                        </div>
-                    `;
-                }}).join('');
-            }} catch (error) {{
-                list.innerHTML = `<div class="text-red-500 text-center py-4">Error: ${{error.message}}</div>`;
-            }}
-        }}
-        
-        function selectAllFacts() {{
-            document.querySelectorAll('.fact-checkbox').forEach(cb => cb.checked = true);
-        }}
-        
-        async function storeFactsToMemory() {{
-            const selected = [];
-            document.querySelectorAll('.fact-checkbox:checked').forEach(cb => {{
-                const idx = parseInt(cb.dataset.idx);
-                if (currentFactsData[idx]) selected.push(currentFactsData[idx]);
-            }});
-            
-            if (selected.length === 0) {{
-                alert('No facts selected');
-                return;
-            }}
-            
-            if (!confirm(`Store ${{selected.length}} facts to long-term memory?`)) return;
-            
-            try {{
-                const res = await fetch(`/api/sessions/${{currentSessionId}}/facts/store`, {{
-                    method: 'POST',
-                    headers: {{'Content-Type': 'application/json'}},
-                    body: JSON.stringify({{facts: selected}})
-                }});
-                
-                const data = await res.json();
-                
-                if (data.status === 'ok') {{
-                    alert(`Stored ${{data.stored}} facts to memory!`);
-                    closeFactsManager();
-                    loadContextFacts();
-                }} else {{
-                    alert('Failed: ' + (data.error || 'Unknown error'));
-                }}
-            }} catch (error) {{
-                alert('Error: ' + error.message);
-            }}
-        }}
-        
-        // ============================================================================
-        // SEMANTIC MEMORY - What the AI Learned
-        // ============================================================================
-        
-        function toggleSemanticMemoryPanel() {{
-            const panel = document.getElementById('semantic-memory-panel');
-            const icon = document.getElementById('semantic-memory-toggle-icon');
-            panel.classList.toggle('hidden');
-            icon.classList.toggle('fa-chevron-down');
-            icon.classList.toggle('fa-chevron-up');
-            if (!panel.classList.contains('hidden')) {{
-                loadSemanticMemory();
-            }}
-        }}
-        
-        async function loadSemanticMemory() {{
-            try {{
-                // If no session selected, don't try to load
-                if (!currentSessionId) {{
-                    document.getElementById('semantic-memory-list').innerHTML = 
-                        '<div class="text-gray-400 text-center py-2">Select a session first</div>';
-                    document.getElementById('semantic-memory-count').textContent = '0';
-                    return;
-                }}
-                
-                const res = await fetch(`/api/semantic-memory?session_id=${{currentSessionId}}`);
-                const data = await res.json();
-                
-                const list = document.getElementById('semantic-memory-list');
-                const count = document.getElementById('semantic-memory-count');
-                
-                count.textContent = data.count || 0;
-                
-                if (!data.memories || data.memories.length === 0) {{
-                    list.innerHTML = '<div class="text-gray-400 text-center py-2">No memories yet. Let us work together!</div>';
-                    return;
-                }}
-                
-                // Show top 5 most important memories
-                const topMemories = data.memories.slice(0, 5);
-                
-                list.innerHTML = topMemories.map(m => {{
-                    const sentimentColor = m.sentiment >= 4 ? 'text-green-600' : 
-                                         m.sentiment >= 3 ? 'text-gray-600' : 'text-orange-600';
-                    const sentimentIcon = m.sentiment >= 4 ? 'fa-smile' : 
-                                        m.sentiment >= 3 ? 'fa-meh' : 'fa-frown';
-                    const title = m.topics?.[0] || (m.technologies?.[0] ? `Tech: ${{m.technologies[0]}}` : 'Interaction');
-                    const description = (m.summary || m.user_message || 'Interaction recorded').substring(0, 60);
-                    
-                    return `
-                        <div class="p-2 bg-white border border-gray-200 rounded hover:bg-gray-50">
-                            <div class="flex items-center gap-2 mb-1">
-                                <i class="fas ${{sentimentIcon}} ${{sentimentColor}}"></i>
-                                <span class="font-medium text-gray-700">${{title}}</span>
-                                <span class="text-xs text-gray-400 ml-auto">${{new Date(m.timestamp).toLocaleDateString()}}</span>
-                            </div>
-                            <p class="text-gray-600">${{description}}...</p>
-                            ${{m.successful ? '<p class="text-xs text-green-600 mt-1"><i class="fas fa-check mr-1"></i>Success</p>' : ''}}
-                        </div>
-                    `;
-                }}).join('');
-                
-            }} catch (error) {{
-                console.error('Failed to load semantic memory:', error);
-            }}
-        }}
-        
-        function openSemanticMemoryDetails() {{
-            const modal = document.getElementById('semantic-memory-modal');
-            modal.classList.remove('hidden');
-            modal.classList.add('flex');
-            loadSemanticMemoryDetails();
-        }}
-        
-        function closeSemanticMemoryModal() {{
-            const modal = document.getElementById('semantic-memory-modal');
-            modal.classList.add('hidden');
-            modal.classList.remove('flex');
-        }}
-        
-        async function loadSemanticMemoryDetails() {{
-            const content = document.getElementById('semantic-memory-details');
-            const summary = document.getElementById('semantic-memory-summary');
-            
-            content.innerHTML = '<div class="text-center py-8"><i class="fas fa-spinner fa-spin text-2xl text-gray-500"></i><p class="mt-2 text-gray-500">Loading memories...</p></div>';
-            
-            // Show session info in header
-            const sessionName = document.getElementById('current-session-name')?.textContent || 'Current Session';
-            
-            if (!currentSessionId) {{
-                content.innerHTML = '<div class="text-gray-400 text-center py-8">Select a session first to view memories</div>';
-                summary.textContent = '';
-                return;
-            }}
-            
-            try {{
-                const res = await fetch(`/api/semantic-memory?session_id=${{currentSessionId}}`);
-                const data = await res.json();
-                
-                if (!data.memories || data.memories.length === 0) {{
-                    content.innerHTML = '<div class="text-gray-400 text-center py-8">No memories yet. Let us work together!</div>';
-                    summary.textContent = '';
-                    return;
-                }}
-                
-                // Build summary
-                const sessionName = document.getElementById('current-session-name')?.textContent || 'Current Session';
-                summary.innerHTML = `
-                    <span class="text-gray-500">Session:</span> <span class="font-medium">${{sessionName}}</span> · 
-                    <span class="font-medium">${{data.count}}</span> memories · 
-                    <span class="font-medium text-green-600">${{data.positive_count}}</span> positive · 
-                    <span class="font-medium">${{data.topics?.length || 0}}</span> topics
-                `;
-                
-                // Build content
-                let html = '';
-                
-                // Topics Section
-                if (data.topics && data.topics.length > 0) {{
-                    html += `
-                        <div class="mb-6">
-                            <h3 class="font-semibold text-gray-700 mb-3 flex items-center gap-2">
-                                <i class="fas fa-tags"></i> Topics
-                            </h3>
-                            <div class="flex flex-wrap gap-2">
-                                ${{data.topics.map(t => `
-                                    <span class="px-2 py-1 bg-gray-100 text-gray-700 rounded-full text-xs">${{t}}</span>
-                                `).join('')}}
-                            </div>
-                        </div>
-                    `;
-                }}
-                
-                // Successful Interactions Section
-                const successful = data.memories.filter(m => m.successful);
-                if (successful.length > 0) {{
-                    html += `
-                        <div class="mb-6">
-                            <h3 class="font-semibold text-green-700 mb-3 flex items-center gap-2">
-                                <i class="fas fa-check-circle"></i> Successful Interactions
-                            </h3>
-                            <div class="space-y-2">
-                                ${{successful.slice(0, 5).map(m => `
-                                    <div class="p-3 bg-green-50 border border-green-200 rounded">
-                                        <p class="text-gray-700 text-sm">${{(m.summary || m.user_message || '').substring(0, 100)}}...</p>
-                                        <p class="text-xs text-gray-500 mt-1">${{new Date(m.timestamp).toLocaleDateString()}} · ${{m.outcome_description || 'completed'}}</p>
-                                    </div>
-                                `).join('')}}
-                            </div>
+                    <h3 class="text-sm font-medium text-gray-900 mb-3 flex items-center gap-2">
+                        <i class="fas fa-globe text-gray-400"></i>
+                        Remote Access (Ngrok)
+                        <span id="ngrok-status-badge" class="status-badge offline ml-auto">Offline</span>
+                    </h3>
+                    <div class="space-y-3">
+                        <div>
+                            <label class="text-xs text-gray-500 block mb-1">Ngrok Authtoken</label>
+                            <input type="password" id="settings-ngrok-token" class="w-full text-sm border border-gray-200 rounded px-2 py-1.5" placeholder="Enter authtoken...">
                         </div>
-                    `;
-                }}
-                
-                // All Memories Section
-                html += '<div class="space-y-4">';
-                html += `
-                    <div class="border rounded-lg overflow-hidden">
-                        <div class="p-3 bg-gray-100 font-medium text-gray-700 flex items-center gap-2">
-                            <i class="fas fa-brain text-gray-400"></i>
-                            All Memories (${{data.memories.length}})
+                        <div>
+                            <label class="text-xs text-gray-500 block mb-1">OAuth Provider</label>
+                            <select id="settings-ngrok-oauth" class="w-full text-sm border border-gray-200 rounded px-2 py-1.5">
+                                <option value="">None (Public)</option>
+                                <option value="google">Google</option>
+                                <option value="github">GitHub</option>
+                                <option value="microsoft">Microsoft</option>
+                            </select>
                         </div>
-                        <div class="divide-y">
-                            ${{data.memories.slice(0, 10).map(m => `
-                                <div class="p-3 hover:bg-gray-50">
-                                    <div class="flex items-center gap-2 mb-1">
-                                        <span class="text-xs ${{m.sentiment >= 4 ? 'text-green-600' : m.sentiment >= 3 ? 'text-gray-500' : 'text-orange-600'}}">
-                                            ${{m.sentiment >= 4 ? '😊' : m.sentiment >= 3 ? '😐' : '😕'}} ${{m.sentiment || 3}}/5
-                                        </span>
-                                        <span class="text-xs text-gray-400">${{new Date(m.timestamp).toLocaleDateString()}}</span>
-                                        ${{m.successful ? '<span class="text-xs text-green-600 ml-2">✓</span>' : ''}}
-                                    </div>
-                                    <p class="text-gray-700 text-sm">${{(m.summary || m.user_message || '').substring(0, 100)}}...</p>
-                                    ${{m.topics?.length ? `<p class="text-xs text-gray-500 mt-1">Topics: ${{m.topics.join(', ')}}</p>` : ''}}
-                                </div>
-                            `).join('')}}
+                        <div>
+                            <label class="text-xs text-gray-500 block mb-1">Allowed Emails (CSV)</label>
+                            <input type="text" id="settings-ngrok-emails" class="w-full text-sm border border-gray-200 rounded px-2 py-1.5" placeholder="me@gmail.com, you@gmail.com">
                         </div>
-                    </div>
-                `;
-                html += '</div>';
-                
-                content.innerHTML = html;
-                
-            }} catch (error) {{
-                content.innerHTML = `<div class="text-red-500 text-center py-8">Error: ${{error.message}}</div>`;
-            }}
-        }}
-        
-        async function consolidateMemory() {{
-            if (!currentSessionId) {{
-                alert('No active session');
-                return;
-            }}
-            
-            const btn = event.target;
-            const originalText = btn.innerHTML;
-            btn.innerHTML = '<i class="fas fa-spinner fa-spin mr-1"></i>Analisando...';
-            btn.disabled = true;
-            
-            try {{
-                // Step 1: Get preview
-                const previewRes = await fetch(`/api/sessions/${{currentSessionId}}/consolidate/preview`);
-                const previewData = await previewRes.json();
-                
-                if (previewData.status !== 'ok') {{
-                    alert('❌ Erro na análise: ' + (previewData.error || 'Erro desconhecido'));
-                    return;
-                }}
-                
-                const preview = previewData.preview;
-                
-                if (preview.candidates_count === 0) {{
-                    alert(`📊 Análise completa\n\n${{preview.total_memories}} memórias analisadas\nNenhuma memória relevante encontrada para consolidar.\n\nCritérios (threshold 0.7):\n• Importância ≥ 0.7, OU\n• 3+ critérios:\n  - Interação bem-sucedida + SUBSTANCIAL (>50 chars)\n  - Tem tecnologias/companhias REAIS\n  - Sentimento muito positivo (≥4)\n  - Conteúdo rico (2+ tópicos)\n\nExemplos que NÃO consolidamos:\n• 'who are you?' (trivial, sem tech específica)\n• Mensagens curtas\n• Apenas 'AI' genérico como tópico`);
-                    return;
-                }}
-                
-                // Build preview message
-                let previewMsg = `📊 ANÁLISE DA SESSÃO\n`;
-                previewMsg += `━━━━━━━━━━━━━━━━━━━━\n\n`;
-                previewMsg += `• ${{preview.total_memories}} memórias totais\n`;
-                previewMsg += `• ${{preview.candidates_count}} candidatas à consolidação\n`;
-                previewMsg += `• ${{preview.rejected_count}} rejeitadas (baixa relevância)\n\n`;
-                
-                if (preview.unique_entities.technologies.length > 0) {{
-                    previewMsg += `💻 Tecnologias: ${{preview.unique_entities.technologies.join(', ')}}\n`;
-                }}
-                if (preview.unique_entities.topics.length > 0) {{
-                    previewMsg += `📌 Tópicos: ${{preview.unique_entities.topics.join(', ')}}\n`;
-                }}
-                
-                previewMsg += `\n━━━━━━━━━━━━━━━━━━━━\n\n`;
-                previewMsg += `Top ${{Math.min(3, preview.candidates.length)}} memórias mais relevantes:\n\n`;
-                
-                preview.candidates.slice(0, 3).forEach((c, i) => {{
-                    previewMsg += `${{i + 1}}. ${{c.summary.substring(0, 60)}}...\n`;
-                    previewMsg += `   Razões: ${{c.reasons.join(', ')}}\n\n`;
-                }});
-                
-                previewMsg += `\nProsseguir com a consolidação?`;
-                
-                if (!confirm(previewMsg)) {{
-                    return;
-                }}
-                
-                // Step 2: Perform consolidation
-                btn.innerHTML = '<i class="fas fa-spinner fa-spin mr-1"></i>Consolidando...';
-                
-                const res = await fetch(`/api/sessions/${{currentSessionId}}/consolidate`, {{
-                    method: 'POST',
-                    headers: {{'Content-Type': 'application/json'}}
-                }});
-                
-                const data = await res.json();
-                
-                if (data.status === 'ok') {{
-                    let successMsg = `✅ Consolidação completa!\n\n`;
-                    successMsg += `• ${{data.facts_analyzed}} memórias analisadas\n`;
-                    successMsg += `• ${{data.facts_stored}} movidas para Knowledge Graph\n`;
-                    successMsg += `• ${{data.unique_entities}} entidades únicas extraídas\n\n`;
-                    successMsg += `💡 As memórias consolidadas não aparecerão mais nesta lista.`;
-                    alert(successMsg);
-                    loadSemanticMemory(); // Refresh the list (consolidated memories will disappear)
-                }} else {{
-                    alert('❌ Erro: ' + (data.error || 'Falha na consolidação'));
-                }}
-            }} catch (error) {{
-                alert('❌ Erro: ' + error.message);
-            }} finally {{
-                btn.innerHTML = originalText;
-                btn.disabled = false;
-            }}
-        }}
-        
-        async function loadMemoryStats() {{
-            try {{
-                // Load old memory stats (Hybrid Memory)
-                const res = await fetch('/api/memory/stats');
-                const data = await res.json();
-                
-                // Load new cognitive memory stats
-                const cognitiveRes = await fetch('/api/cognitive-memory');
-                const cognitiveData = await cognitiveRes.json();
-                
-                const oldCount = data.sqlite?.total || 0;
-                const newCount = cognitiveData.episodic_count || 0;
-                const entityCount = cognitiveData.semantic_entities || 0;
-                
-                // Display combined stats
-                if (newCount > 0) {{
-                    document.getElementById('memory-count').textContent = 
-                        `${{newCount}} episodes, ${{entityCount}} entities`;
-                    document.getElementById('memory-graph-status').textContent = 
-                        '(Cognitive Memory 🧠)';
-                }} else {{
-                    document.getElementById('memory-count').textContent = 
-                        `${{oldCount}} memories`;
-                    document.getElementById('memory-graph-status').textContent = 
-                        data.graph_available ? '(Graph ✅)' : '(SQLite only)';
-                }}
-            }} catch (error) {{
-                console.error('Failed to load memory stats:', error);
-            }}
-        }}
-        
-        async function loadMemories(reset = false) {{
-            if (reset) {{
-                memoryOffset = 0;
-                currentMemoryQuery = '';
-            }}
-            
-            try {{
-                const res = await fetch(`/api/memory?limit=10&offset=${{memoryOffset}}`);
-                const data = await res.json();
-                
-                renderMemories(data.memories, reset);
-                
-                // Show/hide load more button
-                const loadMoreBtn = document.getElementById('load-more-memories');
-                if (data.memories.length === 10) {{
-                    loadMoreBtn.classList.remove('hidden');
-                }} else {{
-                    loadMoreBtn.classList.add('hidden');
-                }}
-            }} catch (error) {{
-                console.error('Failed to load memories:', error);
-            }}
-        }}
-        
-        async function searchMemories() {{
-            const query = document.getElementById('memory-search').value.trim();
-            if (!query) {{
-                loadMemories(true);
-                return;
-            }}
-            
-            currentMemoryQuery = query;
-            
-            try {{
-                const res = await fetch('/api/memory/search', {{
-                    method: 'POST',
-                    headers: {{ 'Content-Type': 'application/json' }},
-                    body: JSON.stringify({{
-                        query: query,
-                        type: memorySearchType,
-                        limit: 10
-                    }})
-                }});
-                
-                const data = await res.json();
-                renderMemories(data.memories, true);
-                
-                // Hide load more for search results
-                document.getElementById('load-more-memories').classList.add('hidden');
-            }} catch (error) {{
-                console.error('Failed to search memories:', error);
-            }}
-        }}
-        
-        function renderMemories(memories, reset) {{
-            const container = document.getElementById('memories-list');
-            
-            if (reset) {{
-                container.innerHTML = '';
-            }}
-            
-            if (memories.length === 0) {{
-                container.innerHTML = '<div class="text-xs text-gray-400 text-center py-2">No memories found</div>';
-                return;
-            }}
-            
-            memories.forEach(m => {{
-                const div = document.createElement('div');
-                div.className = 'p-2 bg-white border border-gray-200 rounded-lg text-xs group hover:border-gray-400 transition-colors';
-                
-                const content = m.content || m.text || 'No content';
-                const preview = content.length > 60 ? content.substring(0, 60) + '...' : content;
-                const category = m.category || 'general';
-                const date = m.created_at ? new Date(m.created_at).toLocaleDateString() : 'Unknown';
-                
-                div.innerHTML = `
-                    <div class="flex items-start justify-between gap-2">
-                        <div class="flex-1">
-                            <div class="text-gray-700 leading-tight">${{preview}}</div>
-                            <div class="flex items-center gap-2 mt-1.5">
-                                <span class="px-1.5 py-0.5 bg-gray-100 rounded text-[10px] text-gray-500">${{category}}</span>
-                                <span class="text-[10px] text-gray-400">${{date}}</span>
+                        <div id="ngrok-url-container" class="hidden">
+                            <label class="text-xs text-gray-500 block mb-1">Public URL</label>
+                            <div class="flex gap-2">
+                                <input type="text" id="ngrok-public-url" readonly class="flex-1 text-xs bg-gray-50 border border-gray-200 rounded px-2 py-1.5 font-mono" value="">
+                                <button onclick="copyNgrokUrl()" class="p-1.5 text-gray-400 hover:text-blue-600 border border-gray-200 rounded">
+                                    <i class="fas fa-copy"></i>
+                                </button>
                             </div>
                         </div>
-                        <button onclick="deleteMemory(${{m.id}})" 
-                                class="text-gray-300 hover:text-red-500 opacity-0 group-hover:opacity-100 transition-opacity">
-                            <i class="fas fa-trash"></i>
-                        </button>
+                        <div class="flex gap-2 pt-2">
+                            <button onclick="toggleNgrok()" id="ngrok-toggle-btn" class="btn btn-primary flex-1 text-xs py-1.5">
+                                Start Tunnel
+                            </button>
+                        </div>
                     </div>
-                `;
+                </div>
                 
-                container.appendChild(div);
-            }});
-            
-            memoryOffset += memories.length;
-        }}
-        
-        function setMemorySearchType(type) {{
-            memorySearchType = type;
-            
-            // Update buttons
-            document.getElementById('mem-search-quick').className = 
-                type === 'quick' ? 'flex-1 btn btn-primary text-[10px] py-1' : 'flex-1 btn btn-secondary text-[10px] py-1';
-            document.getElementById('mem-search-semantic').className = 
-                type === 'semantic' ? 'flex-1 btn btn-primary text-[10px] py-1' : 'flex-1 btn btn-secondary text-[10px] py-1';
-            
-            // Re-search if there's a query
-            if (currentMemoryQuery) {{
-                searchMemories();
-            }}
-        }}
-        
-        function loadMoreMemories() {{
-            if (currentMemoryQuery) {{
-                searchMemories();
-            }} else {{
-                loadMemories();
-            }}
-        }}
-        
-        async function deleteMemory(id) {{
-            if (!confirm('Delete this memory?')) return;
+            </div>
             
-            try {{
-                await fetch(`/api/memory/${{id}}`, {{ method: 'DELETE' }});
-                loadMemories(true);
-                loadMemoryStats();
-            }} catch (error) {{
-                console.error('Failed to delete memory:', error);
-            }}
-        }}
-        
-        // Initialize
-        document.addEventListener('DOMContentLoaded', () => {{
-            console.log('DOM loaded, initializing...');
-            setupProviderListener();
-            setupModelListener();
-            loadSettings();
-            loadSessions();
-            checkTelegramStatus();
-            initTheme();
-        }});
-        
-        // THEME MANAGEMENT
-        const THEME_KEY = 'klaus-theme';
-        const DEFAULT_THEME = 'deckard-light';
-        const AVAILABLE_THEMES = ['deckard-light', 'deckard-dark'];
-        
-        function initTheme() {{
-            const savedTheme = localStorage.getItem(THEME_KEY) || DEFAULT_THEME;
-            applyTheme(savedTheme);
-            updateThemeUI(savedTheme);
-        }}
-        
-        function applyTheme(themeName) {{
-            // Remove all theme classes
-            document.documentElement.classList.remove(...AVAILABLE_THEMES.map(t => `theme-${{t}}`));
-            // Add selected theme
-            document.documentElement.classList.add(`theme-${{themeName}}`);
-            // Update meta theme-color
-            const metaTheme = document.querySelector('meta[name="theme-color"]');
-            if (metaTheme) {{
-                metaTheme.content = themeName.includes('dark') ? '#161412' : '#F5F3EF';
-            }}
-            // Sync theme with iframes
-            syncThemeWithIframes(themeName);
-        }}
-        
-        function syncThemeWithIframes(themeName) {{
-            // Send theme to all iframes
-            const iframes = ['iframe-graph', 'iframe-episodic'];
-            iframes.forEach(id => {{
-                const iframe = document.getElementById(id);
-                if (iframe && iframe.contentWindow) {{
-                    iframe.contentWindow.postMessage({{ type: 'theme-change', theme: themeName }}, '*');
-                }}
-            }});
-        }}
-        
-        function toggleTheme() {{
-            const currentTheme = localStorage.getItem(THEME_KEY) || DEFAULT_THEME;
-            const newTheme = currentTheme === 'deckard-light' ? 'deckard-dark' : 'deckard-light';
-            applyTheme(newTheme);
-            localStorage.setItem(THEME_KEY, newTheme);
-            updateThemeUI(newTheme);
-            // Sync with backend
-            syncThemeWithBackend(newTheme);
-        }}
-        
-        function updateThemeUI(themeName) {{
-            const toggleBtn = document.getElementById('theme-toggle-btn');
-            const themeLabel = document.getElementById('theme-label');
-            if (toggleBtn) {{
-                toggleBtn.innerHTML = themeName.includes('dark') ? 
-                    '<i class="fas fa-moon"></i>' : 
-                    '<i class="fas fa-sun"></i>';
-            }}
-            if (themeLabel) {{
-                themeLabel.textContent = themeName === 'deckard-light' ? 'Light' : 'Dark';
-            }}
-        }}
-        
-        async function syncThemeWithBackend(themeName) {{
-            try {{
-                await fetch('/api/settings/theme', {{
-                    method: 'POST',
-                    headers: {{'Content-Type': 'application/json'}},
-                    body: JSON.stringify({{theme: themeName}})
-                }});
-            }} catch (e) {{
-                console.log('Theme sync failed (backend may be unavailable)');
-            }}
-        }}
+            <!-- Footer -->
+            <div class="p-3 border-t border-gray-200 bg-gray-50">
+                <p class="text-xs text-gray-500 text-center">
+                    Klaus v2.1
+                </p>
+            </div>
+        </div>
         
-        async function loadThemeFromBackend() {{
-            try {{
-                const response = await fetch('/api/settings/theme');
-                if (response.ok) {{
-                    const data = await response.json();
-                    if (data.theme && AVAILABLE_THEMES.includes(data.theme)) {{
-                        applyTheme(data.theme);
-                        localStorage.setItem(THEME_KEY, data.theme);
-                        updateThemeUI(data.theme);
-                    }}
-                }}
-            }} catch (e) {{
-                console.log('Theme load from backend failed, using localStorage');
-            }}
-        }}
-    </script>
+        <!-- Right Sidebar Toggle (visible when collapsed) -->
+        <button id="right-sidebar-toggle" onclick="toggleSidebar('right')" class="fixed right-0 top-1/2 transform -translate-y-1/2 z-50 bg-white border border-gray-200 rounded-l-lg p-2 shadow-lg hover:bg-gray-50" title="Expand Settings" style="display: none;">
+            <i class="fas fa-chevron-left text-gray-600"></i>
+        </button>
+    </div>
+    
+    <script>window.__CFG = {page_cfg};</script>
+    <script src="/static/app.js"></script>
 </body>
 </html>"""
     
-    return HTMLResponse(content=html_content)
+    return html_content
 
 
 @app.get("/manifest.json")
@@ -4557,13 +1274,46 @@ def should_use_web_search(message: str) -> tuple[bool, str]:
     return False, ""
 
 
+# In-flight upstream chat calls, keyed by a digest of (user, provider, model, message)
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+async def _singleflight(key: str, call):
+    """Run call() once per key; concurrent callers with the same key share its outcome."""
+    fut = _inflight.get(key)
+    if fut is not None:
+        return await asyncio.shield(fut)
+    fut = asyncio.get_running_loop().create_future()
+    _inflight[key] = fut
+    try:
+        result = await call()
+    except asyncio.CancelledError:
+        fut.cancel()
+        raise
+    except Exception as e:
+        fut.set_exception(e)
+        fut.exception()  # mark retrieved so an unshared failure isn't logged twice
+        raise
+    finally:
+        _inflight.pop(key, None)
+    fut.set_result(result)
+    return result
+
+
 @app.post("/api/chat")
 async def chat(request: Request):
     """Process chat request using the configured provider."""
+    if _chat_sem.locked():
+        return ORJSONResponse({"error": "Server busy, try again shortly"}, status_code=503)
+    async with _chat_sem:
+        return await _chat(request)
+
+
+async def _chat(request: Request):
     global web_messages, current_session, settings, web_search_tool
     
     try:
-        body = await request.json()
+        body = orjson.loads(await request.body())
         user_message = body.get("message", "")
         
         # Allow overriding provider/model per message
@@ -4571,7 +1321,7 @@ async def chat(request: Request):
         override_model = body.get("model")
         
         if not user_message:
-            return JSONResponse({"error": "Empty message"}, status_code=400)
+            return ORJSONResponse({"error": "Empty message"}, status_code=400)
         
         # ============================================
         # SUB-AGENT SPAWNER DETECTION
@@ -4629,7 +1379,7 @@ async def chat(request: Request):
                         
                         web_messages.append({"sender": "assistant", "text": assistant_message, "timestamp": datetime.now().isoformat()})
                         
-                        return JSONResponse({
+                        return ORJSONResponse({
                             "response": assistant_message,
                             "model_used": settings.model,
                             "provider": settings.provider,
@@ -4667,7 +1417,7 @@ async def chat(request: Request):
                 session_id = current_session.id if current_session else None
                 
                 if not session_id:
-                    return JSONResponse({
+                    return ORJSONResponse({
                         "response": "⚠️ **Nenhuma sessão ativa**\n\nInicie uma conversa primeiro antes de consolidar memórias.",
                         "command": "consolidate",
                         "error": "no_session"
@@ -4675,7 +1425,7 @@ async def chat(request: Request):
                 
                 # Check if current session has any messages
                 if not web_messages or len(web_messages) == 0:
-                    return JSONResponse({
+                    return ORJSONResponse({
                         "response": f"📭 **Sessão vazia**\n\nSua sessão atual (`{session_id}`) não tem mensagens para consolidar.\n\nEnvie algumas mensagens primeiro antes de usar `/consolidate`.",
                         "command": "consolidate",
                         "session_id": session_id,
@@ -4690,7 +1440,7 @@ async def chat(request: Request):
                 total_before = len(memories_before)
                 
                 if total_before == 0:
-                    return JSONResponse({
+                    return ORJSONResponse({
                         "response": f"📭 **Nenhuma memória nesta sessão**\n\nSua sessão atual (`{session_id}`) ainda não tem memórias episódicas registradas.\n\nConverse mais com o agente sobre tópicos técnicos para criar memórias.",
                         "command": "consolidate",
                         "session_id": session_id,
@@ -4757,7 +1507,7 @@ async def chat(request: Request):
                     
                     response += f"\n\n💡 Para executar a consolidação real, use `/consolidate` (sem --preview)"
                     
-                    return JSONResponse({
+                    return ORJSONResponse({
                         "response": response,
                         "command": "consolidate",
                         "preview": True,
@@ -4772,7 +1522,7 @@ async def chat(request: Request):
                 )
                 
                 if len(consolidated) == 0:
-                    return JSONResponse({
+                    return ORJSONResponse({
                         "response": f"📭 **Nenhuma memória para consolidar**\n\nAnalisei {total_before} memórias, mas nenhuma atingiu o critério de importância (threshold: 0.7).\n\n**Critérios usados (mínimo 3 de 5):**\n• Importância ≥ 0.7\n• Conteúdo substancial (>50 chars user, >100 assistant)\n• Tecnologias ou empresas identificadas\n• Sentimento positivo (≥4)\n• Tópicos ricos (≥2)\n\n_Tente ter conversas mais técnicas ou específicas sobre tecnologias, arquitetura, ou decisões importantes._",
                         "command": "consolidate",
                         "total_checked": total_before
@@ -4807,7 +1557,7 @@ async def chat(request: Request):
                 
                 response += "\n\n💡 As memórias consolidadas agora fazem parte da memória de longo prazo e serão usadas para contexto futuro."
                 
-                return JSONResponse({
+                return ORJSONResponse({
                     "response": response,
                     "command": "consolidate",
                     "consolidated": len(consolidated),
@@ -4817,7 +1567,7 @@ async def chat(request: Request):
             except Exception as e:
                 import traceback
                 print(f"Consolidate error: {e}\n{traceback.format_exc()}")
-                return JSONResponse({
+                return ORJSONResponse({
                     "response": f"❌ **Erro na consolidação:** {str(e)}",
                     "command": "consolidate",
                     "error": str(e)
@@ -4832,7 +1582,7 @@ async def chat(request: Request):
                 episodes = manager.get_episodic_memories(include_archived=True)
                 
                 if not episodes:
-                    return JSONResponse({
+                    return ORJSONResponse({
                         "response": "📭 Nenhuma memória encontrada para análise de decay.",
                         "command": "decay"
                     })
@@ -4849,13 +1599,13 @@ async def chat(request: Request):
                     "avg_strength": sum(calculator.calculate_episodic_strength(ep) for ep in episodes) / len(episodes)
                 }
                 
-                return JSONResponse({
+                return ORJSONResponse({
                     "response": f"📊 **Análise de Decay de Memórias**\n\n🧠 Total: {stats['total']} memórias\n💪 Alta força (>0.7): {stats['high_strength']}\n😴 Baixa força (<0.3): {stats['low_strength']}\n📦 Arquivadas: {stats['archived']}\n📈 Força média: {stats['avg_strength']:.2f}",
                     "command": "decay",
                     "stats": stats
                 })
             except Exception as e:
-                return JSONResponse({
+                return ORJSONResponse({
                     "response": f"❌ **Erro na análise:** {str(e)}",
                     "command": "decay",
                     "error": str(e)
@@ -4872,7 +1622,7 @@ async def chat(request: Request):
                 results = manager.semantic_search(query, top_k=5)
                 
                 if not results:
-                    return JSONResponse({
+                    return ORJSONResponse({
                         "response": f"🔍 **Busca: '{query}'**\n\nNenhuma memória encontrada.",
                         "command": "search",
                         "query": query
@@ -4882,14 +1632,14 @@ async def chat(request: Request):
                 for i, r in enumerate(results[:3], 1):
                     response += f"{i}. {r.get('summary', 'N/A')[:80]}... (similaridade: {r.get('similarity', 0):.2f})\n"
                 
-                return JSONResponse({
+                return ORJSONResponse({
                     "response": response,
                     "command": "search",
                     "query": query,
                     "results": results
                 })
             except Exception as e:
-                return JSONResponse({
+                return ORJSONResponse({
                     "response": f"❌ **Erro na busca:** {str(e)}",
                     "command": "search",
                     "error": str(e)
@@ -4906,7 +1656,7 @@ async def chat(request: Request):
                 related = manager.find_related_memories(memory_id, top_k=5)
                 
                 if not related:
-                    return JSONResponse({
+                    return ORJSONResponse({
                         "response": f"🔗 **Memórias relacionadas a: {memory_id}**\n\nNenhuma memória relacionada encontrada.",
                         "command": "related",
                         "memory_id": memory_id
@@ -4916,14 +1666,14 @@ async def chat(request: Request):
                 for i, r in enumerate(related[:3], 1):
                     response += f"{i}. {r.get('summary', 'N/A')[:80]}...\n"
                 
-                return JSONResponse({
+                return ORJSONResponse({
                     "response": response,
                     "command": "related",
                     "memory_id": memory_id,
                     "related": related
                 })
             except Exception as e:
-                return JSONResponse({
+                return ORJSONResponse({
                     "response": f"❌ **Erro:** {str(e)}",
                     "command": "related",
                     "error": str(e)
@@ -4971,7 +1721,7 @@ Source: {weather_data.get('source', 'web search')}
         messages = []
         
         # Add system context if available
-        config = load_config()
+        config = await asyncio.to_thread(load_config)
         default_agent_name = config.get("agent", {}).get("name", "Assistant")
         agent_name = default_agent_name
         
@@ -5067,22 +1817,21 @@ Source: {weather_data.get('source', 'web search')}
         # Get response from the configured provider
         print(f"🤖 Chat: provider={chat_provider}, model={chat_model}, temp={settings.temperature}, max_tokens={settings.max_tokens}", flush=True)
         
-        try:
-            assistant_message = await chat_with_provider(
-                provider=chat_provider,
-                model=chat_model,
-                messages=messages,
-                system=system_msg,
-                temperature=settings.temperature,
-                max_tokens=settings.max_tokens
-            )
-            print(f"✅ Response received from {chat_model}", flush=True)
-        except Exception as provider_error:
-            # Fallback to Kimi Agent if direct provider fails
+        async def ask_upstream():
             try:
-                async with httpx.AsyncClient(timeout=60.0) as client:
-                    response = await client.post(
-                        f"{KIMI_AGENT_URL}/chat",
+                return await chat_with_provider(
+                    provider=chat_provider,
+                    model=chat_model,
+                    messages=messages,
+                    system=system_msg,
+                    temperature=settings.temperature,
+                    max_tokens=settings.max_tokens
+                )
+            except Exception as provider_error:
+                # Fallback to Kimi Agent if direct provider fails
+                try:
+                    response = await request.app.state.http.post(
+                        "/chat",
                         json={
                             "user_id": "web_user",
                             "message": user_message,
@@ -5094,11 +1843,18 @@ Source: {weather_data.get('source', 'web search')}
                     )
                     if response.status_code == 200:
                         data = response.json()
-                        assistant_message = data.get("response", "")
+                        return data.get("response", "")
                     else:
                         raise Exception(f"Kimi Agent error: {response.status_code}")
-            except:
-                raise provider_error
+                except:
+                    raise provider_error
+        
+        # Two tabs submitting the same message share one upstream call
+        flight_key = hashlib.blake2b(
+            f"web_user|{chat_provider}|{chat_model}|{user_message}".encode(), digest_size=16
+        ).hexdigest()
+        assistant_message = await _singleflight(flight_key, ask_upstream)
+        print(f"✅ Response received from {chat_model}", flush=True)
         
         # Add assistant message to session
         web_messages.append({"sender": "assistant", "text": assistant_message, "timestamp": datetime.now().isoformat()})
@@ -5181,14 +1937,14 @@ Source: {weather_data.get('source', 'web search')}
             current_session.updated_at =datetime.now().isoformat()
             save_session(current_session)
         
-        return JSONResponse({
+        return ORJSONResponse({
             "response": assistant_message,
             "model_used": chat_model,
             "provider": chat_provider
         })
                 
     except Exception as e:
-        return JSONResponse({"error": str(e)}, status_code=500)
+        return ORJSONResponse({"error": str(e)}, status_code=500)
 
 
 # ============================================================================
@@ -5397,26 +2153,68 @@ if CURRENT_SESSION_FILE.exists():
 if not current_session:
     current_session = create_session("Current Session")
 
-# Initialize hybrid memory store
-hybrid_memory = None
-if HYBRID_AVAILABLE:
+HYBRID_MEMORY_DB = "/app/workspace/memory/agent_memory.db"
+
+
+_memory: Optional[HybridMemoryStore] = None
+_memory_lock = asyncio.Lock()
+
+
+def _open_memory() -> HybridMemoryStore:
+    """Open the hybrid memory store (blocking: SQLite, Kuzu graph)."""
+    Path(HYBRID_MEMORY_DB).parent.mkdir(parents=True, exist_ok=True)
+    store = HybridMemoryStore(HYBRID_MEMORY_DB)
+    logger.info("Hybrid memory initialized: %s", HYBRID_MEMORY_DB)
+    return store
+
+
+async def get_memory() -> Optional[HybridMemoryStore]:
+    """Hybrid memory store, opened off the event loop on first use
+    (failures are retried next call)."""
+    global _memory
+    if _memory is None:
+        async with _memory_lock:
+            if _memory is None:
+                try:
+                    _memory = await asyncio.to_thread(_open_memory)
+                except Exception as e:
+                    logger.warning("Hybrid memory init failed: %s", e)
+                    return None
+    return _memory
+
+
+@app.on_event("startup")
+async def open_memory():
+    """Open the hybrid memory store in the background so requests find it ready."""
+    app.state.memory_task = asyncio.create_task(get_memory())
+
+
+@app.on_event("shutdown")
+async def close_memory():
+    """Flush queued memory writes and release the graph."""
+    if _memory is not None:
+        await asyncio.to_thread(_memory.close)
+
+
+@app.on_event("shutdown")
+async def close_provider_clients():
+    """Close the pooled Gemini HTTP client used by the LLM router."""
     try:
-        db_path = "/app/workspace/memory/agent_memory.db"
-        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
-        hybrid_memory = HybridMemoryStore(db_path)
-        print(f"✅ Hybrid memory initialized: {db_path}")
-    except Exception as e:
-        print(f"⚠️  Hybrid memory init failed: {e}")
+        from core.providers.gemini_provider import aclose_clients
+    except ImportError:
+        return
+    await aclose_clients()
 
 
 @app.post("/api/compact")
 async def compact_context(request: Request):
     """Analyze conversation, extract key facts, save to hybrid memory (SQLite + Graph)."""
-    global web_messages, hybrid_memory, current_session
+    global web_messages, current_session
     
     if not web_messages:
         return JSONResponse({"message": "No messages to compact", "facts_extracted": 0})
     
+    hybrid_memory = await get_memory()
     try:
         # Extract key information from the conversation
         facts = extract_important_facts(web_messages)
@@ -5424,39 +2222,43 @@ async def compact_context(request: Request):
         # Save facts to hybrid memory (both SQLite and Graph)
         saved_count = 0
         if hybrid_memory:
-            for fact in facts:
-                try:
-                    hybrid_memory.store(
-                        content=fact,
-                        category="conversation_fact",
-                        importance="high",
-                        metadata={
-                            "source": "web_ui_compact",
-                            "timestamp": str(datetime.now()),
-                            "facts": len(facts)
-                        }
-                    )
-                    saved_count += 1
-                except Exception as e:
-                    print(f"Failed to store fact: {e}")
-        else:
-            # Fallback: try to save via Kimi Agent
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                for fact in facts:
-                    try:
-                        await client.post(
-                            f"{KIMI_AGENT_URL}/api/memory/store",
-                            json={
-                                "user_id": "web_user",
-                                "content": fact,
-                                "category": "conversation_fact",
-                                "importance": "high"
-                            },
-                            timeout=5.0
-                        )
-                        saved_count += 1
-                    except:
-                        pass
+            try:
+                saved_count = len(await hybrid_memory.astore_many(
+                    [{"content": fact, "category": "conversation_fact", "importance": "high"}
+                     for fact in facts],
+                    common_metadata={
+                        "source": "web_ui_compact",
+                        "timestamp": str(datetime.now()),
+                        "facts": len(facts)
+                    }
+                ))
+            except Exception:
+                logger.exception("Failed to store %d compacted facts", len(facts))
+                if FACT_STORE_FAILURES is not None:
+                    FACT_STORE_FAILURES.inc(len(facts))
+        elif facts:
+            # Fallback: save the whole batch via the Kimi Agent sync API
+            try:
+                response = await request.app.state.http.post(
+                    "/api/sync/memories",
+                    json={
+                        "user_id": "web_user",
+                        "memories": [
+                            {"content": fact, "memory_type": "fact",
+                             "importance": 0.8, "source": "web_ui_compact"}
+                            for fact in facts
+                        ]
+                    },
+                    timeout=5.0
+                )
+                if response.status_code < 400:
+                    saved_count = response.json().get("saved_count", 0)
+                else:
+                    logger.error("Kimi Agent rejected %d facts: HTTP %d", len(facts), response.status_code)
+            except Exception:
+                logger.exception("Failed to store %d facts via Kimi Agent", len(facts))
+            if FACT_STORE_FAILURES is not None and saved_count < len(facts):
+                FACT_STORE_FAILURES.inc(len(facts) - saved_count)
         
         # Also save to graph if available (for relationships)
         if hybrid_memory and hybrid_memory.graph_available:
@@ -5501,40 +2303,59 @@ async def compact_context(request: Request):
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
+# Keywords that indicate important information, in priority order: a message
+# matching several categories is recorded under the first one
+FACT_KEYWORDS = {
+    "Preference": ["prefiro", "prefer", "gosto de", "like to", "não gosto", "don't like",
+                   "sempre uso", "always use", "nunca uso", "never use"],
+    "Decision": ["decidi", "decided", "vamos usar", "let's use", "escolhi", "chose",
+                 "vou usar", "will use", "adotar", "adopt"],
+    "Info": ["meu nome é", "my name is", "eu sou", "i am", "trabalho com", "work with",
+             "minha empresa", "my company", "projeto", "project"],
+}
+# One case-insensitive alternation over every keyword, one named group per
+# category; wrapped in a lookahead so overlapping keywords of different
+# categories are all seen
+_FACT_KW_RE = re.compile("(?=" + "|".join(
+    f"(?P<{label}>{'|'.join(map(re.escape, keywords))})"
+    for label, keywords in FACT_KEYWORDS.items()
+) + ")", re.IGNORECASE)
+_FACT_RANK = {label: rank for rank, label in enumerate(FACT_KEYWORDS)}
+MAX_COMPACT_FACTS = 5
+
+
 def extract_important_facts(messages):
     """Extract important facts from conversation history."""
     facts = []
+    seen = set()  # repeated lines would otherwise be stored once per repeat
     
-    # Keywords that indicate important information
-    preference_keywords = ["prefiro", "prefer", "gosto de", "like to", "não gosto", "don't like", 
-                          "sempre uso", "always use", "nunca uso", "never use"]
-    decision_keywords = ["decidi", "decided", "vamos usar", "let's use", "escolhi", "chose",
-                        "vou usar", "will use", "adotar", "adopt"]
-    info_keywords = ["meu nome é", "my name is", "eu sou", "i am", "trabalho com", "work with",
-                    "minha empresa", "my company", "projeto", "project"]
+    first_user_message = None
     
-    user_messages = [m.get("text", "") for m in messages if m.get("sender", "") == "user"]
-    
-    for msg in user_messages:
-        msg_lower = msg.lower()
-        
-        # Check for preferences
-        if any(kw in msg_lower for kw in preference_keywords):
-            facts.append(f"Preference: {msg[:200]}")
-        
-        # Check for decisions
-        elif any(kw in msg_lower for kw in decision_keywords):
-            facts.append(f"Decision: {msg[:200]}")
-        
-        # Check for personal/professional info
-        elif any(kw in msg_lower for kw in info_keywords):
-            facts.append(f"Info: {msg[:200]}")
+    for m in messages:
+        if m.get("sender", "") != "user":
+            continue
+        msg = m.get("text", "")
+        if first_user_message is None:
+            first_user_message = msg
+        label = None
+        for match in _FACT_KW_RE.finditer(msg):
+            if label is None or _FACT_RANK[match.lastgroup] < _FACT_RANK[label]:
+                label = match.lastgroup
+                if _FACT_RANK[label] == 0:
+                    break
+        if label:
+            fact = f"{label}: {msg[:200]}"
+            if fact not in seen:
+                seen.add(fact)
+                facts.append(fact)
+                if len(facts) >= MAX_COMPACT_FACTS:
+                    break
     
     # If no specific facts found, create a summary
-    if not facts and len(user_messages) > 0:
-        facts.append(f"Conversation about: {user_messages[0][:100]}...")
+    if not facts and first_user_message is not None:
+        facts.append(f"Conversation about: {first_user_message[:100]}...")
     
-    return facts[:5]  # Max 5 facts
+    return facts
 
 
 # ============================================================================
@@ -6058,20 +2879,18 @@ async def store_facts_to_memory(session_id: str, request: Request):
         stored_count = 0
         
         # Store to hybrid memory if available
-        if HYBRID_AVAILABLE:
-            memory = HybridMemoryStore()
-            for fact in facts:
-                memory.remember(
-                    content=f"[{fact['category'].upper()}] {fact['content']}",
-                    source=f"session:{session_id}",
-                    importance=0.8,
-                    metadata={
-                        "category": fact["category"],
-                        "timestamp": fact.get("timestamp"),
-                        "type": "extracted_fact"
-                    }
-                )
-                stored_count += 1
+        memory = await get_memory()
+        if memory:
+            # One SQLite transaction for the whole selection
+            stored_count = len(await memory.astore_many(
+                [{
+                    "content": f"[{fact['category'].upper()}] {fact['content']}",
+                    "category": fact["category"],
+                    "importance": "high",
+                    "metadata": {"category": fact["category"], "timestamp": fact.get("timestamp")}
+                } for fact in facts],
+                common_metadata={"source": f"session:{session_id}", "type": "extracted_fact"}
+            ))
         else:
             # Fallback: save to a JSON file
             facts_file = WEB_UI_DATA / "stored_facts" / f"{session_id}.json"
@@ -6549,8 +3368,7 @@ async def get_memories(
     search: str = None
 ):
     """Get memories from hybrid memory store with optional filtering."""
-    global hybrid_memory
-    
+    hybrid_memory = await get_memory()
     if not hybrid_memory:
         return JSONResponse({
             "memories": [],
@@ -6792,13 +3610,12 @@ async def get_memory_stats():
 @app.delete("/api/memory/{memory_id}")
 async def delete_memory(memory_id: int):
     """Delete a specific memory."""
-    global hybrid_memory
-    
+    hybrid_memory = await get_memory()
     if not hybrid_memory:
         return JSONResponse({"error": "Hybrid memory not available"}, status_code=503)
     
     try:
-        success = hybrid_memory.sqlite.delete_memory(memory_id)
+        success = await hybrid_memory.adelete_memory(memory_id)
         if success:
             return JSONResponse({"status": "ok", "message": f"Memory {memory_id} deleted"})
         else:
@@ -6809,8 +3626,7 @@ async def delete_memory(memory_id: int):
 @app.post("/api/memory/search")
 async def search_memories(request: Request):
     """Search memories with semantic/contextual query."""
-    global hybrid_memory
-    
+    hybrid_memory = await get_memory()
     if not hybrid_memory:
         return JSONResponse({"memories": [], "message": "Hybrid memory not available"})
     
@@ -6824,15 +3640,13 @@ async def search_memories(request: Request):
             return JSONResponse({"memories": [], "message": "Empty query"})
         
         # Use hybrid memory recall
-        from hybrid_memory import MemoryQuery
-        
         mem_query = MemoryQuery(
             query_type=query_type,
             text=query,
             limit=limit
         )
         
-        results = hybrid_memory.recall(mem_query)
+        results = await hybrid_memory.arecall(mem_query)
         
         return JSONResponse({
             "memories": results,
@@ -8410,7 +5224,7 @@ async def cognitive_memory_graph_page():
 @app.get("/admin", response_class=HTMLResponse)
 async def admin_page():
     """Admin page for managing models and Telegram."""
-    config = load_config()
+    config = await asyncio.to_thread(load_config)
     agent_name = config.get("agent", {}).get("name", "Agent")
     telegram_enabled = config.get("mode", {}).get("telegram", {}).get("enabled", False)
     
@@ -8686,19 +5500,19 @@ async def health():
     """Health check endpoint."""
     kimi_status = "unknown"
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            # Try /health first, then fallback to /models (common endpoints)
-            for endpoint in ["/health", "/models", "/"]:
-                try:
-                    response = await client.get(f"{KIMI_AGENT_URL}{endpoint}")
-                    if response.status_code in [200, 404]:
-                        # 404 means server is up but endpoint doesn't exist
-                        kimi_status = "ok"
-                        break
-                except:
-                    continue
-            else:
-                kimi_status = "offline"
+        client = app.state.http
+        # Try /health first, then fallback to /models (common endpoints)
+        for endpoint in ["/health", "/models", "/"]:
+            try:
+                response = await client.get(endpoint, timeout=5.0)
+                if response.status_code in [200, 404]:
+                    # 404 means server is up but endpoint doesn't exist
+                    kimi_status = "ok"
+                    break
+            except:
+                continue
+        else:
+            kimi_status = "offline"
     except Exception as e:
         kimi_status = "offline"
         print(f"DEBUG: Kimi health check failed: {e}")
@@ -9242,4 +6056,5 @@ async def stop_telegram_container():
 
 if __name__ == '__main__':
     import uvicorn
-    uvicorn.run(app, host='0.0.0.0', port=int(os.getenv('PORT', 8082)))
+    uvicorn.run(app, host='0.0.0.0', port=int(os.getenv('PORT', 8082)),
+                loop='auto', http='auto', access_log=False)
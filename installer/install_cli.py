@@ -18,6 +18,8 @@ import sys
 import shutil
 import subprocess
 import getpass
+import time
+import urllib.request
 from pathlib import Path
 from typing import Optional
 
@@ -468,6 +470,34 @@ def build_containers(config: dict) -> bool:
         return False
 
 
+SERVICE_HEALTH_URLS = (
+    "http://localhost:12019/health",  # Kimi Agent
+    "http://localhost:12049/health",  # Web UI
+)
+
+
+def wait_for_services(urls, timeout: float = 30.0) -> bool:
+    """Poll health URLs with backoff until all answer 200 or the deadline passes."""
+    pending = list(urls)
+    deadline = time.monotonic() + timeout
+    delay = 0.1
+    while pending:
+        for url in list(pending):
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        pending.remove(url)
+            except OSError:
+                pass
+        if not pending:
+            break
+        if time.monotonic() + delay > deadline:
+            return False
+        time.sleep(delay)
+        delay = min(delay * 1.5, 1.0)
+    return True
+
+
 def start_services(config: dict) -> bool:
     """Start Docker services."""
     try:
@@ -489,9 +519,11 @@ def start_services(config: dict) -> bool:
             cwd=repo_root,
             capture_output=True
         )
-        import time
-        time.sleep(5)
-        return result.returncode == 0
+        if result.returncode != 0:
+            return False
+        if not wait_for_services(SERVICE_HEALTH_URLS):
+            print_warning("Services started but did not report healthy yet")
+        return True
     except Exception as e:
         print(f"Error: {e}")
         return False
@@ -20,6 +20,8 @@ from pathlib import Path
 import threading
 import webbrowser
 
+from install_cli import SERVICE_HEALTH_URLS, wait_for_services
+
 
 class KlausInstaller:
     """Wizard-style installer."""
@@ -902,9 +904,11 @@ defaults:
                 cwd=repo_root,
                 capture_output=True
             )
-            import time
-            time.sleep(5)
-            return result.returncode == 0
+            if result.returncode != 0:
+                return False
+            if not wait_for_services(SERVICE_HEALTH_URLS):
+                print("Services started but did not report healthy yet")
+            return True
         except Exception as e:
             print(f"Start error: {e}")
             return False
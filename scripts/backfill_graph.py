@@ -51,16 +51,7 @@ def backfill(db_path: str, graph_path: str, dry_run: bool = False):
 
     if dry_run:
         # Just show what topics/entities would be extracted
-        store = HybridMemoryStore.__new__(HybridMemoryStore)
-        # Minimal init for extraction methods only
-        from core.memory import MemoryStore
-        store.sqlite         = MemoryStore(db_path)
-        store.graph          = None
-        store.graph_available = False
-        store._stop_sync     = True
-        store._embed_model   = None
-        import threading
-        store._embed_lock    = threading.Lock()
+        store = HybridMemoryStore(db_path, use_graph=False)
 
         for m in memories:
             content = m.get("content", "")
@@ -70,6 +61,7 @@ def backfill(db_path: str, graph_path: str, dry_run: bool = False):
             print(f"        Topics  : {topics}")
             print(f"        Entities: {[e['name'] for e in entities[:4]]}")
             print()
+        store.close()
         return
 
     # Real run
@@ -84,10 +76,7 @@ def backfill(db_path: str, graph_path: str, dry_run: bool = False):
 
     # Check which memory IDs are already in the graph to avoid duplicates
     try:
-        result  = store._graph_conn.execute("MATCH (m:Memory) RETURN m.id")
-        already = set()
-        while result.has_next():
-            already.add(result.get_next()[0])
+        already = store.graph_memory_ids()
         print(f"   Already in graph: {len(already)} nodes")
     except Exception:
         already = set()
@@ -125,7 +114,7 @@ def backfill(db_path: str, graph_path: str, dry_run: bool = False):
         }
 
         try:
-            store._sync_to_graph(item)
+            store.sync_to_graph(item)
             processed += 1
         except Exception as e:
             print(f"           ❌ Error: {e}")
@@ -7,18 +7,42 @@ Tests for SQLite + Kuzu Graph hybrid memory with:
   - Level 3: Durable sync queue
 """
 
+import asyncio
 import unittest
+import unittest.mock
 import tempfile
 import os
 import sys
 import json
+import time
 import sqlite3
+from datetime import datetime
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+from core import hybrid_memory
 from core.hybrid_memory import HybridMemoryStore, MemoryQuery, TOPIC_TAXONOMY
 
 
+def _payload(memory_id, content, created_at="2026-01-01T00:00:00"):
+    """A graph-sync payload shaped like the ones store() queues."""
+    return {"id": memory_id, "content": content, "category": "x",
+            "importance": "medium", "metadata": {}, "created_at": created_at}
+
+
+def _queue_rows(contents):
+    """(queue_id, memory_id, payload) sync_queue rows for {memory_id: content}."""
+    return [(n, n, json.dumps(_payload(n, content))) for n, content in contents.items()]
+
+
+def _stop_sync_worker(memory):
+    """Stop the background sync worker so a test can drive the queue itself."""
+    memory._stop_sync = True
+    memory._notify_sync()
+    if memory.graph_available:
+        memory._sync_thread.join()
+
+
 class TestHybridMemoryStore(unittest.TestCase):
     """Core store functionality."""
 
@@ -29,6 +53,7 @@ class TestHybridMemoryStore(unittest.TestCase):
 
     def tearDown(self):
         import shutil
+        self.memory.close()
         shutil.rmtree(self.temp_dir, ignore_errors=True)
 
     def test_initialization(self):
@@ -40,6 +65,14 @@ class TestHybridMemoryStore(unittest.TestCase):
         self.assertIsInstance(memory_id, int)
         self.assertGreater(memory_id, 0)
 
+    def test_store_many(self):
+        ids = self.memory.store_many(
+            [{"content": "First batched fact"}, {"content": "Second batched fact", "category": "arch"}],
+            common_metadata={"source": "test"}
+        )
+        self.assertEqual(len(ids), 2)
+        self.assertEqual(self.memory.get_stats()["sqlite"]["total"], 2)
+
     def test_recall_quick(self):
         self.memory.store("Python programming guide", category="programming")
         self.memory.store("JavaScript tutorial",      category="programming")
@@ -65,6 +98,32 @@ class TestHybridMemoryStore(unittest.TestCase):
         results = self.memory.recall(query)
         self.assertIsInstance(results, list)
 
+    def test_async_api(self):
+        async def run():
+            memory_id = await self.memory.astore("Async stored memory about Python")
+            ids       = await self.memory.astore_many([{"content": "Async batch memory"}])
+            results   = await self.memory.arecall(MemoryQuery(query_type="quick", text="Async"))
+            return memory_id, ids, results
+        memory_id, ids, results = asyncio.run(run())
+        self.assertIsInstance(memory_id, int)
+        self.assertEqual(len(ids), 1)
+        self.assertEqual(len(results), 2)
+
+    def test_sqlite_only_fallback(self):
+        memory = hybrid_memory.get_hybrid_memory(
+            os.path.join(self.temp_dir, "test_fallback.db"), use_graph=False)
+        self.assertFalse(memory.graph_available)
+        memory_id = memory.store("Python programming guide")
+        self.assertEqual(memory.store_many([{"content": "Python tips"}]), [memory_id + 1])
+        for query_type in ("quick", "semantic", "context"):
+            results = memory.recall(MemoryQuery(query_type=query_type, text="Python"))
+            self.assertEqual(len(results), 2)
+        self.assertEqual(memory.get_stats()["sync_queue_size"], 0)
+        memory.clear()
+        self.assertEqual(memory.get_stats()["sqlite"]["total"], 0)
+        memory.close()
+        memory.close()
+
     def test_memory_query_creation(self):
         query = MemoryQuery(query_type="context", text="test query", limit=10, context_depth=3)
         self.assertEqual(query.query_type,    "context")
@@ -82,6 +141,7 @@ class TestDurableSyncQueue(unittest.TestCase):
 
     def tearDown(self):
         import shutil
+        self.memory.close()
         shutil.rmtree(self.temp_dir, ignore_errors=True)
 
     def test_sync_queue_table_exists(self):
@@ -98,16 +158,72 @@ class TestDurableSyncQueue(unittest.TestCase):
         if not self.memory.graph_available:
             self.skipTest("Kuzu not available")
         self.memory.store("Architecture decision: using FastAPI", category="arch")
+        self.memory.flush()
         conn    = sqlite3.connect(self.db_path)
         count   = conn.execute("SELECT COUNT(*) FROM sync_queue").fetchone()[0]
         conn.close()
         self.assertGreaterEqual(count, 1)
 
+    def test_store_ids_and_await_durable(self):
+        """store() ids come from a reserved block; other writers get ids past it."""
+        first  = self.memory.store("Architecture decision: using FastAPI")
+        second = self.memory.store_many([{"content": "Docker deploy"}, {"content": "Lunch"}])
+        self.assertEqual(second, [first + 1, first + 2])
+        self.assertTrue(self.memory.await_durable(second[-1], timeout=5))
+
+        other = self.memory.sqlite.store("Written by another MemoryStore")
+        self.assertGreater(other, first + 2)
+        third = self.memory.store("Kubernetes in production")
+        self.assertEqual(third, first + 3)
+        self.assertTrue(self.memory.await_durable(timeout=5))
+
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute("SELECT id, content FROM memories ORDER BY id").fetchall()
+        conn.close()
+        self.assertEqual([r[0] for r in rows], [first, first + 1, first + 2, third, other])
+        self.assertEqual(rows[0][1], "Architecture decision: using FastAPI")
+
+    def test_await_durable_reports_failed_writes(self):
+        """A failed write makes await_durable() false for its id and for "everything"."""
+        ok = self.memory.store("Written normally")
+        self.assertTrue(self.memory.await_durable(timeout=5))
+        self.memory._write_batch = unittest.mock.Mock(side_effect=sqlite3.OperationalError("disk I/O error"))
+        lost = self.memory.store("Never written")
+        self.assertFalse(self.memory.await_durable(lost, timeout=5))
+        self.assertFalse(self.memory.await_durable(timeout=5))
+        self.assertTrue(self.memory.await_durable(ok, timeout=5))
+        self.assertEqual(self.memory.get_stats()["write_failed"], 1)
+
+    def test_close_hands_back_unused_ids(self):
+        """Ids continue without a gap after close() and reopen."""
+        last = self.memory.store_many([{"content": "Docker deploy"}, {"content": "Lunch"}])[-1]
+        self.memory.close()
+        self.memory = HybridMemoryStore(self.db_path)
+        self.assertEqual(self.memory.store("Kubernetes in production"), last + 1)
+
+    def test_payload_json_round_trip(self):
+        """Queue payloads read back as json.dumps would have written them."""
+        payload = {"id": 1, "content": "Café ☕", "metadata": {1: "x", "tags": ("a",)}}
+        text    = hybrid_memory._json_dumps(payload)
+        self.assertIsInstance(text, str)
+        self.assertEqual(hybrid_memory._json_loads(text), json.loads(json.dumps(payload)))
+
+    def test_close_writes_queued_jobs(self):
+        """close() leaves handed-over jobs in sync_queue and can be called twice."""
+        _stop_sync_worker(self.memory)
+        self.memory._enqueue(7, {"id": 7})
+        self.memory.close()
+        self.memory.close()
+        conn = sqlite3.connect(self.db_path)
+        ids  = [r[0] for r in conn.execute("SELECT memory_id FROM sync_queue")]
+        conn.close()
+        self.assertEqual(ids, [7])
+        self.assertFalse(self.memory.graph_available)
+
     def test_enqueue_and_mark_synced(self):
         """Enqueue then mark synced — verify flag flips."""
-        self.memory._enqueue(99, {"id": 99, "content": "test", "category": "x",
-                                   "importance": "medium", "metadata": {},
-                                   "created_at": "2026-01-01T00:00:00"})
+        self.memory._enqueue(99, _payload(99, "test"))
+        self.memory.flush()
         conn = sqlite3.connect(self.db_path)
         row  = conn.execute(
             "SELECT id, synced FROM sync_queue WHERE memory_id = 99"
@@ -126,11 +242,294 @@ class TestDurableSyncQueue(unittest.TestCase):
         conn.close()
         self.assertEqual(synced, 1)
 
+    def test_purge_synced_keeps_recent_and_pending(self):
+        """Only rows synced longer ago than the retention window are purged."""
+        _stop_sync_worker(self.memory)
+        conn = sqlite3.connect(self.db_path)
+        conn.executemany(
+            "INSERT INTO sync_queue (memory_id, payload, synced, created_at, synced_at) "
+            "VALUES (?, '{}', ?, '2026-01-01T00:00:00', ?)",
+            [(1, 1, "2000-01-01T00:00:00"), (2, 1, datetime.now().isoformat()), (3, 0, None)]
+        )
+        conn.commit()
+        self.memory._purge_synced()
+        ids = [r[0] for r in conn.execute("SELECT memory_id FROM sync_queue ORDER BY memory_id")]
+        plan = " ".join(r[-1] for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM sync_queue WHERE synced = 0 ORDER BY id LIMIT 5"
+        ))
+        conn.close()
+        self.assertEqual(ids, [2, 3])
+        self.assertIn("idx_sync_queue_pending", plan)
+
+    def test_failing_row_backs_off_then_dies(self):
+        """A row that never syncs is retried with backoff, then marked dead."""
+        if not self.memory.graph_available:
+            self.skipTest("Kuzu not available")
+        calls = []
+        sync_batch = self.memory._sync_batch
+        self.memory._sync_batch = lambda rows: calls.append(rows) or sync_batch(rows)
+        self.memory._enqueue(1, "not json")
+        deadline = time.monotonic() + 10
+        while self.memory.get_stats()["sync_queue_dead"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        stats = self.memory.get_stats()
+        self.assertEqual(stats["sync_queue_dead"], 1)
+        self.assertEqual(stats["sync_queue_size"], 0)
+        self.assertEqual(len(calls), hybrid_memory.SYNC_MAX_ATTEMPTS)
+
+    def test_graph_writes_run_on_graph_thread(self):
+        """clear(), scrub_and_rebuild_graph() and sync_to_graph() use the graph thread."""
+        if not self.memory.graph_available:
+            self.skipTest("Kuzu not available")
+        import threading
+        threads = []
+        execute = self.memory._graph_conn.execute
+        self.memory._graph_conn = unittest.mock.Mock(wraps=self.memory._graph_conn)
+        self.memory._graph_conn.execute.side_effect = (
+            lambda *args: threads.append(threading.current_thread().name) or execute(*args))
+        mid = self.memory.sqlite.store("Docker deploy notes for the API")
+        self.assertEqual(self.memory.scrub_and_rebuild_graph(), 1)
+        self.assertEqual(self.memory.graph_memory_ids(), {mid})
+        self.memory.clear()
+        self.assertEqual(self.memory.graph_memory_ids(), set())
+        self.memory.sync_to_graph(_payload(mid, "Docker deploy"))
+        self.assertEqual(self.memory.graph_memory_ids(), {mid})
+        self.assertTrue(threads)
+        self.assertTrue(all(name.startswith("kuzu-graph") for name in threads))
+
+    def test_sync_batch_writes_all_items(self):
+        """A batch of queue rows lands in the graph in one transaction."""
+        if not self.memory.graph_available:
+            self.skipTest("Kuzu not available")
+        rows = _queue_rows({n: f"Batch memory {n} about Docker" for n in (101, 102, 103)})
+        self.assertEqual(self.memory._sync_batch(rows), [101, 102, 103])
+        result = self.memory._graph_conn.execute(
+            "MATCH (m:Memory) WHERE m.id >= 101 RETURN COUNT(m)"
+        )
+        self.assertEqual(result.get_next()[0], 3)
+
+    def test_sync_batch_links_shared_topics(self):
+        """Memories in one batch keep their own topics and link to earlier ones."""
+        if not self.memory.graph_available:
+            self.skipTest("Kuzu not available")
+        rows = _queue_rows({201: "Docker for the API", 202: "Docker and kubectl"})
+        self.memory._sync_batch(rows)
+        result = self.memory._graph_conn.execute(
+            "MATCH (m:Memory)-[:HAS_TOPIC]->(t:Topic) RETURN m.id, t.name ORDER BY m.id, t.name"
+        )
+        topics = []
+        while result.has_next():
+            topics.append(tuple(result.get_next()))
+        self.assertEqual(topics, [(201, "API"), (201, "Docker"),
+                                  (202, "Docker"), (202, "Kubernetes")])
+        result = self.memory._graph_conn.execute(
+            "MATCH (a:Memory)-[:RELATED_TO]->(b:Memory) RETURN a.id, b.id"
+        )
+        self.assertEqual(result.get_next(), [202, 201])
+        self.assertFalse(result.has_next())
+
+    def test_sync_batch_stores_embeddings(self):
+        """A sync batch is embedded with one encode call and saved for semantic recall."""
+        if not self.memory.graph_available:
+            self.skipTest("Kuzu not available")
+        import numpy as np
+
+        class FakeModel:
+            calls = []
+
+            def encode(self, texts, **kwargs):
+                self.calls.append(list(texts))
+                return np.array([[1.0, 0.0] if "Docker" in t else [0.0, 1.0] for t in texts])
+
+        self.memory._embed_model = FakeModel()
+        ids = [self.memory.sqlite.store(content) for content in ("Docker deploy", "Lunch plans")]
+        self.memory._sync_batch(_queue_rows(dict(zip(ids, ("Docker deploy", "Lunch plans")))))
+        self.assertEqual(FakeModel.calls, [["Docker deploy", "Lunch plans"]])
+        conn = sqlite3.connect(self.db_path)
+        blob = conn.execute("SELECT vec FROM embeddings WHERE memory_id = ?", (ids[0],)).fetchone()[0]
+        conn.close()
+        self.assertEqual(np.frombuffer(blob, dtype=np.float16).tolist(), [1.0, 0.0])
+        results = self.memory._embedding_similarity_search([1.0, 0.0], limit=5)
+        self.assertEqual([r["id"] for r in results], [ids[0]])
+
+        # Later batches extend the cached matrix; deleted memories drop out
+        third = self.memory.sqlite.store("Docker swarm")
+        self.memory._sync_batch(_queue_rows({third: "Docker swarm"}))
+        self.memory.sqlite.delete_memory(ids[0])
+        results = self.memory._embedding_similarity_search([1.0, 0.0], limit=5)
+        self.assertEqual([r["id"] for r in results], [third])
+
+        # A cold load reads the float16 rows back; the deleted memory's row is gone
+        self.memory._emb_matrix = None
+        ids_loaded, matrix = self.memory._embedding_matrix()
+        self.assertEqual(sorted(ids_loaded), [ids[1], third])
+        self.assertEqual(matrix.dtype, np.float32)
+
+    def test_ann_index_matches_exact_search(self):
+        """Once its HNSW index is built the semantic search still finds the top hit."""
+        if not hybrid_memory.HNSWLIB_AVAILABLE:
+            self.skipTest("hnswlib not available")
+        import numpy as np
+        original = hybrid_memory.ANN_MIN_ITEMS
+        hybrid_memory.ANN_MIN_ITEMS = 1
+        self.addCleanup(setattr, hybrid_memory, "ANN_MIN_ITEMS", original)
+
+        rng  = np.random.default_rng(0)
+        vecs = rng.normal(size=(50, 8)).astype(np.float32)
+        vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+        ids  = self.memory.sqlite.store_many([{"content": f"Memory {n}"} for n in range(50)])
+        conn = sqlite3.connect(self.db_path)
+        conn.executemany("INSERT INTO embeddings (memory_id, vec) VALUES (?, ?)",
+                         [(mid, vec.astype(np.float16).tobytes()) for mid, vec in zip(ids, vecs)])
+        conn.commit()
+        conn.close()
+
+        def wait_for_index():
+            self.memory._embedding_matrix()   # starts the background build
+            deadline = time.monotonic() + 10
+            while self.memory._ann is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertIsNotNone(self.memory._ann)
+
+        wait_for_index()
+        results = self.memory._embedding_similarity_search(vecs[7].tolist(), limit=1)
+        self.assertEqual([r["id"] for r in results], [ids[7]])
+
+        # close() saves the index; a reopened store loads it
+        self.memory.close()
+        self.memory = HybridMemoryStore(self.db_path)
+        wait_for_index()
+        results = self.memory._embedding_similarity_search(vecs[9].tolist(), limit=1)
+        self.assertEqual([r["id"] for r in results], [ids[9]])
+        self.assertEqual(self.memory._ann.get_current_count(), 50)
+
+    def test_created_at_round_trips(self):
+        """Epoch-micros and legacy ISO created_at values read back as timestamps."""
+        if not self.memory.graph_available:
+            self.skipTest("Kuzu not available")
+        micros = int(datetime(2026, 3, 1, 12, 30).timestamp() * 1_000_000)
+        for n, created_at in ((501, micros), (502, "2026-01-01T00:00:00")):
+            self.memory._sync_to_graph(_payload(n, f"Memory {n}", created_at))
+        result = self.memory._graph_conn.execute(
+            "MATCH (m:Memory) RETURN m.id, m.content, m.category, m.created_at ORDER BY m.created_at"
+        )
+        self.assertEqual([r["created_at"] for r in self.memory._parse_graph_results(result)],
+                         ["2026-01-01 00:00:00", "2026-03-01 12:30:00"])
+
+    def test_related_links_pick_latest_shared_topic(self):
+        """RELATED_TO targets are the five latest earlier memories on the topic."""
+        if not self.memory.graph_available:
+            self.skipTest("Kuzu not available")
+        rows = _queue_rows({n: f"Docker note {n}" for n in range(401, 408)})
+        self.memory._sync_batch(rows[:3])
+        self.memory._topic_recent_ids.clear()   # cold window is read back from the graph
+        self.memory._sync_batch(rows[3:])
+        result = self.memory._graph_conn.execute(
+            "MATCH (a:Memory)-[:RELATED_TO]->(b:Memory) WHERE a.id = 407 RETURN b.id ORDER BY b.id"
+        )
+        related = []
+        while result.has_next():
+            related.append(result.get_next()[0])
+        self.assertEqual(related, [402, 403, 404, 405, 406])
+
+    def test_related_strength_is_topic_overlap(self):
+        """RELATED_TO strength is the fraction of linked topics both memories share."""
+        if not self.memory.graph_available:
+            self.skipTest("Kuzu not available")
+        for n, content in ((601, "Docker for the API"), (602, "Docker only"),
+                           (603, "Docker behind the API")):
+            self.memory._sync_to_graph(_payload(n, content))
+        result = self.memory._graph_conn.execute(
+            "MATCH (a:Memory)-[r:RELATED_TO]->(b:Memory) WHERE a.id = 603 "
+            "RETURN b.id, r.strength ORDER BY b.id"
+        )
+        self.assertEqual(result.get_all(), [[601, 1.0], [602, 0.5]])
+
+    def test_temporal_links_follow_sync_order(self):
+        """FOLLOWS chains each synced memory to the previous one, across batches."""
+        if not self.memory.graph_available:
+            self.skipTest("Kuzu not available")
+        def rows(ids):
+            return _queue_rows({n: f"Memory {n}" for n in ids})
+        self.memory._sync_batch(rows([301, 302]))
+        self.memory._last_memory_id = None   # cold start reads MAX(id) from the graph
+        self.memory._sync_batch(rows([305]))
+        result = self.memory._graph_conn.execute(
+            "MATCH (a:Memory)-[:FOLLOWS]->(b:Memory) RETURN a.id, b.id ORDER BY a.id"
+        )
+        links = []
+        while result.has_next():
+            links.append(tuple(result.get_next()))
+        self.assertEqual(links, [(301, 302), (302, 305)])
+
+    def test_stats_counts_track_graph_writes(self):
+        """Running graph counts match a full COUNT scan after syncing."""
+        if not self.memory.graph_available:
+            self.skipTest("Kuzu not available")
+        self.assertEqual(self.memory.get_stats()["graph"], {"nodes": 0, "relationships": 0})
+        rows = _queue_rows({n: f"Docker and FastAPI note {n}" for n in (601, 602, 603)})
+        self.memory._sync_batch(rows[:2])
+        self.memory._sync_to_graph(json.loads(rows[2][2]))
+        self.assertEqual(self.memory.get_stats()["graph"], self.memory._count_graph())
+        self.assertEqual(self.memory.get_stats()["graph"]["nodes"], 3)
+
+    def test_overflow_drops_oldest_pending(self):
+        """Past max_pending the oldest unsynced jobs are dropped and counted."""
+        memory = HybridMemoryStore(os.path.join(self.temp_dir, "test_cap.db"), max_pending=2)
+        self.addCleanup(memory.close)
+        _stop_sync_worker(memory)
+        for n in (1, 2, 3):
+            memory._enqueue(n, {"id": n})
+        memory.flush()
+        conn = sqlite3.connect(memory.db_path)
+        ids  = [r[0] for r in conn.execute("SELECT memory_id FROM sync_queue ORDER BY id")]
+        conn.close()
+        self.assertEqual(ids, [2, 3])
+        self.assertEqual(memory.get_stats()["sync_queue_dropped"], 1)
+
+    def test_unknown_overflow_policy(self):
+        with self.assertRaises(ValueError):
+            HybridMemoryStore(self.db_path, overflow_policy="spill")
+
+    def test_unknown_embedding_backend(self):
+        with self.assertRaises(ValueError):
+            HybridMemoryStore(self.db_path, embedding_backend="tensorrt")
+
+    def test_related_requires_topics(self):
+        with self.assertRaises(ValueError):
+            HybridMemoryStore(self.db_path, enable_topics=False)
+
+    def test_disabled_sync_steps_write_memory_nodes_only(self):
+        """With every sync step disabled only Memory nodes reach the graph."""
+        memory = HybridMemoryStore(os.path.join(self.temp_dir, "test_min.db"),
+                                   enable_topics=False, enable_entities=False,
+                                   enable_related=False, enable_temporal=False)
+        self.addCleanup(memory.close)
+        if not memory.graph_available:
+            self.skipTest("Kuzu not available")
+        _stop_sync_worker(memory)
+        rows = _queue_rows({n: f"Docker note {n}" for n in (1, 2)})
+        memory._sync_batch(rows)
+        memory._sync_to_graph(_payload(3, "Docker note 3"))
+        self.assertEqual(memory.get_stats()["graph"], {"nodes": 3, "relationships": 0})
+
     def test_stats_includes_sync_queue_size(self):
         stats = self.memory.get_stats()
         self.assertIn("sync_queue_size", stats)
         self.assertIsInstance(stats["sync_queue_size"], int)
 
+    def test_stats_sync_queue_size_counts_handed_over_jobs(self):
+        """Jobs still with the storage worker count as pending, without a COUNT(*)."""
+        _stop_sync_worker(self.memory)
+        self.memory._enqueue_many([(1, {"id": 1}), (2, {"id": 2})])
+        self.assertEqual(self.memory.get_stats()["sync_queue_size"], 2)
+        self.memory.flush()
+        conn     = sqlite3.connect(self.db_path)
+        queue_id = conn.execute("SELECT MIN(id) FROM sync_queue").fetchone()[0]
+        conn.close()
+        self.memory._mark_synced(queue_id)
+        self.assertEqual(self.memory.get_stats()["sync_queue_size"], 1)
+
 
 class TestTopicExtraction(unittest.TestCase):
     """Level 1 — rich topic extraction."""
@@ -141,6 +540,7 @@ class TestTopicExtraction(unittest.TestCase):
 
     def tearDown(self):
         import shutil
+        self.memory.close()
         shutil.rmtree(self.temp_dir, ignore_errors=True)
 
     def test_detects_docker(self):
@@ -184,6 +584,7 @@ class TestEntityExtraction(unittest.TestCase):
 
     def tearDown(self):
         import shutil
+        self.memory.close()
         shutil.rmtree(self.temp_dir, ignore_errors=True)
 
     def test_detects_known_tech(self):
@@ -208,6 +609,97 @@ class TestEntityExtraction(unittest.TestCase):
         entities = self.memory._extract_entities(rich)
         self.assertLessEqual(len(entities), 3)
 
+    def test_known_tech_in_list_order(self):
+        # Matches come back in TECH_ENTITIES order, not text order, and are case-sensitive
+        entities = self.memory._extract_entities("Redis in front of PostgreSQL, not redis-cli")
+        self.assertEqual([e["name"] for e in entities], ["PostgreSQL", "Redis"])
+
+    def test_shared_scan_keeps_tech_case(self):
+        # Topics match any case, known technologies only their own spelling,
+        # also when lowercasing shifts positions ("İ" → "i̇")
+        for prefix in ("", "İstanbul: "):
+            text = prefix + "FASTAPI and fastapi behind Redis"
+            self.assertIn("API", self.memory._extract_topics(text))
+            self.assertEqual([e["name"] for e in self.memory._extract_entities(text)],
+                             ["Redis", "FASTAPI"])
+
+    def test_cached_result_not_shared(self):
+        # Results are memoized, so callers must get their own copies
+        text  = "we use FastAPI and PostgreSQL"
+        first = self.memory._extract_entities(text)
+        first[0]["name"] = "Mutated"
+        first.append({"name": "Extra", "type": "CLASS"})
+        self.assertEqual(self.memory._extract_entities(text),
+                         [{"name": "FastAPI",    "type": "TECHNOLOGY"},
+                          {"name": "PostgreSQL", "type": "TECHNOLOGY"}])
+
+
+class TestRecallCache(unittest.TestCase):
+    """Semantic recall cache."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path  = os.path.join(self.temp_dir, "test_cache.db")
+        self.memory   = HybridMemoryStore(self.db_path, recall_cache_size=2)
+        self.query    = MemoryQuery(query_type="semantic", text="how do we deploy?")
+
+    def tearDown(self):
+        import shutil
+        self.memory.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_paraphrase_hits(self):
+        self.memory._recall_cache_put(self.query, [1.0, 0.0], [{"id": 1}])
+        paraphrase = MemoryQuery(query_type="semantic", text="deployment steps?")
+        self.assertEqual(self.memory._recall_cache_get(paraphrase, [0.99, 0.14]), [{"id": 1}])
+        self.assertIsNone(self.memory._recall_cache_get(paraphrase, [0.0, 1.0]))
+
+    def test_other_query_type_misses(self):
+        self.memory._recall_cache_put(self.query, [1.0, 0.0], [{"id": 1}])
+        other = MemoryQuery(query_type="context", text="how do we deploy?")
+        self.assertIsNone(self.memory._recall_cache_get(other, [1.0, 0.0]))
+
+    def test_lru_eviction(self):
+        for n in range(3):
+            q = MemoryQuery(query_type="semantic", text=f"q{n}")
+            self.memory._recall_cache_put(q, None, [{"id": n}])
+        self.assertEqual(len(self.memory._recall_cache), 2)
+        self.assertIsNone(self.memory._recall_cache_get(
+            MemoryQuery(query_type="semantic", text="q0"), None))
+
+    def test_store_invalidates(self):
+        self.memory._recall_cache_put(self.query, [1.0, 0.0], [{"id": 1}])
+        self.memory.store("New deployment notes", category="ops")
+        self.assertIsNone(self.memory._recall_cache_get(self.query, [1.0, 0.0]))
+
+    def test_context_recall_cached_without_embedding(self):
+        if not self.memory.graph_available:
+            self.skipTest("Kuzu not available")
+        def no_embed(text):
+            raise AssertionError("context recall must not embed")
+        self.memory._embed = no_embed
+        calls = []
+        self.memory._recall_graph = lambda query, query_vec=None: calls.append(query) or [{"id": 1}]
+        for text in ("deploy  steps", " deploy steps "):
+            self.assertEqual(self.memory.recall(MemoryQuery(query_type="context", text=text)),
+                             [{"id": 1}])
+        self.assertEqual(len(calls), 1)
+
+    def test_delete_invalidates_and_removes_graph_node(self):
+        memory_id = self.memory.store("Docker deployment notes", category="ops")
+        if self.memory.graph_available:
+            self.memory.flush()
+            deadline = time.monotonic() + 10
+            while self.memory.get_stats()["sync_queue_size"] and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.memory._recall_cache_put(self.query, [1.0, 0.0], [{"id": memory_id}])
+
+        self.assertTrue(self.memory.delete_memory(memory_id))
+        self.assertFalse(self.memory.delete_memory(memory_id))
+        self.assertIsNone(self.memory._recall_cache_get(self.query, [1.0, 0.0]))
+        if self.memory.graph_available:
+            self.assertEqual(self.memory.get_stats()["graph"]["nodes"], 0)
+
 
 class TestMemoryQuery(unittest.TestCase):
     """MemoryQuery dataclass defaults."""
@@ -105,6 +105,34 @@ class TestMemoryStore(unittest.TestCase):
         # Delete non-existent
         deleted = self.memory.delete_memory(99999)
         self.assertFalse(deleted)
+    
+    def test_store_many(self):
+        """Test storing a batch of memories in one call."""
+        ids = self.memory.store_many([
+            {"content": "Batch one", "category": "test"},
+            {"content": "Batch two", "importance": "high", "metadata": {"k": 1}},
+        ])
+        
+        self.assertEqual(len(ids), 2)
+        self.assertLess(ids[0], ids[1])
+        
+        memories = self.memory.get_all_memories(limit=100)
+        self.assertEqual({m["content"] for m in memories}, {"Batch one", "Batch two"})
+
+    def test_search_ids(self):
+        """Test full-text phrase lookup of memory ids, newest first."""
+        if not self.memory.fts_available:
+            self.skipTest("SQLite built without FTS5")
+        first  = self.memory.store("We deploy with Docker compose")
+        second = self.memory.store("Docker compose runs the database")
+        self.memory.store("Kubernetes in production")
+
+        self.assertEqual(self.memory.search_ids("docker comp"), [second, first])
+        self.assertEqual(self.memory.search_ids("compose docker"), [])
+        self.assertEqual(self.memory.search_ids('"'), [])
+
+        self.memory.delete_memory(second)
+        self.assertEqual(self.memory.search_ids("docker compose"), [first])
 
 
 if __name__ == "__main__":
@@ -169,6 +169,75 @@ class TestGeminiProvider:
         except ImportError:
             pytest.skip("Gemini provider not available")
 
+    def test_gemini_client_shared_per_loop(self):
+        """Test that providers share one pooled client until aclose_clients()."""
+        import asyncio
+        import httpx
+        from core.providers import gemini_provider
+        from core.providers.base import Message
+
+        def reply(request):
+            return httpx.Response(200, json={
+                "candidates": [{"content": {"parts": [{"text": "Olá"}]}}]
+            })
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            client = httpx.AsyncClient(transport=httpx.MockTransport(reply))
+            gemini_provider._clients[loop] = client
+            first = gemini_provider.GeminiProvider(api_key="test-key")
+            second = gemini_provider.GeminiProvider(api_key="test-key")
+            texts = [await p.generate_sync([Message(role="user", content="Oi")])
+                     for p in (first, second)]
+            await gemini_provider.aclose_clients()
+            return texts, client.is_closed, loop in gemini_provider._clients
+
+        texts, closed, still_cached = asyncio.run(run())
+        assert texts == ["Olá", "Olá"]
+        assert closed
+        assert not still_cached
+
+    def test_gemini_reply_without_text(self):
+        """Test that a reply without candidate text yields nothing."""
+        import asyncio
+        import httpx
+        from core.providers import gemini_provider
+        from core.providers.base import Message
+
+        bodies = [{"promptFeedback": {"blockReason": "SAFETY"}},
+                  {"candidates": []},
+                  {"candidates": [{"content": {"parts": [{}]}}]}]
+
+        async def run(body):
+            loop = asyncio.get_running_loop()
+            gemini_provider._clients[loop] = httpx.AsyncClient(
+                transport=httpx.MockTransport(lambda request: httpx.Response(200, json=body))
+            )
+            provider = gemini_provider.GeminiProvider(api_key="test-key")
+            try:
+                return [chunk async for chunk in provider.generate([Message(role="user", content="Oi")])]
+            finally:
+                await gemini_provider.aclose_clients()
+
+        for body in bodies:
+            assert asyncio.run(run(body)) == []
+
+    def test_gemini_convert_messages(self):
+        """Test that system messages become the system instruction."""
+        from core.providers.gemini_provider import GeminiProvider
+        from core.providers.base import Message
+
+        provider = GeminiProvider(api_key="test-key")
+        messages = [Message(role="system", content="Be brief"),
+                    Message(role="user", content="Oi"),
+                    Message(role="assistant", content="Olá")]
+
+        contents, system = provider._convert_messages(messages)
+        assert system == "Be brief"
+        assert contents == [{"role": "user", "parts": [{"text": "Oi"}]},
+                            {"role": "model", "parts": [{"text": "Olá"}]}]
+        assert provider._convert_messages(messages, "Be kind")[1] == "Be kind"
+
 
 class TestProviderFactory:
     """Test provider factory."""
@@ -263,3 +332,16 @@ class TestProviderConfiguration:
         expected_keys = ["provider", "agent", "memory", "mode", "providers", "defaults"]
         has_expected = any(key in config for key in expected_keys)
         assert has_expected or len(config) == 0
+
+    def test_load_config_rereads_changed_file(self, tmp_path, monkeypatch):
+        """Test that load_config picks up edits to init.yaml."""
+        from core.llm_router import load_config
+
+        monkeypatch.chdir(tmp_path)
+        init = tmp_path / "init.yaml"
+        init.write_text("defaults:\n  provider: kimi\n")
+        assert load_config()["defaults"]["provider"] == "kimi"
+        load_config()["defaults"]["provider"] = "mutated"
+        assert load_config()["defaults"]["provider"] == "kimi"
+        init.write_text("defaults:\n  provider: gemini\n")
+        assert load_config()["defaults"]["provider"] == "gemini"